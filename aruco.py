@@ -8,4 +8,14 @@ aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_6X6_250)
 # 실제 인쇄 시 크기는 워드/한글에 넣고 위와 동일하게 조절하면 
 # 원본 해상도가 깡패라 인식률이 훨씬 좋습니다.
 img = cv2.aruco.generateImageMarker(aruco_dict, id=0, sidePixels=200)
-cv2.imwrite("marker_id0.png", img)
\ No newline at end of file
+cv2.imwrite("marker_id0.png", img)
+
+# 도킹 보드 (DockingAI.USE_BOARD = True 일 때) 인쇄용 이미지
+# 배치/ID/간격은 DockingAI 설정을 그대로 사용 -> 인쇄 시 마커 한 변이 MARKER_SIZE 가 되도록 조절
+from docking_ai import DockingAI
+docking = DockingAI(headless=True)
+px_per_cm = 200 / docking.MARKER_SIZE
+board_w = docking.BOARD_COLS * docking.MARKER_SIZE + (docking.BOARD_COLS - 1) * docking.BOARD_SEPARATION
+board_h = docking.BOARD_ROWS * docking.MARKER_SIZE + (docking.BOARD_ROWS - 1) * docking.BOARD_SEPARATION
+board_img = docking.board.generateImage((int(board_w * px_per_cm) + 50, int(board_h * px_per_cm) + 50), marginSize=25)
+cv2.imwrite("board_id0.png", board_img)
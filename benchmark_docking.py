@@ -0,0 +1,252 @@
+import cv2
+import numpy as np
+import math
+import time
+import json
+import argparse
+import os
+from docking_ai import DockingAI
+from detector_profile import DEFAULT_DETECTOR_PROFILE_PATH
+from profiler import StageProfiler, NULL_PROFILER
+
+# =========================================================
+# DockingAI 오프라인 벤치마크 (카메라 없이 CPU에서 재현 가능한 수치)
+# - aruco.py 와 동일하게 DICT_6X6_250 / ID 0 마커를 생성
+# - 캘리브레이션 값(camera_matrix, dist_coeffs)으로 알려진 자세에 렌더링
+# - DockingAI.process 의 속도 / 검출률 / 거리·X·Yaw 오차 측정
+# =========================================================
+
+def make_marker_texture(dictionary_id, marker_id, side_pixels=200):
+    aruco_dict = cv2.aruco.getPredefinedDictionary(dictionary_id)
+    img = cv2.aruco.generateImageMarker(aruco_dict, id=marker_id, sidePixels=side_pixels)
+    # 인쇄물처럼 흰 여백(1칸) 추가 -> 마커 테두리가 배경과 분리됨
+    cell = side_pixels // 8
+    img = cv2.copyMakeBorder(img, cell, cell, cell, cell, cv2.BORDER_CONSTANT, value=255)
+    scale = img.shape[0] / side_pixels  # 여백 포함 한 변 / 마커 한 변
+    return img, scale
+
+def make_board_texture(ai, px_per_cm=120):
+    # DockingAI 보드 설정 그대로 렌더링 (여백 포함), scale 은 MARKER_SIZE 대비 한 변 비율
+    board_w = ai.BOARD_COLS * ai.MARKER_SIZE + (ai.BOARD_COLS - 1) * ai.BOARD_SEPARATION
+    board_h = ai.BOARD_ROWS * ai.MARKER_SIZE + (ai.BOARD_ROWS - 1) * ai.BOARD_SEPARATION
+    margin = int(round(ai.BOARD_SEPARATION * px_per_cm))
+    side = int(round(max(board_w, board_h) * px_per_cm))
+    img = ai.board.generateImage((side + 2 * margin, side + 2 * margin), marginSize=margin)
+    scale = (max(board_w, board_h) + 2 * margin / px_per_cm) / ai.MARKER_SIZE
+    return img, scale
+
+def make_distortion_map(camera_matrix, dist_coeffs, w, h):
+    # 왜곡된 출력 픽셀마다 이상적(핀홀) 이미지의 좌표를 미리 계산 -> remap 한 번으로 렌즈 왜곡 적용
+    xs, ys = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+    pts = np.stack([xs.ravel(), ys.ravel()], axis=1).reshape(-1, 1, 2)
+    ideal = cv2.undistortPoints(pts, camera_matrix, dist_coeffs, P=camera_matrix).reshape(h, w, 2)
+    return ideal[..., 0].copy(), ideal[..., 1].copy()
+
+def make_background(w, h, rng):
+    # 완만한 밝기 그라데이션 + 약한 저주파 얼룩
+    grad = np.linspace(110, 170, w, dtype=np.float32)[None, :].repeat(h, axis=0)
+    blobs = cv2.resize(rng.normal(0, 12, (h // 40, w // 40)).astype(np.float32), (w, h), interpolation=cv2.INTER_CUBIC)
+    return np.clip(grad + blobs, 0, 255).astype(np.uint8)
+
+def pose_to_rvec(roll_deg, pitch_deg, yaw_deg):
+    # 카메라를 정면으로 바라보는 마커 (마커 y축 위, z축 카메라 방향) 기준으로 작은 회전 추가
+    face = cv2.Rodrigues(np.array([math.pi, 0.0, 0.0]))[0]
+    rx = cv2.Rodrigues(np.array([math.radians(pitch_deg), 0.0, 0.0]))[0]
+    ry = cv2.Rodrigues(np.array([0.0, math.radians(yaw_deg), 0.0]))[0]
+    rz = cv2.Rodrigues(np.array([0.0, 0.0, math.radians(roll_deg)]))[0]
+    return cv2.Rodrigues(face @ ry @ rx @ rz)[0]
+
+def generate_poses(n, rng, mode):
+    poses = []
+    for i in range(n):
+        if mode == "approach":
+            # 30cm -> 7cm 접근하면서 좌우/Yaw 가 천천히 흔들리는 궤적
+            t = i / max(n - 1, 1)
+            z = 30.0 - 23.0 * t
+            x = 1.5 * math.sin(2 * math.pi * 1.5 * t) * (z / 30.0)
+            y = 0.5 * math.sin(2 * math.pi * 0.7 * t)
+            yaw = 10.0 * math.sin(2 * math.pi * 1.1 * t)
+            pitch = 5.0 * math.sin(2 * math.pi * 0.5 * t)
+            roll = 3.0 * math.sin(2 * math.pi * 0.9 * t)
+        else:
+            z = rng.uniform(7.0, 30.0)
+            x = rng.uniform(-0.1, 0.1) * z
+            y = rng.uniform(-0.05, 0.05) * z
+            yaw, pitch, roll = rng.uniform(-25, 25), rng.uniform(-15, 15), rng.uniform(-10, 10)
+        rvec = pose_to_rvec(roll, pitch, yaw)
+        tvec = np.array([[x], [y], [z]], dtype=np.float64)
+        poses.append((rvec, tvec))
+    return poses
+
+def render_frame(texture, texture_scale, rvec, tvec, ai, background, dist_map, noise_std, blur_sigma, rng):
+    h, w = background.shape
+    s = ai.MARKER_SIZE * texture_scale / 2
+    quad_3d = np.array([[-s, s, 0], [s, s, 0], [s, -s, 0], [-s, -s, 0]], dtype=np.float64)
+    # 왜곡 없는 핀홀 투영 -> 호모그래피로 붙인 뒤 remap 으로 렌즈 왜곡 적용
+    quad_2d, _ = cv2.projectPoints(quad_3d, rvec, tvec, ai.camera_matrix, None)
+
+    tw = texture.shape[1] - 0.5
+    src = np.array([[-0.5, -0.5], [tw, -0.5], [tw, tw], [-0.5, tw]], dtype=np.float32)
+    H = cv2.getPerspectiveTransform(src, quad_2d.reshape(4, 2).astype(np.float32))
+
+    ideal = background.copy()
+    cv2.warpPerspective(texture, H, (w, h), dst=ideal, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_TRANSPARENT)
+    img = cv2.remap(ideal, dist_map[0], dist_map[1], cv2.INTER_LINEAR) if dist_map is not None else ideal
+
+    if blur_sigma > 0:
+        img = cv2.GaussianBlur(img, (0, 0), blur_sigma)
+    if noise_std > 0:
+        img = np.clip(img + rng.normal(0, noise_std, img.shape), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+def expected_output(ai, rvec, tvec):
+    # DockingAI 출력과 같은 단위로 정답 변환 (DIST_SCALE / DIST_OFFSET 보정 포함)
+    dist = float(np.linalg.norm(tvec)) * ai.DIST_SCALE + ai.DIST_OFFSET
+    x = float(tvec[0][0]) * ai.DIST_SCALE
+    yaw = ai.euler_from_quaternion(rvec)[2]
+    return dist, x, yaw
+
+def summarize(values):
+    if len(values) == 0:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    a = np.abs(np.asarray(values, dtype=np.float64))
+    return {"mean": float(a.mean()), "p50": float(np.percentile(a, 50)),
+            "p95": float(np.percentile(a, 95)), "max": float(a.max())}
+
+def render_scene(ai, frames, mode, noise, blur, distort, board, rng, w=640, h=480):
+    if board:
+        ai.USE_BOARD = True
+        texture, texture_scale = make_board_texture(ai)
+    else:
+        texture, texture_scale = make_marker_texture(ai.target_dict, ai.TARGET_ID)
+    background = make_background(w, h, rng)
+    dist_map = make_distortion_map(ai.camera_matrix, ai.dist_coeffs, w, h) if distort else None
+
+    poses = generate_poses(frames, rng, mode)
+    images = [render_frame(texture, texture_scale, r, t, ai, background, dist_map, noise, blur, rng) for r, t in poses]
+    return poses, images
+
+def marker_corners(ai, rvec, tvec, distort):
+    # 타겟 마커 코너 정답 (ArUco 코너 순서, 렌즈 왜곡 적용된 픽셀 좌표)
+    pts, _ = cv2.projectPoints(ai.obj_points.astype(np.float64), rvec, tvec, ai.camera_matrix,
+                               ai.dist_coeffs if distort else None)
+    return pts.reshape(4, 2)
+
+def export_frames(path, frames=200, mode="random", noise=2.0, blur=0.0, distort=True, seed=0):
+    # tune_detector.py 용 프레임 세트: <path>/000000.png ... + labels.json (프레임별 타겟 코너 정답)
+    rng = np.random.default_rng(seed)
+    ai = DockingAI(headless=True, detector_profile_path=None)
+    poses, images = render_scene(ai, frames, mode, noise, blur, distort, False, rng)
+    os.makedirs(path, exist_ok=True)
+    labels = {"dict": "6X6_250", "target_id": ai.TARGET_ID, "source": "benchmark_docking.py",
+              "config": {"mode": mode, "noise": noise, "blur": blur, "distort": distort, "seed": seed}, "frames": {}}
+    for i, ((rvec, tvec), img) in enumerate(zip(poses, images)):
+        name = f"{i:06d}.png"
+        cv2.imwrite(os.path.join(path, name), cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+        labels["frames"][name] = marker_corners(ai, rvec, tvec, distort).round(3).tolist()
+    with open(os.path.join(path, "labels.json"), "w") as f:
+        json.dump(labels, f)
+    return len(images)
+
+def run_benchmark(frames=200, mode="approach", noise=2.0, blur=0.0, distort=True, seed=0, warmup=5, headless=False, board=False, fps=30.0, profile=False,
+                  detector_profile=DEFAULT_DETECTOR_PROFILE_PATH):
+    rng = np.random.default_rng(seed)
+    ai = DockingAI(headless=headless, detector_profile_path=detector_profile)
+    # 정답은 캡처 시점 자세 -> 지연 보상(미래 외삽) 끄고 비교, 타임스탬프는 가상 카메라 fps 기준
+    ai.LATENCY_COMP = False
+
+    poses, images = render_scene(ai, frames, mode, noise, blur, distort, board, rng)
+
+    # 워밍업 (첫 호출 비용 제외)
+    for i, img in enumerate(images[:warmup]):
+        ai.process(img.copy(), timestamp=i / fps)
+    ai.reset_tracking()
+    # 구간별 시간은 워밍업 이후만 측정
+    prof = ai.prof = StageProfiler(window=frames) if profile else NULL_PROFILER
+
+    latencies, err_dist, err_x, err_yaw = [], [], [], []
+    detected = 0
+    t_start = time.perf_counter()
+    for i, ((rvec, tvec), img) in enumerate(zip(poses, images)):
+        if mode == "random":
+            ai.reset_tracking()  # 프레임 간 연관 없음 -> 추적/스무딩 상태 초기화
+        t0 = time.perf_counter()
+        data, _ = ai.process(img, timestamp=i / fps)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        prof.tick()
+
+        if data["found"]:
+            detected += 1
+            gt_dist, gt_x, gt_yaw = expected_output(ai, rvec, tvec)
+            err_dist.append(data["dist_cm"] - gt_dist)
+            err_x.append(data["x_cm"] - gt_x)
+            err_yaw.append((data["yaw"] - gt_yaw + 180.0) % 360.0 - 180.0)
+    total = time.perf_counter() - t_start
+
+    lat = np.asarray(latencies)
+    return {
+        "config": {"frames": frames, "mode": mode, "noise": noise, "blur": blur,
+                   "distort": distort, "headless": headless, "board": board, "fps": fps, "seed": seed, "opencv": cv2.__version__},
+        "fps": frames / total,
+        "latency_ms": {"mean": float(lat.mean()), "p50": float(np.percentile(lat, 50)),
+                       "p95": float(np.percentile(lat, 95)), "p99": float(np.percentile(lat, 99))},
+        "detection_rate": detected / frames,
+        "abs_error": {"dist_cm": summarize(err_dist), "x_cm": summarize(err_x), "yaw_deg": summarize(err_yaw)},
+        "stages_ms": prof.summary()["stages"] if profile else None,
+    }
+
+def print_report(report):
+    c = report["config"]
+    print(f"=== DockingAI Benchmark ({c['mode']}, {c['frames']} frames, noise={c['noise']}, blur={c['blur']}, seed={c['seed']}) ===")
+    lat = report["latency_ms"]
+    print(f"FPS       : {report['fps']:.1f}")
+    print(f"Latency   : p50 {lat['p50']:.2f} ms | p95 {lat['p95']:.2f} ms | p99 {lat['p99']:.2f} ms")
+    print(f"Detection : {report['detection_rate'] * 100:.1f} %")
+    for name, e in report["abs_error"].items():
+        if e["mean"] is None:
+            print(f"{name:10s}: -")
+        else:
+            print(f"{name:10s}: mean {e['mean']:.3f} | p50 {e['p50']:.3f} | p95 {e['p95']:.3f} | max {e['max']:.3f}")
+    if report.get("stages_ms"):
+        print("--- stages (ms) ---")
+        for name, v in report["stages_ms"].items():
+            print(f"{name:13s}: p50 {v['p50']:.3f} | p95 {v['p95']:.3f} | max {v['max']:.3f} | n {v['n']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="DockingAI offline benchmark with synthetic ArUco renders")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--mode", choices=["approach", "random"], default="approach",
+                        help="approach: 연속 접근 궤적 / random: 독립 자세 (추적 상태 매 프레임 초기화)")
+    parser.add_argument("--noise", type=float, default=2.0, help="가우시안 노이즈 표준편차 (gray level)")
+    parser.add_argument("--blur", type=float, default=0.0, help="가우시안 블러 sigma (px)")
+    parser.add_argument("--no-distort", action="store_true", help="렌즈 왜곡 적용 안 함")
+    parser.add_argument("--headless", action="store_true", help="DockingAI 그리기 생략")
+    parser.add_argument("--board", action="store_true", help="단일 마커 대신 GridBoard 타겟 (USE_BOARD)")
+    parser.add_argument("--fps", type=float, default=30.0, help="가상 카메라 fps (추적기 타임스탬프)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="DockingAI.process 구간별 시간 출력")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--detector-profile", default=DEFAULT_DETECTOR_PROFILE_PATH,
+                        help="검출 파라미터 프로파일 (tune_detector.py 결과, 'none' 이면 DockingAI 기본값)")
+    parser.add_argument("--export", metavar="DIR", help="벤치마크 대신 렌더링 프레임 + 코너 정답을 저장 (tune_detector.py 입력)")
+    args = parser.parse_args()
+    detector_profile = None if args.detector_profile == "none" else args.detector_profile
+
+    if args.export:
+        if args.board:
+            parser.error("--export 는 단일 마커만 지원 (코너 정답이 타겟 마커 기준)")
+        n = export_frames(args.export, frames=args.frames, mode=args.mode, noise=args.noise, blur=args.blur,
+                          distort=not args.no_distort, seed=args.seed)
+        print(f"exported {n} frames -> {args.export}")
+        return
+
+    report = run_benchmark(frames=args.frames, mode=args.mode, noise=args.noise, blur=args.blur,
+                           distort=not args.no_distort, seed=args.seed, headless=args.headless, board=args.board, fps=args.fps, profile=args.profile,
+                           detector_profile=detector_profile)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
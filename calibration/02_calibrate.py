@@ -1,64 +1,201 @@
 import cv2
 import numpy as np
+import argparse
 import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 상위 폴더의 calibration_profile 사용 (DockingAI 가 읽는 프로파일 형식)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from calibration_profile import CalibrationProfile, DEFAULT_PROFILE_PATH
 
 # ==========================================
 # [최종 설정] 사각형 9x6개 기준
 # ------------------------------------------
 # OpenCV는 교차점 수를 세므로 1씩 뺍니다.
-CHECKERBOARD = (8, 5) 
+CHECKERBOARD = (8, 5)
 
 # 한 칸의 실제 크기 (3cm = 30.0mm)
-SQUARE_SIZE = 30.0 
+SQUARE_SIZE = 30.0
 # ==========================================
 
-# 3D 점 좌표 생성
-# (8 * 5)개의 점을 준비
-objp = np.zeros((CHECKERBOARD[0] * CHECKERBOARD[1], 3), np.float32)
-objp[:, :2] = np.mgrid[0:CHECKERBOARD[0], 0:CHECKERBOARD[1]].T.reshape(-1, 2)
-objp = objp * SQUARE_SIZE
-
-objpoints = [] # 3D points
-imgpoints = [] # 2D points
-
-images = glob.glob('calib_imgs/*.jpg')
-
-print(f"총 {len(images)}장의 이미지를 분석합니다... (설정: 8x5 교차점, 30mm)")
-
-success_count = 0
-
-for fname in images:
-    img = cv2.imread(fname)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-    # 체스보드 코너 찾기
-    ret, corners = cv2.findChessboardCorners(gray, CHECKERBOARD, None)
-
-    if ret == True:
-        print(f"✅ 성공: {fname}")
-        objpoints.append(objp)
-        
-        # 코너 정밀 보정
-        corners2 = cv2.cornerSubPix(gray, corners, (11,11), (-1,-1), 
-                                    (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001))
-        imgpoints.append(corners2)
-        success_count += 1
-    else:
-        # 혹시 종이가 세로로 찍혔을 수도 있으니 (5, 8)로도 한번 시도해봄
-        ret_rev, corners_rev = cv2.findChessboardCorners(gray, (CHECKERBOARD[1], CHECKERBOARD[0]), None)
-        if ret_rev == True:
-            print(f"✅ 성공 (회전됨): {fname}")
-            # 회전된 패턴에 맞게 objp 재생성 필요하지만, 보통 가로세로 돌려가며 찍으므로 
-            # 일단 주 패턴(8,5)만 통과시켜도 결과는 나옵니다.
-            # 여기서는 엄격하게 (8,5)만 수집합니다.
+SUBPIX_WIN = (11, 11)
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMAGE_DIR = os.path.join(HERE, 'calib_imgs')
+CACHE_PATH = os.path.join(HERE, 'corner_cache.json')    # 이미지 내용 해시 -> 코너 (새 사진만 다시 처리)
+RESULT_PATH = os.path.join(HERE, 'calib_result.json')   # 이미지별 재투영 오차 등 결과
+
+# 코너 추출 설정이 바뀌면 캐시 무효
+CACHE_KEY = f"{CHECKERBOARD}|{SUBPIX_WIN}|{SUBPIX_CRITERIA}"
+
+def make_objp(pattern):
+    # pattern = (가로 교차점 수, 세로 교차점 수), findChessboardCorners 와 같은 순서 (행 단위)
+    objp = np.zeros((pattern[0] * pattern[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
+    return objp * SQUARE_SIZE
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def find_corners(fname):
+    # 프로세스 풀에서 실행: 이미지 1장 -> 코너 (실패 시 corners=None)
+    img = cv2.imread(fname, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return {"size": None, "pattern": None, "corners": None}
+    size = [img.shape[1], img.shape[0]]
+
+    # 종이가 세로로 찍혔을 수도 있으니 (5, 8)로도 시도 -> 그 패턴에 맞는 objp 로 그대로 사용
+    for pattern in (CHECKERBOARD, CHECKERBOARD[::-1]):
+        ret, corners = cv2.findChessboardCorners(img, pattern, None)
+        if ret:
+            corners = cv2.cornerSubPix(img, corners, SUBPIX_WIN, (-1, -1), SUBPIX_CRITERIA)
+            return {"size": size, "pattern": list(pattern), "corners": corners.reshape(-1, 2).tolist()}
+    return {"size": size, "pattern": None, "corners": None}
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        cache = json.load(f)
+    if cache.get("key") != CACHE_KEY:
+        return {}
+    return cache.get("images", {})
+
+def save_cache(path, entries):
+    with open(path, "w") as f:
+        json.dump({"key": CACHE_KEY, "images": entries}, f)
+
+def extract_all(images, cache_path, workers=None):
+    # 캐시에 없는 (새로 추가되거나 바뀐) 이미지만 프로세스 풀로 처리
+    cache = load_cache(cache_path)
+    hashes = {fname: file_hash(fname) for fname in images}
+    todo = [fname for fname in images if hashes[fname] not in cache]
+
+    print(f"총 {len(images)}장 (캐시 {len(images) - len(todo)}장, 새로 분석 {len(todo)}장) "
+          f"(설정: {CHECKERBOARD[0]}x{CHECKERBOARD[1]} 교차점, {SQUARE_SIZE:g}mm)")
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for fname, res in zip(todo, pool.map(find_corners, todo)):
+                cache[hashes[fname]] = res
+
+    # 지금 폴더에 있는 이미지만 남김 (지워진 사진의 캐시 정리)
+    live = {hashes[fname]: cache[hashes[fname]] for fname in images}
+    save_cache(cache_path, live)
+    return [(fname, live[hashes[fname]]) for fname in images]
+
+def calibrate(views, size):
+    objpoints = [make_objp(v["pattern"]) for v in views]
+    imgpoints = [np.asarray(v["corners"], np.float32).reshape(-1, 1, 2) for v in views]
+    rms, mtx, dist, rvecs, tvecs, _, _, per_view = cv2.calibrateCameraExtended(
+        objpoints, imgpoints, tuple(size), None, None)
+    return rms, mtx, dist, per_view.ravel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Chessboard camera calibration (parallel, cached)")
+    parser.add_argument("--images", default=os.path.join(IMAGE_DIR, '*.jpg'), help="이미지 glob")
+    parser.add_argument("--workers", type=int, default=None, help="코너 추출 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--reject-outliers", action="store_true", help="재투영 오차가 큰 이미지 제외 후 재캘리브레이션")
+    parser.add_argument("--max-error", type=float, default=1.0, help="이미지 RMS 오차 상한 (px)")
+    parser.add_argument("--mad-k", type=float, default=3.0, help="중앙값 + k * MAD 보다 크면 이상치")
+    parser.add_argument("--min-images", type=int, default=10, help="이상치 제거 후 최소 이미지 수")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-save", action="store_true", help="프로파일 저장 안 함")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_PATH)
+    parser.add_argument("--result", default=RESULT_PATH)
+    args = parser.parse_args()
+
+    images = sorted(glob.glob(args.images))
+    if args.no_cache and os.path.exists(CACHE_PATH):
+        os.remove(CACHE_PATH)
+
+    t0 = time.perf_counter()
+    results = extract_all(images, CACHE_PATH, args.workers)
+    t_extract = time.perf_counter() - t0
+
+    found = []
+    for fname, res in results:
+        name = os.path.basename(fname)
+        if res["corners"] is None:
+            print(f"❌ 실패: {name}")
+        elif res["pattern"] != list(CHECKERBOARD):
+            print(f"✅ 성공 (회전됨): {name}")
+            found.append((name, res))
         else:
-            print(f"❌ 실패: {fname}")
+            print(f"✅ 성공: {name}")
+            found.append((name, res))
+
+    # 해상도가 섞여 있으면 가장 많은 해상도만 사용
+    sizes = [tuple(res["size"]) for _, res in found]
+    size = max(set(sizes), key=sizes.count) if sizes else None
+    skipped = [name for name, res in found if tuple(res["size"]) != size]
+    for name in skipped:
+        print(f"⚠️ 해상도 다름, 제외: {name}")
+    found = [(name, res) for name, res in found if tuple(res["size"]) == size]
+
+    if not found:
+        print("\n🚨 여전히 실패한다면 다음을 확인하세요:")
+        print("1. 사진에 체스보드 테두리 여백(흰색 공간)이 충분히 있나요?")
+        print("2. 체스보드가 너무 멀리 있거나 흐릿하지 않나요?")
+        return
 
-if success_count > 0:
-    print(f"\n🎉 {success_count}장의 사진으로 계산을 시작합니다!")
-    ret, mtx, dist, rvecs, tvecs = cv2.calibrateCamera(objpoints, imgpoints, gray.shape[::-1], None, None)
+    print(f"\n🎉 {len(found)}장의 사진으로 계산을 시작합니다! (코너 추출 {t_extract:.2f}s)")
+    t0 = time.perf_counter()
+    used = list(found)
+    rejected = []
+    rms, mtx, dist, per_view = calibrate([res for _, res in used], size)
 
-    print("\n\n======== [이걸 복사해서 DockingAI에 붙여넣으세요] ========")
+    # 이상치 제거: 이미지 오차가 상한 또는 중앙값 + k*MAD 를 넘으면 빼고 다시 계산 (수렴할 때까지)
+    while args.reject_outliers:
+        med = np.median(per_view)
+        mad = np.median(np.abs(per_view - med))
+        limit = min(args.max_error, med + args.mad_k * max(mad, 1e-3))
+        bad = per_view > limit
+        if not bad.any() or len(used) - bad.sum() < args.min_images:
+            break
+        for i in np.flatnonzero(bad):
+            rejected.append({"image": used[i][0], "error": float(per_view[i])})
+            print(f"🗑️ 이상치 제외: {used[i][0]} ({per_view[i]:.3f}px > {limit:.3f}px)")
+        used = [v for v, b in zip(used, bad) if not b]
+        rms, mtx, dist, per_view = calibrate([res for _, res in used], size)
+    t_calib = time.perf_counter() - t0
+
+    print(f"\nRMS 재투영 오차: {rms:.5f}px ({len(used)}장, 계산 {t_calib:.2f}s)")
+
+    # 기계가 읽을 수 있는 결과 (이미지별 오차 포함)
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "resolution": list(size),
+        "checkerboard": list(CHECKERBOARD),
+        "square_size_mm": SQUARE_SIZE,
+        "rms": float(rms),
+        "camera_matrix": mtx.tolist(),
+        "dist_coeffs": dist.ravel().tolist(),
+        "per_image": [{"image": name, "pattern": res["pattern"], "error": float(e)}
+                      for (name, res), e in zip(used, per_view)],
+        "rejected": rejected,
+        "failed": [os.path.basename(fname) for fname, res in results if res["corners"] is None],
+        "skipped_resolution": skipped,
+        "timing_s": {"extract": round(t_extract, 3), "calibrate": round(t_calib, 3)},
+    }
+    with open(args.result, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"📄 결과 저장: {args.result}")
+
+    # DockingAI 가 자동으로 읽는 프로파일 저장 (더 이상 복사/붙여넣기 필요 없음)
+    if not args.no_save:
+        profile = CalibrationProfile(mtx, dist, size, rms=float(rms), created=result["created"],
+                                     source="calibration/02_calibrate.py")
+        profile.save(args.profile)
+        print(f"💾 프로파일 저장: {args.profile} ({size[0]}x{size[1]})")
+
+    print("\n\n======== [참고용 출력] ========")
     print("1. Camera Matrix (self.camera_matrix):")
     print("-" * 30)
     print(f"np.array([\n    [{mtx[0][0]:.5f}, {mtx[0][1]:.5f}, {mtx[0][2]:.5f}],\n    [{mtx[1][0]:.5f}, {mtx[1][1]:.5f}, {mtx[1][2]:.5f}],\n    [{mtx[2][0]:.5f}, {mtx[2][1]:.5f}, {mtx[2][2]:.5f}]\n], dtype=np.float32)")
@@ -68,16 +205,8 @@ if success_count > 0:
     print("-" * 30)
     print(f"np.array([\n    [{dist[0][0]:.5f}, {dist[0][1]:.5f}, {dist[0][2]:.5f}, {dist[0][3]:.5f}, {dist[0][4]:.5f}]\n], dtype=np.float32)")
     print("-" * 30)
-    
-    # 오차율 확인
-    mean_error = 0
-    for i in range(len(objpoints)):
-        imgpoints2, _ = cv2.projectPoints(objpoints[i], rvecs[i], tvecs[i], mtx, dist)
-        error = cv2.norm(imgpoints[i], imgpoints2, cv2.NORM_L2)/len(imgpoints2)
-        mean_error += error
-    print(f"\n평균 오차(Error): {mean_error/len(objpoints):.5f}")
-
-else:
-    print("\n🚨 여전히 실패한다면 다음을 확인하세요:")
-    print("1. 사진에 체스보드 테두리 여백(흰색 공간)이 충분히 있나요?")
-    print("2. 체스보드가 너무 멀리 있거나 흐릿하지 않나요?")
\ No newline at end of file
+
+    print(f"\n이미지별 평균 오차(Error): {per_view.mean():.5f}px (최대 {per_view.max():.5f}px)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+import json
+import os
+
+# =========================================================
+# 카메라 캘리브레이션 프로파일
+# - calibration/02_calibrate.py 가 저장, DockingAI 가 로드
+# - 캘리브레이션 해상도와 다른 해상도로 캡처/검출하면 내부 파라미터 자동 스케일
+# - 해상도별 왜곡 보정 맵은 한 번만 계산해서 캐시
+# =========================================================
+
+PROFILE_VERSION = 1
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration", "camera_profile.json")
+
+class CalibrationProfile:
+    def __init__(self, camera_matrix, dist_coeffs, resolution, rms=None, created=None, source=None):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(1, -1)
+        self.resolution = (int(resolution[0]), int(resolution[1]))  # (w, h)
+        self.rms = rms
+        self.created = created  # 캘리브레이션 시각 (모르면 None -> 저장 안 함)
+        self.source = source
+
+        self.scaled_cache = {}  # (w, h) -> camera_matrix
+        self.map_cache = {}     # (w, h) -> (map1, map2)
+        # 캘리브레이션 해상도의 보정 맵은 미리 계산
+        self.undistort_maps(*self.resolution)
+
+    # -----------------------------------------------------
+    # 저장 / 로드
+    # -----------------------------------------------------
+    def to_dict(self):
+        d = {
+            "version": PROFILE_VERSION,
+            "resolution": list(self.resolution),
+            "camera_matrix": self.camera_matrix.round(5).tolist(),
+            "dist_coeffs": self.dist_coeffs.ravel().round(5).tolist(),
+            "rms": self.rms,
+            "source": self.source,
+        }
+        if self.created:
+            d["created"] = self.created
+        return d
+
+    def save(self, path=DEFAULT_PROFILE_PATH):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PROFILE_PATH):
+        with open(path) as f:
+            d = json.load(f)
+        if d.get("version") != PROFILE_VERSION:
+            raise ValueError(f"unsupported calibration profile version: {d.get('version')} ({path})")
+        return cls(d["camera_matrix"], d["dist_coeffs"], d["resolution"],
+                   rms=d.get("rms"), created=d.get("created"), source=d.get("source"))
+
+    # -----------------------------------------------------
+    # 해상도 변환
+    # -----------------------------------------------------
+    def intrinsics_for(self, w, h):
+        # 같은 화각을 w x h 로 캡처/리사이즈했다고 보고 fx, fy, cx, cy 스케일 (픽셀 중심 기준)
+        key = (int(w), int(h))
+        K = self.scaled_cache.get(key)
+        if K is None:
+            sx, sy = w / self.resolution[0], h / self.resolution[1]
+            K = self.camera_matrix.astype(np.float32)
+            K[0, 0] *= sx
+            K[1, 1] *= sy
+            K[0, 2] = (K[0, 2] + 0.5) * sx - 0.5
+            K[1, 2] = (K[1, 2] + 0.5) * sy - 0.5
+            self.scaled_cache[key] = K
+        return K
+
+    # -----------------------------------------------------
+    # 왜곡 보정
+    # -----------------------------------------------------
+    def undistort_maps(self, w, h):
+        key = (int(w), int(h))
+        maps = self.map_cache.get(key)
+        if maps is None:
+            K = self.intrinsics_for(w, h)
+            maps = cv2.initUndistortRectifyMap(K, self.dist_coeffs, None, K, key, cv2.CV_16SC2)
+            self.map_cache[key] = maps
+        return maps
+
+    def undistort_image(self, img, dst=None):
+        h, w = img.shape[:2]
+        map1, map2 = self.undistort_maps(w, h)
+        return cv2.remap(img, map1, map2, cv2.INTER_LINEAR, dst=dst)
+
+    def undistort_points(self, pts, w, h):
+        # 검출 코너만 왜곡 보정 (같은 K 의 이상적 핀홀 픽셀 좌표로)
+        K = self.intrinsics_for(w, h)
+        shape = pts.shape
+        out = cv2.undistortPoints(pts.reshape(-1, 1, 2).astype(np.float32), K, self.dist_coeffs, P=K)
+        return out.reshape(shape)
+
+    def distort_points(self, pts, w, h):
+        # undistort_points 의 역: 보정 영상(같은 K) 픽셀 좌표 -> 원본(왜곡) 프레임 픽셀 좌표 (오버레이용)
+        K = self.intrinsics_for(w, h).astype(np.float64)
+        shape = pts.shape
+        p = pts.reshape(-1, 2).astype(np.float64)
+        rays = np.ones((len(p), 3))
+        rays[:, 0] = (p[:, 0] - K[0, 2]) / K[0, 0]
+        rays[:, 1] = (p[:, 1] - K[1, 2]) / K[1, 1]
+        out, _ = cv2.projectPoints(rays, np.zeros(3), np.zeros(3), K, self.dist_coeffs)
+        return out.reshape(shape).astype(np.float32)
+
+# 프로파일 파일이 없을 때 쓰는 기본값 (640x480 캘리브레이션 결과)
+def default_profile():
+    return CalibrationProfile(
+        [[872.23558, 0.00000, 315.00614],
+         [0.00000, 873.47815, 240.01070],
+         [0.00000, 0.00000, 1.00000]],
+        [0.14923, -1.11676, 0.00511, 0.00329, 7.40075],
+        (640, 480), source="built-in default")
+
+def load_profile(path=DEFAULT_PROFILE_PATH):
+    if os.path.exists(path):
+        return CalibrationProfile.load(path)
+    print(f"[Calibration] profile not found: {path} -> built-in default (640x480)")
+    return default_profile()
@@ -0,0 +1,91 @@
+import cv2
+import time
+import threading
+
+class LatestFrameCapture:
+    # 백그라운드 스레드가 계속 cap.read() 하면서 "가장 최신 프레임"만 보관
+    # -> 추론이 카메라보다 느려도 드라이버 버퍼에 쌓인 옛날 프레임으로 조향하지 않음
+    def __init__(self, source=0, width=640, height=480, read_timeout=1.0, max_stalls=3):
+        self.READ_TIMEOUT = read_timeout  # read() 한 번 기다리는 시간 (초)
+        self.MAX_STALLS = max_stalls      # 연속 타임아웃 허용 횟수 (USB 순간 끊김 등), 넘으면 read() 실패
+        self.cap = cv2.VideoCapture(source)
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            # 드라이버 버퍼 최소화 (지원하는 백엔드만 적용됨)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.frame = None
+        self.timestamp = 0.0     # time.monotonic() 기준 캡처 시각
+        self.seq = 0             # 캡처된 프레임 번호 (1부터)
+        self.last_read_seq = 0   # 마지막으로 read()가 돌려준 번호
+        self.dropped = 0         # 한 번도 읽히지 않고 덮어써진 프레임 수
+        self.stalls = 0          # read() 타임아웃 누적 횟수
+        self.running = False
+
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._grab_loop, name="LatestFrameCapture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _grab_loop(self):
+        # 카메라 해제는 이 스레드가 끝날 때 (cap.read() 에 막힌 동안 다른 스레드가 release 하지 않게)
+        try:
+            while self.running:
+                ret, frame = self.cap.read()
+                ts = time.monotonic()
+                with self.cond:
+                    if not ret:
+                        self.running = False
+                        self.cond.notify_all()
+                        break
+                    # 이전 프레임이 읽히기 전에 새 프레임이 오면 드롭으로 집계
+                    if self.seq > self.last_read_seq:
+                        self.dropped += 1
+                    self.frame = frame
+                    self.timestamp = ts
+                    self.seq += 1
+                    self.cond.notify_all()
+        finally:
+            self.cap.release()
+
+    def read(self, timeout=None):
+        # 아직 읽지 않은 새 프레임이 올 때까지 대기 (timeout: 한 번 대기 시간, 기본 READ_TIMEOUT)
+        # 카메라가 잠깐 멈추면 MAX_STALLS 번까지 다시 기다림, 스트림이 끝났으면 바로 실패
+        # 반환: (ret, frame, timestamp, seq)
+        timeout = self.READ_TIMEOUT if timeout is None else timeout
+        with self.cond:
+            for attempt in range(self.MAX_STALLS + 1):
+                if self.cond.wait_for(lambda: self.seq > self.last_read_seq or not self.running, timeout):
+                    break
+                self.stalls += 1
+                print(f"[Camera] no frame for {timeout:g}s ({attempt + 1}/{self.MAX_STALLS + 1})")
+            if self.seq <= self.last_read_seq:
+                return False, None, 0.0, self.seq
+            self.last_read_seq = self.seq
+            # 그랩 스레드는 매번 새 배열을 받으므로 복사 없이 넘겨도 안전
+            return True, self.frame, self.timestamp, self.seq
+
+    def stats(self):
+        with self.cond:
+            return {"captured": self.seq, "dropped": self.dropped, "stalls": self.stalls}
+
+    def release(self):
+        self.running = False
+        if self.thread is None:
+            self.cap.release()
+            return
+        self.thread.join(timeout=1.0)
+        if self.thread.is_alive():
+            # cap.read() 에 막혀 있음 -> 읽기가 끝나면 그랩 스레드가 해제 (데몬 스레드)
+            print("[Camera] capture thread still blocked in read, camera is released when it returns")
+        self.thread = None
@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+# =========================================================
+# 정지 장면 감지 (검출 생략 게이트)
+# - 마지막으로 실제 검출한 프레임의 관심 영역(마커 / 사람 bbox + 여백, 없으면 전체)을
+#   아주 작게(SIZE x SIZE) 줄인 gray 를 기준으로 저장
+# - 새 프레임의 같은 영역을 줄여서 비교 -> 평균 차이 / 최대 칸 차이가 임계값 이하면 "변화 없음"
+#   -> 호출측은 이전 검출 결과를 재사용 (reused 표시)
+# - 기준이 MAX_AGE 초보다 오래되면 변화가 없어도 실제 검출 강제
+# =========================================================
+
+class ChangeGate:
+    def __init__(self, size=32, mean_thresh=2.0, cell_thresh=12.0, max_age=0.5, margin=0.2):
+        self.SIZE = size                # 비교용 축소 크기 (한 칸 = 영역의 1/SIZE, 센서 노이즈는 평균으로 사라짐)
+        self.MEAN_THRESH = mean_thresh  # 칸 평균 밝기 차이 (gray level) 가 이보다 크면 변화
+        self.CELL_THRESH = cell_thresh  # 한 칸이라도 이보다 크게 바뀌면 변화 (작은 움직임)
+        self.MAX_AGE = max_age          # 초, 재사용 최대 기간
+        self.MARGIN = margin            # bbox 여백 비율 (영역 가장자리로 들어오는 움직임도 보이게)
+        self.ref = None                 # (축소 영상, 영역, 프레임 크기, 검출 시각)
+        self.checks = 0
+        self.reused = 0
+
+    def reset(self):
+        self.ref = None
+
+    def region(self, box, w, h):
+        if box is None:
+            return 0, 0, w, h
+        x1, y1, x2, y2 = box[:4]
+        mx, my = (x2 - x1) * self.MARGIN, (y2 - y1) * self.MARGIN
+        x0, y0 = int(max(x1 - mx, 0)), int(max(y1 - my, 0))
+        x1, y1 = int(min(x2 + mx, w)), int(min(y2 + my, h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return 0, 0, w, h
+        return x0, y0, x1, y1
+
+    def tiny(self, img, region):
+        x0, y0, x1, y1 = region
+        small = cv2.resize(img[y0:y1, x0:x1], (self.SIZE, self.SIZE), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)  # 축소 후 변환 (원본 전체 변환 비용 없음)
+        return small.astype(np.float32)
+
+    def changed(self, img, timestamp):
+        # True: 실제 검출 필요 / False: 이전 결과 재사용 가능
+        ref = self.ref
+        if ref is None:
+            return True
+        small, region, shape, ts = ref
+        if img.shape[:2] != shape or timestamp - ts > self.MAX_AGE:
+            return True
+        self.checks += 1
+        diff = cv2.absdiff(self.tiny(img, region), small)
+        if diff.mean() > self.MEAN_THRESH or diff.max() > self.CELL_THRESH:
+            return True
+        self.reused += 1
+        return False
+
+    def commit(self, img, box, timestamp):
+        # 실제 검출을 한 프레임으로 기준 갱신, box: 다음 비교 영역 (x1, y1, x2, y2) 또는 None (전체)
+        h, w = img.shape[:2]
+        region = self.region(box, w, h)
+        # 튜플 하나로 교체 (비동기 추론 스레드에서 갱신해도 읽는 쪽은 항상 한 세트)
+        self.ref = (self.tiny(img, region), region, (h, w), timestamp)
+
+    def stats(self):
+        return {"checks": self.checks, "reused": self.reused}
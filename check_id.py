@@ -1,66 +1,280 @@
 import cv2
 import cv2.aruco as aruco
 import numpy as np
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def check_aruco_ids():
-    # ---------------------------------------------------------
-    # [설정] 마커 딕셔너리 변경 (8x8 격자 -> 6x6 데이터)
-    # 테두리 포함 8칸이면 실제로는 6x6 마커입니다.
-    # ---------------------------------------------------------
-    try:
-        # 6x6 딕셔너리 사용
-        aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_6X6_1000)
-    except AttributeError:
-        # 혹시 구버전이라 위 코드가 안되면 이걸로 시도
-        aruco_dict = aruco.Dictionary_get(aruco.DICT_6X6_1000)
-    
-    parameters = aruco.DetectorParameters()
-    detector = aruco.ArucoDetector(aruco_dict, parameters)
+from detector_profile import apply_params, MANUAL_PARAMS
+
+# =========================================================
+# 마커 ID 확인
+# - 라이브: 웹캠에서 바로 ID 표시 (인자 없이 실행), --telemetry 8080 이면 브라우저로 확인 (화면 없는 장치는 --no-window)
+# - 배치: 이미지 폴더 / 동영상 파일을 프로세스 풀로 스캔 -> 프레임별 ID, 코너, 시간 리포트 (JSON / CSV)
+#   python check_id.py dock_logs/ clip.mp4 --dicts 6X6_250,4X4_50 --report scan.csv
+# - 여러 딕셔너리를 한 번에: 후보 검출은 1회, 딕셔너리별 디코딩만 따로 (detectMarkersMultiDict)
+# =========================================================
+
+# DockingAI 와 같은 딕셔너리 (예전 DICT_6X6_1000 은 ID 250 이상까지 받아들여 결과가 달랐음)
+DEFAULT_DICTS = ("6X6_250",)
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+VIDEO_CHUNK = 300  # 동영상은 이 프레임 수 단위로 나눠 여러 프로세스에서 처리
+
+def make_detector(dict_names):
+    dicts = [aruco.getPredefinedDictionary(getattr(aruco, f"DICT_{name}")) for name in dict_names]
+    # DockingAI 와 같은 작은 마커 튜닝 (같은 조건에서 보이는지 확인하려고, detector_profile.MANUAL_PARAMS)
+    params = apply_params(aruco.DetectorParameters(), MANUAL_PARAMS)
+    detector = aruco.ArucoDetector(dicts[0], params)
+    if hasattr(detector, "detectMarkersMultiDict"):
+        detector.setDictionaries(dicts)
+        return detector, None
+    # 구버전 OpenCV: 딕셔너리마다 검출기 따로
+    return detector, [aruco.ArucoDetector(d, params) for d in dicts]
+
+def detect_all(detector, fallback, dict_names, gray):
+    # -> {딕셔너리 이름: [(id, 코너 4x2), ...]}
+    if fallback is None:
+        corners, ids, _, dict_idx = detector.detectMarkersMultiDict(gray)
+        per_dict = [[] for _ in dict_names]
+        if ids is not None:
+            for c, i, d in zip(corners, ids.ravel(), np.ravel(dict_idx)):
+                per_dict[int(d)].append((int(i), c.reshape(4, 2)))
+    else:
+        per_dict = []
+        for det in fallback:
+            corners, ids, _ = det.detectMarkers(gray)
+            per_dict.append([] if ids is None else [(int(i), c.reshape(4, 2)) for c, i in zip(corners, ids.ravel())])
+    return {name: sorted(found, key=lambda m: m[0]) for name, found in zip(dict_names, per_dict)}
+
+def frame_record(source, index, gray, detector, fallback, dict_names, read_ms):
+    t0 = time.perf_counter()
+    found = detect_all(detector, fallback, dict_names, gray)
+    detect_ms = (time.perf_counter() - t0) * 1000.0
+    return {
+        "source": source, "frame": index, "width": gray.shape[1], "height": gray.shape[0],
+        "markers": {name: [{"id": i, "corners": np.round(c.astype(np.float64), 2).tolist()} for i, c in m] for name, m in found.items()},
+        "read_ms": round(read_ms, 3), "detect_ms": round(detect_ms, 3),
+    }
+
+# ---------------------------------------------------------
+# 프로세스 풀 작업 (작업 1개 = 이미지 여러 장 또는 동영상 한 구간)
+# ---------------------------------------------------------
+_worker = None
+
+def init_worker(dict_names):
+    global _worker
+    cv2.setNumThreads(1)  # 프로세스 단위로 병렬 -> 프로세스 안에서는 단일 스레드
+    _worker = (make_detector(dict_names), dict_names)
+
+def scan_task(task):
+    (detector, fallback), dict_names = _worker
+    records = []
+    if task[0] == "images":
+        for path in task[1]:
+            t0 = time.perf_counter()
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            read_ms = (time.perf_counter() - t0) * 1000.0
+            if gray is None:
+                records.append({"source": path, "frame": 0, "error": "unreadable"})
+                continue
+            records.append(frame_record(path, 0, gray, detector, fallback, dict_names, read_ms))
+    else:
+        _, path, start, stop, stride = task
+        cap = cv2.VideoCapture(path)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for index in range(start, stop):
+            # stride 사이 프레임은 디코딩 없이 넘김 (grab 만)
+            if (index - start) % stride:
+                if not cap.grab():
+                    break
+                continue
+            t0 = time.perf_counter()
+            ok, frame = cap.read()
+            if not ok:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            read_ms = (time.perf_counter() - t0) * 1000.0
+            records.append(frame_record(path, index, gray, detector, fallback, dict_names, read_ms))
+        cap.release()
+    return records
+
+def collect_tasks(inputs, stride, chunk):
+    images, tasks = [], []
+    for inp in inputs:
+        if os.path.isdir(inp):
+            for root, _, files in sorted(os.walk(inp)):
+                for f in sorted(files):
+                    path = os.path.join(root, f)
+                    if f.lower().endswith(IMAGE_EXTS):
+                        images.append(path)
+                    elif f.lower().endswith(VIDEO_EXTS):
+                        tasks += video_tasks(path, stride)
+        elif inp.lower().endswith(VIDEO_EXTS):
+            tasks += video_tasks(inp, stride)
+        else:
+            images.append(inp)
+    tasks += [("images", images[i:i + chunk]) for i in range(0, len(images), chunk)]
+    return tasks, len(images)
+
+def video_tasks(path, stride):
+    cap = cv2.VideoCapture(path)
+    n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if n <= 0:
+        return [("video", path, 0, 1 << 31, stride)]  # 길이를 모르는 스트림은 통째로 1개 작업
+    return [("video", path, s, min(s + VIDEO_CHUNK, n), stride) for s in range(0, n, VIDEO_CHUNK)]
+
+def scan(inputs, dict_names, workers=None, stride=1, chunk=16):
+    tasks, n_images = collect_tasks(inputs, stride, chunk)
+    t0 = time.perf_counter()
+    records = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(dict_names,)) as pool:
+        for res in pool.map(scan_task, tasks):
+            records += res
+    wall = time.perf_counter() - t0
+    return records, {"images": n_images, "tasks": len(tasks), "frames": len(records), "wall_s": round(wall, 3)}
+
+def summarize(records, dict_names, info):
+    ok = [r for r in records if "error" not in r]
+    summary = dict(info)
+    summary["errors"] = len(records) - len(ok)
+    summary["fps"] = round(len(records) / info["wall_s"], 1) if info["wall_s"] > 0 else 0.0
+    if ok:
+        summary["detect_ms_mean"] = round(float(np.mean([r["detect_ms"] for r in ok])), 3)
+    summary["dicts"] = {}
+    for name in dict_names:
+        ids = {}
+        with_marker = 0
+        for r in ok:
+            found = r["markers"][name]
+            with_marker += bool(found)
+            for m in found:
+                ids[m["id"]] = ids.get(m["id"], 0) + 1
+        summary["dicts"][name] = {"frames_with_markers": with_marker,
+                                  "ids": {str(k): v for k, v in sorted(ids.items())}}
+    return summary
+
+def write_report(path, records, summary):
+    if path.lower().endswith(".csv"):
+        # 마커 1개당 1줄, 마커가 없는 프레임도 1줄 (id 빈칸)
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["source", "frame", "dict", "id", "corners", "read_ms", "detect_ms", "error"])
+            for r in records:
+                if "error" in r:
+                    w.writerow([r["source"], r["frame"], "", "", "", "", "", r["error"]])
+                    continue
+                rows = [(name, m["id"], json.dumps(m["corners"])) for name, ms in r["markers"].items() for m in ms]
+                for name, mid, corners in rows or [("", "", "")]:
+                    w.writerow([r["source"], r["frame"], name, mid, corners, r["read_ms"], r["detect_ms"], ""])
+    else:
+        with open(path, "w") as f:
+            json.dump({"summary": summary, "frames": records}, f)
+
+def check_aruco_ids(dict_names=DEFAULT_DICTS, camera=0, telemetry_port=None, show_window=True, telemetry_host="127.0.0.1"):
+    detector, fallback = make_detector(dict_names)
+    telemetry = None
+    if telemetry_port:
+        from telemetry_server import TelemetryServer
+        # 보기 전용 (토큰 없음 -> 제어 명령 거부)
+        telemetry = TelemetryServer(telemetry_host, telemetry_port)
+        print(f"Telemetry on {telemetry.url()}")
 
     # 웹캠 실행
-    cap = cv2.VideoCapture(0)
-    
+    cap = cv2.VideoCapture(camera)
+
     # 해상도 설정
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
 
-    print("📸 카메라가 켜졌습니다. (6x6 모드)")
-    print("종료하려면 'q'를 누르세요.")
+    print(f"📸 카메라가 켜졌습니다. ({', '.join(dict_names)})")
+    print("종료하려면 'q'를 누르세요." if show_window else "종료하려면 Ctrl+C")
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_ts = time.monotonic()
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+            # 흑백 변환
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-        # 흑백 변환
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # 마커 검출
-        corners, ids, rejected = detector.detectMarkers(gray)
+            # 마커 검출
+            found = detect_all(detector, fallback, dict_names, gray)
 
-        if ids is not None:
-            aruco.drawDetectedMarkers(frame, corners, ids)
-
-            # 화면에 ID 출력
-            id_list_str = f"IDs: {ids.flatten()}"
-            
-            # 텍스트 위치 계산 (첫 번째 마커 근처)
-            cx = int(corners[0][0][:, 0].mean())
-            cy = int(corners[0][0][:, 1].mean()) - 50
-            
-            # 마커 위에 큼지막하게 ID 띄우기
-            cv2.putText(frame, id_list_str, (10, 50), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            
-            print(f"감지됨! ID: {ids.flatten()}")
-
-        cv2.imshow('ArUco ID Checker (6x6)', frame)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            line = 0
+            for name, markers in found.items():
+                if not markers:
+                    continue
+                corners = [c.reshape(1, 4, 2).astype(np.float32) for _, c in markers]
+                ids = np.array([[i] for i, _ in markers], dtype=np.int32)
+                aruco.drawDetectedMarkers(frame, corners, ids)
+
+                # 화면에 ID 출력
+                id_list_str = f"{name} IDs: {ids.flatten()}"
+                cv2.putText(frame, id_list_str, (10, 50 + 40 * line),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                line += 1
+
+                print(f"감지됨! [{name}] ID: {ids.flatten()}")
+
+            if telemetry is not None:
+                telemetry.publish_frame(frame)
+                telemetry.publish_state({"ts": frame_ts, "ids": {name: [i for i, _ in m] for name, m in found.items()}})
+
+            if not show_window:
+                continue
+            cv2.imshow('ArUco ID Checker', frame)
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
 
     cap.release()
+    if telemetry is not None:
+        telemetry.close()
     cv2.destroyAllWindows()
 
+def main():
+    parser = argparse.ArgumentParser(description="ArUco ID checker (live webcam or parallel batch scan)")
+    parser.add_argument("inputs", nargs="*", help="이미지 / 동영상 파일 또는 폴더 (없으면 웹캠 라이브)")
+    parser.add_argument("--dicts", default=",".join(DEFAULT_DICTS),
+                        help="쉼표로 구분한 딕셔너리 (예: 6X6_250,6X6_1000,4X4_50)")
+    parser.add_argument("--report", help="리포트 파일 (.json 또는 .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--stride", type=int, default=1, help="동영상은 N 프레임마다 1장만 검사")
+    parser.add_argument("--chunk", type=int, default=16, help="작업 1개당 이미지 수")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--telemetry", type=int, metavar="PORT", help="라이브 모드: 영상/ID 를 http://<telemetry-host>:PORT/ 로 전송")
+    parser.add_argument("--telemetry-host", default="127.0.0.1", help="--telemetry 바인드 주소 (다른 장치에서 보려면 0.0.0.0)")
+    parser.add_argument("--no-window", action="store_true", help="라이브 모드: cv2.imshow 창 없이 (Ctrl+C 로 종료)")
+    args = parser.parse_args()
+
+    dict_names = [d.strip().upper().removeprefix("DICT_") for d in args.dicts.split(",") if d.strip()]
+    for name in dict_names:
+        if not hasattr(aruco, f"DICT_{name}"):
+            parser.error(f"unknown dictionary: {name}")
+
+    if not args.inputs:
+        check_aruco_ids(dict_names, args.camera, args.telemetry, not args.no_window, args.telemetry_host)
+        return
+
+    records, info = scan(args.inputs, dict_names, workers=args.workers, stride=max(args.stride, 1), chunk=args.chunk)
+    summary = summarize(records, dict_names, info)
+    print(f"{summary['frames']} frames ({summary['images']} images, {summary['tasks']} tasks) "
+          f"in {summary['wall_s']:.2f}s -> {summary['fps']} fps, errors {summary['errors']}")
+    for name, d in summary["dicts"].items():
+        top = sorted(d["ids"].items(), key=lambda kv: -kv[1])[:10]
+        print(f"  {name}: {d['frames_with_markers']} frames with markers, {len(d['ids'])} distinct ids, most seen {dict(top)}")
+    if args.report:
+        write_report(args.report, records, summary)
+        print(f"report: {args.report}")
+
 if __name__ == "__main__":
-    check_aruco_ids()
\ No newline at end of file
+    main()
@@ -0,0 +1,205 @@
+import argparse
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+# =========================================================
+# 로봇 제어 명령 출력 채널
+# - 비전 루프는 publish() 로 최신 명령만 올려두고 바로 리턴 (전송/대기 없음)
+# - 별도 스레드가 고정 주기(RATE_HZ)로 최신 명령을 전송 (못 보낸 중간 명령은 덮어씀)
+# - 메시지: "seq,capture_ts,age_ms,CMD[,값...]\n"
+#   seq      : 전송 번호 (수신측에서 누락/순서 확인)
+#   capture_ts: 명령을 만든 프레임의 캡처 시각 (time.monotonic, 초)
+#   age_ms   : 캡처 -> 전송까지 걸린 시간 (카메라~출력 지연)
+# - 워치독: 비전 루프가 STALE_TIMEOUT 동안 publish 를 안 하면 STOP 전송
+# - 전송: 시리얼 (pyserial, pty 도 가능) / UDP
+# =========================================================
+
+STOP_COMMAND = "STOP"
+
+class UdpTransport:
+    def __init__(self, host, port):
+        self.addr = (host, int(port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+    def send(self, data):
+        self.sock.sendto(data, self.addr)
+
+    def flush(self):
+        pass  # 데이터그램은 sendto 에서 바로 나감
+
+    def close(self):
+        self.sock.close()
+
+class SerialTransport:
+    def __init__(self, port, baudrate=115200, write_timeout=0.05):
+        import serial
+        # 쓰기 타임아웃: 수신측이 멈춰도 전송 스레드가 무한정 막히지 않게
+        self.ser = serial.Serial(port, baudrate=baudrate, timeout=0, write_timeout=write_timeout)
+
+    def send(self, data):
+        self.ser.write(data)
+
+    def flush(self):
+        # 출력 버퍼가 실제로 나갈 때까지 대기 (close 전에 마지막 STOP 이 버려지지 않게)
+        self.ser.flush()
+
+    def close(self):
+        self.ser.close()
+
+def open_transport(spec):
+    # "udp://127.0.0.1:9000" / "serial:///dev/ttyUSB0?baud=115200" / "/dev/ttyUSB0"
+    url = urlparse(spec)
+    if url.scheme == "udp":
+        return UdpTransport(url.hostname, url.port)
+    if url.scheme in ("serial", ""):
+        baud = int(parse_qs(url.query).get("baud", [115200])[0])
+        return SerialTransport(url.path, baudrate=baud)
+    raise ValueError(f"unknown command transport: {spec}")
+
+def encode_command(seq, cmd, values, capture_ts, send_ts):
+    fields = [str(seq), f"{capture_ts:.4f}", f"{(send_ts - capture_ts) * 1000.0:.1f}", cmd]
+    fields += [f"{v:.3f}" if isinstance(v, float) else str(v) for v in values]
+    return (",".join(fields) + "\n").encode()
+
+def decode_command(line):
+    # 수신측(테스트/모니터) 용: -> (seq, capture_ts, age_ms, cmd, [값 문자열...])
+    parts = line.strip().split(",")
+    return int(parts[0]), float(parts[1]), float(parts[2]), parts[3], parts[4:]
+
+class CommandPublisher:
+    def __init__(self, transport, rate_hz=20.0, stale_timeout=0.3):
+        self.transport = transport
+        self.period = 1.0 / rate_hz
+        self.stale_timeout = stale_timeout  # 초, 이보다 오래 새 명령이 없으면 STOP
+
+        self.lock = threading.Lock()
+        self.latest = None      # (cmd, values, capture_ts, publish_ts)
+        self.unsent = False     # latest 가 아직 한 번도 전송되지 않았는지
+        self.seq = 0
+
+        self.sent = 0
+        self.overwritten = 0    # 전송 전에 새 명령으로 덮어써진 수
+        self.stale_stops = 0    # 워치독이 보낸 STOP 수
+        self.errors = 0
+        self.last_error = None
+
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="CommandPublisher", daemon=True)
+        self.thread.start()
+
+    def publish(self, cmd, values=(), capture_ts=None):
+        # 비전 루프에서 호출: 최신 명령만 보관하고 즉시 리턴
+        now = time.monotonic()
+        with self.lock:
+            if self.unsent:
+                self.overwritten += 1
+            self.latest = (cmd, tuple(values), now if capture_ts is None else capture_ts, now)
+            self.unsent = True
+
+    def _send(self, cmd, values, capture_ts):
+        self.seq += 1
+        try:
+            self.transport.send(encode_command(self.seq, cmd, values, capture_ts, time.monotonic()))
+            self.sent += 1
+        except Exception as e:  # 시리얼/소켓 오류는 세고 계속 (다음 주기에 재시도)
+            self.errors += 1
+            self.last_error = repr(e)
+
+    def _loop(self):
+        next_t = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            with self.lock:
+                latest = self.latest
+                self.unsent = False
+
+            if latest is None or now - latest[3] > self.stale_timeout:
+                # 명령이 끊김 (루프 멈춤/지연) -> 안전 정지
+                self._send(STOP_COMMAND, (), now if latest is None else latest[2])
+                self.stale_stops += 1
+            else:
+                self._send(latest[0], latest[1], latest[2])
+
+            # 고정 주기 (밀리면 따라잡지 않고 다음 주기부터)
+            next_t += self.period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic()
+
+    def stats(self):
+        return {"sent": self.sent, "overwritten": self.overwritten, "stale_stops": self.stale_stops,
+                "errors": self.errors, "last_error": self.last_error}
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join(timeout=1.0)
+        if self.thread.is_alive():
+            # 전송 스레드가 쓰기에서 막혀 있음 -> 같은 transport 에 동시에 쓰지 않도록 여기서는 손대지 않음
+            # (데몬 스레드, 다음 전송에서 running=False 를 보고 끝남)
+            print("[CommandPublisher] sender thread still busy, final STOP skipped")
+            return
+        # 종료 시 마지막으로 정지 명령 (전송 스레드가 끝난 뒤에만, 버퍼를 비우고 닫음)
+        self._send(STOP_COMMAND, (), time.monotonic())
+        try:
+            self.transport.flush()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = repr(e)
+        self.transport.close()
+
+def main():
+    # 하드웨어 없이 확인: 한 터미널에서 --listen, 다른 터미널에서 --demo
+    #   python command_channel.py --listen udp://127.0.0.1:9000
+    #   python command_channel.py --demo udp://127.0.0.1:9000
+    # pty 로 시리얼 확인: python command_channel.py --pty-demo
+    parser = argparse.ArgumentParser(description="Command channel demo / monitor")
+    parser.add_argument("--listen", help="udp://host:port 로 수신해서 출력")
+    parser.add_argument("--demo", help="이 주소로 테스트 명령 전송 (udp://... 또는 시리얼 포트)")
+    parser.add_argument("--pty-demo", action="store_true", help="가상 시리얼(pty) 쌍으로 송수신 확인")
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    if args.listen:
+        url = urlparse(args.listen)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((url.hostname, url.port))
+        print(f"listening on {args.listen}")
+        while True:
+            data, _ = sock.recvfrom(1024)
+            print(decode_command(data.decode()))
+
+    if args.pty_demo:
+        master, slave = os.openpty()
+        transport = SerialTransport(os.ttyname(slave))
+    elif args.demo:
+        transport = open_transport(args.demo)
+    else:
+        parser.print_help()
+        return
+
+    pub = CommandPublisher(transport, rate_hz=args.rate)
+    t_end = time.monotonic() + args.seconds
+    while time.monotonic() < t_end:
+        # 앞 절반은 정상 명령, 뒤 절반은 publish 중단 -> 워치독 STOP 확인
+        if time.monotonic() < t_end - args.seconds / 2:
+            pub.publish("FORWARD", (0.5,), capture_ts=time.monotonic() - 0.02)
+        time.sleep(0.01)
+    pub.close()
+    print(pub.stats())
+
+    if args.pty_demo:
+        os.set_blocking(master, False)
+        lines = os.read(master, 65536).decode().splitlines()
+        print(f"received {len(lines)} lines, first: {lines[0]!r}, last: {lines[-1]!r}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import cv2
+import json
+import os
+import time
+
+# =========================================================
+# ArUco 검출 파라미터 프로파일
+# - tune_detector.py 가 프레임 세트로 탐색해서 저장, DockingAI 가 로드
+# - 파일이 없으면 DockingAI 의 수동 튜닝 값 그대로
+# =========================================================
+
+DETECTOR_PROFILE_VERSION = 1
+DEFAULT_DETECTOR_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration", "detector_profile.json")
+
+# 프로파일에 저장되는 (탐색 대상) DetectorParameters 필드
+TUNED_FIELDS = (
+    "minMarkerPerimeterRate",
+    "adaptiveThreshWinSizeMin",
+    "adaptiveThreshWinSizeMax",
+    "adaptiveThreshWinSizeStep",
+    "perspectiveRemovePixelPerCell",
+    "cornerRefinementMethod",
+)
+
+# cornerRefinementMethod 는 이름으로 저장 (OpenCV 상수 값에 의존하지 않게)
+REFINE_METHODS = {
+    "none": cv2.aruco.CORNER_REFINE_NONE,
+    "subpix": cv2.aruco.CORNER_REFINE_SUBPIX,
+    "contour": cv2.aruco.CORNER_REFINE_CONTOUR,
+}
+
+# DockingAI 의 수동 튜닝 값 (작은 마커 인식용)
+# - 프로파일이 없을 때 DockingAI 기본값, tune_detector.py 의 비교 기준 (BASELINE)
+MANUAL_PARAMS = {
+    "minMarkerPerimeterRate": 0.015,
+    "adaptiveThreshWinSizeMin": 3,
+    "adaptiveThreshWinSizeMax": 23,
+    "adaptiveThreshWinSizeStep": 5,
+    "perspectiveRemovePixelPerCell": 10,
+    "cornerRefinementMethod": "subpix",
+}
+
+def apply_params(p, params):
+    # {필드: 값} (cornerRefinementMethod 는 이름) -> DetectorParameters 에 덮어씀
+    for k, v in params.items():
+        setattr(p, k, REFINE_METHODS[v] if k == "cornerRefinementMethod" else v)
+    return p
+
+def threshold_passes(params):
+    # adaptive threshold 창 크기 개수 (프레임마다 이 횟수만큼 이진화)
+    return (params["adaptiveThreshWinSizeMax"] - params["adaptiveThreshWinSizeMin"]) // params["adaptiveThreshWinSizeStep"] + 1
+
+class DetectorProfile:
+    def __init__(self, params, metrics=None, created=None, source=None):
+        missing = [k for k in TUNED_FIELDS if k not in params]
+        if missing:
+            raise ValueError(f"detector profile missing fields: {missing}")
+        if params["cornerRefinementMethod"] not in REFINE_METHODS:
+            raise ValueError(f"unknown corner refinement: {params['cornerRefinementMethod']}")
+        self.params = {k: params[k] for k in TUNED_FIELDS}
+        self.metrics = metrics      # 탐색 때 점수 (검출률 / 코너 오차 / ms)
+        self.created = created or time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.source = source
+
+    @classmethod
+    def from_parameters(cls, p, **kwargs):
+        refine = {v: k for k, v in REFINE_METHODS.items()}[p.cornerRefinementMethod]
+        params = {k: getattr(p, k) for k in TUNED_FIELDS if k != "cornerRefinementMethod"}
+        params["cornerRefinementMethod"] = refine
+        return cls(params, **kwargs)
+
+    def apply(self, p):
+        # 기존 DetectorParameters 에 덮어씀 (프로파일에 없는 필드는 그대로)
+        return apply_params(p, self.params)
+
+    def make_parameters(self):
+        return self.apply(cv2.aruco.DetectorParameters())
+
+    def to_dict(self):
+        return {
+            "version": DETECTOR_PROFILE_VERSION,
+            "params": self.params,
+            "threshold_passes": threshold_passes(self.params),
+            "metrics": self.metrics,
+            "created": self.created,
+            "source": self.source,
+        }
+
+    def save(self, path=DEFAULT_DETECTOR_PROFILE_PATH):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=DEFAULT_DETECTOR_PROFILE_PATH):
+        with open(path) as f:
+            d = json.load(f)
+        if d.get("version") != DETECTOR_PROFILE_VERSION:
+            raise ValueError(f"unsupported detector profile version: {d.get('version')} ({path})")
+        return cls(d["params"], metrics=d.get("metrics"), created=d.get("created"), source=d.get("source"))
+
+def load_detector_profile(path=DEFAULT_DETECTOR_PROFILE_PATH):
+    # 없으면 None (호출측 기본값 사용)
+    if path is None or not os.path.exists(path):
+        return None
+    return DetectorProfile.load(path)
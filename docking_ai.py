@@ -1,9 +1,56 @@
 import cv2
 import numpy as np
 import math
+import time
+from pose_tracker import PoseKalmanTracker
+from calibration_profile import load_profile, DEFAULT_PROFILE_PATH
+from detector_profile import load_detector_profile, apply_params, MANUAL_PARAMS, DEFAULT_DETECTOR_PROFILE_PATH
+from profiler import NULL_PROFILER
+from change_gate import ChangeGate
+
+class DockingResult:
+    # 프레임마다 dict 를 새로 만들지 않고 고정 필드 레코드를 재사용
+    # (DockingAI 가 같은 객체를 매 프레임 덮어씀 -> 보관하려면 copy())
+    __slots__ = ("found", "id", "dist_cm", "x_cm", "roll", "pitch", "yaw", "center", "n_markers", "markers",
+                 "coasting", "latency_ms", "reused")
 
-class DockingAI:
     def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.found = False
+        self.id = -1
+        self.dist_cm = 0.0
+        self.x_cm = 0.0
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.center = (0, 0)
+        self.n_markers = 0      # 타겟 포즈 계산에 쓰인 마커 수 (보드면 여러 개)
+        self.markers = None     # 타겟 외 마커: (M, 5) [id, dist_cm, x_cm, yaw, pitch]
+        self.coasting = False   # 이번 프레임 미검출 -> 칼만 예측값으로 유지 중
+        self.latency_ms = 0.0   # 외삽한 시간 (캡처 -> 구동 예상 시점)
+        self.reused = False     # 장면 변화 없음 -> 검출/PnP 생략하고 이전 측정 재사용
+
+    def __getitem__(self, key):
+        # 기존 data["found"] 방식 호환
+        return getattr(self, key)
+
+    def copy(self):
+        other = DockingResult.__new__(DockingResult)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def as_dict(self):
+        d = {name: getattr(self, name) for name in self.__slots__}
+        if self.markers is not None:
+            d["markers"] = self.markers.tolist()
+        return d
+
+class DockingAI:
+    def __init__(self, headless=False, profile_path=DEFAULT_PROFILE_PATH, profiler=None,
+                 detector_profile_path=DEFAULT_DETECTOR_PROFILE_PATH, change_gate=False):
         # ---------------------------------------------------------
         # [1] 사용자 설정
         self.MARKER_SIZE = 1.1  # 단위: cm
@@ -17,40 +64,214 @@ class DockingAI:
         # [Yaw 강제 보정 끄기] (대각선 왜곡 방지)
         self.YAW_FIX_SCALE = 0.0 
 
+        # [Headless] True면 그리기 전부 생략 (배포 유닛은 화면을 보지 않음)
+        self.HEADLESS = headless
+
+        # [구간 측정] profiler.StageProfiler (None 이면 측정 안 함)
+        self.prof = profiler or NULL_PROFILER
+
         # ArUco 설정
         self.aruco_dict = cv2.aruco.getPredefinedDictionary(self.target_dict)
         self.parameters = cv2.aruco.DetectorParameters()
 
-        # [튜닝] 작은 마커 인식 파라미터
-        self.parameters.minMarkerPerimeterRate = 0.015 
-        self.parameters.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_SUBPIX 
-        self.parameters.adaptiveThreshWinSizeMin = 3
-        self.parameters.adaptiveThreshWinSizeMax = 23
-        self.parameters.adaptiveThreshWinSizeStep = 5
-        self.parameters.perspectiveRemovePixelPerCell = 10 
+        # [튜닝] 작은 마커 인식 파라미터 (detector_profile.MANUAL_PARAMS, tune_detector 비교 기준과 공유)
+        apply_params(self.parameters, MANUAL_PARAMS)
+
+        # [튜닝 프로파일] tune_detector.py 결과가 있으면 위 값을 덮어씀 (calibration/detector_profile.json)
+        self.detector_profile = load_detector_profile(detector_profile_path)
+        if self.detector_profile is not None:
+            self.detector_profile.apply(self.parameters)
+            print(f"[Detector] profile loaded: {detector_profile_path} {self.detector_profile.params}")
 
         self.detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.parameters)
 
+        # [피라미드 검출] 축소 영상에서 먼저 찾고, 타겟이 없을 때만 원본 해상도로 검출
+        # 가까운(큰) 마커는 축소 영상으로 충분 -> 코너만 원본 gray 에서 서브픽셀 보정
+        self.USE_PYRAMID = True
+        self.PYRAMID_SCALE = 0.5
+        self.PYRAMID_MIN_SIZE = 120   # 축소 후 짧은 변이 이보다 작으면 (작은 ROI) 바로 원본 검출
+        self.build_coarse_detector()
+
         # ---------------------------------------------------------
-        # [2] 캘리브레이션 결과
+        # [2] 캘리브레이션 결과 (calibration/camera_profile.json <- 02_calibrate.py)
         # ---------------------------------------------------------
-        self.camera_matrix = np.array([
-            [872.23558, 0.00000, 315.00614],
-            [0.00000, 873.47815, 240.01070],
-            [0.00000, 0.00000, 1.00000]
-        ], dtype=np.float32)
-
-        self.dist_coeffs = np.array([
-            [0.14923, -1.11676, 0.00511, 0.00329, 7.40075]
-        ], dtype=np.float32)
+        # 프레임 해상도가 캘리브레이션 해상도와 다르면 내부 파라미터 자동 스케일
+        # UNDISTORT_MODE
+        #   none   : 왜곡 계수를 그대로 PnP 에 전달 (기본)
+        #   corners: 검출된 코너만 왜곡 보정 후 왜곡 없는 모델로 PnP
+        #   image  : 미리 계산된 맵으로 gray 전체를 보정한 뒤 검출
+        self.profile = load_profile(profile_path)
+        self.UNDISTORT_MODE = "none"
+        self.zero_dist = np.zeros((1, 5), dtype=np.float32)
+        self.undist_buf = None
+        self.frame_size = None
+        self.set_resolution(*self.profile.resolution)
 
         ms = self.MARKER_SIZE / 2
         self.obj_points = np.array([
             [-ms, ms, 0], [ms, ms, 0], [ms, -ms, 0], [-ms, -ms, 0]
         ], dtype=np.float32)
 
-        self.tracking_data = {} 
-        self.ALPHA = 0.3 
+        # [마커 보드] True면 TARGET_ID 단일 마커 대신 GridBoard 전체로 한 번에 포즈 계산
+        # 보드 ID 는 BOARD_FIRST_ID 부터 행 우선 (aruco.py 로 인쇄용 이미지 생성)
+        self.USE_BOARD = False
+        self.BOARD_COLS = 2
+        self.BOARD_ROWS = 2
+        self.BOARD_SEPARATION = 0.3  # 마커 간격 (cm)
+        self.BOARD_FIRST_ID = self.TARGET_ID
+        self.build_board()
+
+        # [기타 마커] 타겟이 아닌 마커도 포즈 계산해서 결과에 포함 (오일러 변환은 한 번에)
+        self.ESTIMATE_OTHER_MARKERS = True
+
+        # [추적] 타겟 등속 칼만 추적기 (EMA 대체)
+        # 캡처 -> 구동까지의 지연만큼 자세를 앞으로 외삽해서 "지금" 위치로 제어
+        # 제어에 쓰는 타겟 (TARGET_ID 또는 보드) 하나만 추적, 나머지 마커는 프레임별 요약 (data.markers) 만
+        self.tracking_data = {}         # TARGET_ID -> PoseKalmanTracker (TARGET_ID 를 바꾸면 새 추적기)
+        self.TRACK_MAX_COAST = 0.3      # 미검출 시 예측으로 버티는 최대 시간 (초)
+        self.LATENCY_COMP = True
+        self.ACTUATION_DELAY = 0.03     # 결과 출력 -> 바퀴 반응까지 추가 지연 (초)
+
+        # ---------------------------------------------------------
+        # [3] ROI 추적 (직전 타겟 주변만 검출 -> 전체 프레임 adaptive threshold 생략)
+        # ---------------------------------------------------------
+        self.USE_ROI_TRACKING = True
+        self.ROI_PAD_SCALE = 1.0     # 마커 한 변(px) 대비 여유 배율
+        self.ROI_MIN_PAD = 40        # 최소 여유 (px)
+        self.ROI_MAX_AREA = 0.6      # ROI가 프레임의 60% 이상이면 그냥 전체 탐색
+        self.ROI_MAX_MISSES = 2      # ROI 연속 실패 허용 횟수 -> 도달 시 전체 프레임 재탐색
+
+        self.last_target_corners = None   # (P, 2) 전체 프레임 좌표 (보드면 전체 마커 코너)
+        self.target_velocity = np.zeros(2, dtype=np.float32)  # 프레임당 중심 이동량
+        self.roi_miss_count = 0
+
+        # [변화 게이트] 타겟 주변(없으면 전체)을 작게 줄여 직전 검출 프레임과 비교
+        # 변화가 없으면 detectMarkers + PnP 생략, 이전 측정을 현재 시각으로 칼만에 다시 넣음 (정지/대기 중 CPU 절약)
+        # gate.MAX_AGE 초마다는 무조건 실제 검출
+        self.USE_CHANGE_GATE = change_gate
+        self.gate = ChangeGate(max_age=0.5)
+        self.last_detection = None        # (corners, ids, ids_flat, raw_corners, corners_arr, pose, markers)
+
+        # ---------------------------------------------------------
+        # [4] 재사용 버퍼 (프레임마다 새로 할당하지 않음)
+        # ---------------------------------------------------------
+        self.HUD_WIDTH = 260
+        self.HUD_HEIGHT = 190  # X값 표시를 위해 높이 약간 늘림
+        self.gray_buf = None
+        self.hud_overlay = None
+        self.result = DockingResult()
+
+    def build_coarse_detector(self):
+        # 축소 영상용 파라미터: 작은 마커는 어차피 원본 해상도 단계에서 찾으므로
+        # 최소 둘레를 키우고 adaptive threshold 창 수를 줄임, 코너 보정은 원본에서 따로
+        p = cv2.aruco.DetectorParameters()
+        p.minMarkerPerimeterRate = 0.1
+        p.adaptiveThreshWinSizeMin = 3
+        p.adaptiveThreshWinSizeMax = 13
+        p.adaptiveThreshWinSizeStep = 10
+        p.perspectiveRemovePixelPerCell = self.parameters.perspectiveRemovePixelPerCell
+        p.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_NONE
+        self.coarse_parameters = p
+        self.coarse_detector = cv2.aruco.ArucoDetector(self.aruco_dict, p)
+        self.subpix_criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
+    def detect_image(self, gray):
+        if self.USE_PYRAMID and min(gray.shape[:2]) * self.PYRAMID_SCALE >= self.PYRAMID_MIN_SIZE:
+            s = self.PYRAMID_SCALE
+            small = cv2.resize(gray, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+            corners, ids, _ = self.coarse_detector.detectMarkers(small)
+            if self.has_target(ids):
+                # 축소 좌표 -> 원본 좌표 (픽셀 중심 기준), 원본 gray 에서 서브픽셀 보정
+                pts = ((np.concatenate(corners).reshape(-1, 1, 2) + 0.5) / s - 0.5).astype(np.float32)
+                # 창 크기는 모듈(한 칸 = 한 변/8) 절반 정도, 크면 내부 비트 모서리에 끌려감
+                side = np.linalg.norm(pts[1::4] - pts[0::4], axis=2).min()
+                win = int(np.clip(round(side / 16), 2, 4))
+                cv2.cornerSubPix(gray, pts, (win, win), (-1, -1), self.subpix_criteria)
+                return tuple(pts.reshape(-1, 1, 4, 2)), ids
+
+        corners, ids, _ = self.detector.detectMarkers(gray)
+        return corners, ids
+
+    def set_resolution(self, w, h):
+        self.camera_matrix = self.profile.intrinsics_for(w, h)
+        self.dist_coeffs = self.profile.dist_coeffs
+        self.pnp_dist_coeffs = self.dist_coeffs
+        self.frame_size = (w, h)
+        # 이전 해상도의 픽셀 좌표는 무효
+        self.last_target_corners = None
+
+    def build_board(self):
+        # 보드 중심이 원점, y축 위쪽 (단일 마커 obj_points 와 같은 좌표계) -> yaw/x 의미가 동일
+        L, S = self.MARKER_SIZE, self.BOARD_SEPARATION
+        board_w = self.BOARD_COLS * L + (self.BOARD_COLS - 1) * S
+        board_h = self.BOARD_ROWS * L + (self.BOARD_ROWS - 1) * S
+
+        obj = []
+        for r in range(self.BOARD_ROWS):
+            for c in range(self.BOARD_COLS):
+                x0 = -board_w / 2 + c * (L + S)
+                y0 = board_h / 2 - r * (L + S)
+                obj.append([[x0, y0, 0], [x0 + L, y0, 0], [x0 + L, y0 - L, 0], [x0, y0 - L, 0]])
+        self.board_obj_points = np.array(obj, dtype=np.float32)  # (K, 4, 3)
+        self.board_ids = np.arange(len(obj)) + self.BOARD_FIRST_ID
+        self.board = cv2.aruco.GridBoard((self.BOARD_COLS, self.BOARD_ROWS), L, S, self.aruco_dict, self.board_ids)
+
+    def has_target(self, ids):
+        if ids is None:
+            return False
+        if self.USE_BOARD:
+            return bool(np.isin(ids, self.board_ids).any())
+        return self.TARGET_ID in ids
+
+    def estimate_target_pose(self, ids_flat, corners_arr):
+        # 반환: (rvecs, tvecs, target_mask) / 타겟이 없으면 None
+        if self.USE_BOARD:
+            mask = np.isin(ids_flat, self.board_ids)
+            if not mask.any():
+                return None
+            obj = self.board_obj_points[ids_flat[mask] - self.BOARD_FIRST_ID].reshape(-1, 3)
+            img = corners_arr[mask].reshape(-1, 2)
+            # 보이는 모든 보드 코너로 한 번에 풀기 (평면 -> IPPE, 두 해 반환)
+            _, rvecs, tvecs, _ = cv2.solvePnPGeneric(
+                obj, img, self.camera_matrix, self.pnp_dist_coeffs, flags=cv2.SOLVEPNP_IPPE
+            )
+            return rvecs, tvecs, mask
+
+        hits = np.flatnonzero(ids_flat == self.TARGET_ID)
+        if len(hits) == 0:
+            return None
+        mask = np.zeros(len(ids_flat), dtype=bool)
+        mask[hits[0]] = True
+        _, rvecs, tvecs, _ = cv2.solvePnPGeneric(
+            self.obj_points, corners_arr[hits[0]], self.camera_matrix, self.pnp_dist_coeffs, 
+            flags=cv2.SOLVEPNP_IPPE_SQUARE
+        )
+        return rvecs, tvecs, mask
+
+    def estimate_marker_poses(self, corners_arr):
+        # 마커 M개의 포즈: 마커마다 solvePnPGeneric(IPPE_SQUARE), 재투영 오차가 작은 첫 해 사용
+        # (보통 몇 개뿐이라 OpenCV 호출 반복이 직접 벡터화한 해석해보다 빠름)
+        # 반환: R (M, 3, 3), t (M, 3)
+        M = len(corners_arr)
+        R = np.empty((M, 3, 3))
+        t = np.empty((M, 3))
+        for i in range(M):
+            _, rvecs, tvecs, _ = cv2.solvePnPGeneric(
+                self.obj_points, corners_arr[i], self.camera_matrix, self.pnp_dist_coeffs,
+                flags=cv2.SOLVEPNP_IPPE_SQUARE
+            )
+            R[i] = cv2.Rodrigues(rvecs[0])[0]
+            t[i] = tvecs[0].ravel()
+        return R, t
+
+    def euler_from_matrices(self, R):
+        # euler_from_quaternion 의 벡터화 버전: (M, 3, 3) -> (M, 3) [roll, pitch, yaw] deg
+        sy = np.sqrt(R[:, 0, 0] ** 2 + R[:, 1, 0] ** 2)
+        singular = sy < 1e-6
+        x = np.where(singular, np.arctan2(-R[:, 1, 2], R[:, 1, 1]), np.arctan2(R[:, 2, 1], R[:, 2, 2]))
+        y = np.arctan2(-R[:, 2, 0], sy)
+        z = np.where(singular, 0.0, np.arctan2(R[:, 1, 0], R[:, 0, 0]))
+        return np.degrees(np.stack([x, y, z], axis=1))
 
     def euler_from_quaternion(self, rvec):
         rmat, _ = cv2.Rodrigues(rvec)
@@ -65,109 +286,243 @@ class DockingAI:
             z = math.atan2(rmat[1,0], rmat[0,0])
         return x*180/math.pi, y*180/math.pi, z*180/math.pi
 
-    def process(self, frame):
+    def reset_tracking(self):
+        self.tracking_data = {}
+        self.last_target_corners = None
+        self.target_velocity[:] = 0
+        self.roi_miss_count = 0
+        self.gate.reset()
+        self.last_detection = None
+
+    def get_search_roi(self, w, h):
+        # 직전 코너 + 속도 예측 위치를 기준으로 여유를 둔 탐색 영역 (x0, y0, x1, y1)
+        if not self.USE_ROI_TRACKING or self.last_target_corners is None:
+            return None
+
+        pts = self.last_target_corners + self.target_velocity
+        x_min, y_min = pts.min(axis=0)
+        x_max, y_max = pts.max(axis=0)
+        side = max(x_max - x_min, y_max - y_min)
+        pad = max(self.ROI_MIN_PAD, side * self.ROI_PAD_SCALE) + np.abs(self.target_velocity).max()
+
+        x0, y0 = max(int(x_min - pad), 0), max(int(y_min - pad), 0)
+        x1, y1 = min(int(x_max + pad) + 1, w), min(int(y_max + pad) + 1, h)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        if (x1 - x0) * (y1 - y0) >= self.ROI_MAX_AREA * w * h:
+            return None
+        return x0, y0, x1, y1
+
+    def detect_markers(self, gray):
+        h, w = gray.shape[:2]
+        roi = self.get_search_roi(w, h)
+
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            corners, ids = self.detect_image(gray[y0:y1, x0:x1])
+            if len(corners) > 0:
+                # ROI 좌표 -> 전체 프레임 좌표
+                offset = np.array([x0, y0], dtype=np.float32)
+                corners = tuple(c + offset for c in corners)
+
+            if self.has_target(ids):
+                return corners, ids
+
+            self.roi_miss_count += 1
+            if self.roi_miss_count < self.ROI_MAX_MISSES:
+                return corners, ids
+
+            # 연속 실패 -> 추적 해제 후 전체 프레임 재탐색
+            self.last_target_corners = None
+            self.target_velocity[:] = 0
+
+        return self.detect_image(gray)
+
+    def update_roi_tracking(self, target_corners):
+        if target_corners is None:
+            if self.USE_ROI_TRACKING and self.last_target_corners is None:
+                self.roi_miss_count = 0
+            return
+
+        if self.last_target_corners is not None:
+            self.target_velocity = target_corners.mean(axis=0) - self.last_target_corners.mean(axis=0)
+        self.last_target_corners = target_corners.astype(np.float32)
+        self.roi_miss_count = 0
+
+    def make_tracker(self):
+        return PoseKalmanTracker()
+
+    def process(self, frame, timestamp=None):
+        # timestamp: 프레임 캡처 시각 (time.monotonic 기준, LatestFrameCapture 의 ts)
+        if timestamp is None:
+            timestamp = time.monotonic()
         h, w, _ = frame.shape
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        corners, ids, rejected = self.detector.detectMarkers(gray)
-        
-        # 데이터 구조에 'x_cm' 추가
-        data = { "found": False, "id": -1, "dist_cm": 0.0, "x_cm": 0.0, "roll": 0.0, "pitch": 0.0, "yaw": 0.0, "center": (0, 0) }
+        if (w, h) != self.frame_size:
+            self.set_resolution(w, h)
+        self.pnp_dist_coeffs = self.dist_coeffs if self.UNDISTORT_MODE == "none" else self.zero_dist
+
+        prof = self.prof
+        with prof.stage("dock.gray"):
+            self.gray_buf = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray_buf)
+            gray = self.gray_buf
+            if self.UNDISTORT_MODE == "image":
+                self.undist_buf = self.profile.undistort_image(gray, dst=self.undist_buf)
+                gray = self.undist_buf
+
+        reused = False
+        if self.USE_CHANGE_GATE and self.last_detection is not None:
+            with prof.stage("dock.gate"):
+                reused = not self.gate.changed(gray, timestamp)
+
+        data = self.result
+        data.clear()
+        data.reused = reused
 
-        best_marker_idx = -1
         best_rvec, best_tvec = None, None
-        found_target = False
-        current_visible_ids = []
+        target_pts = None
+        ids_flat = raw_corners = corners_arr = None
+        pose = markers = None
+        others = None   # 요약할 나머지 마커 (bool 마스크)
 
-        if ids is not None:
-            for i in range(len(ids)):
-                marker_id = ids[i][0]
-                current_visible_ids.append(marker_id)
-
-                if marker_id == self.TARGET_ID:
-                    target_corners = corners[i][0]
-                    found_target = True
-                    
-                    _, rvecs, tvecs, _ = cv2.solvePnPGeneric(
-                        self.obj_points, target_corners, self.camera_matrix, self.dist_coeffs, 
-                        flags=cv2.SOLVEPNP_IPPE_SQUARE
-                    )
-
-                    final_rvec = rvecs[0]
-                    final_tvec = tvecs[0]
-
-                    # Ambiguity 해결
-                    if marker_id in self.tracking_data:
-                        prev_rvec = self.tracking_data[marker_id]['rvec']
-                        diff0 = abs(rvecs[0] - prev_rvec).sum()
-                        diff1 = abs(rvecs[1] - prev_rvec).sum() if len(rvecs) > 1 else 9999
-                        if diff1 < diff0:
-                            final_rvec = rvecs[1]
-                            final_tvec = tvecs[1]
-                    
-                    # 스무딩
-                    if marker_id in self.tracking_data:
-                        last_rvec = self.tracking_data[marker_id]['rvec']
-                        last_tvec = self.tracking_data[marker_id]['tvec']
-                        final_rvec = self.ALPHA * final_rvec + (1 - self.ALPHA) * last_rvec
-                        final_tvec = self.ALPHA * final_tvec + (1 - self.ALPHA) * last_tvec
-
-                    self.tracking_data[marker_id] = {'rvec': final_rvec, 'tvec': final_tvec}
-                    best_marker_idx = i
-                    best_rvec, best_tvec = final_rvec, final_tvec
-                    data["id"] = int(marker_id)
-                    break 
-
-        keys_to_remove = [k for k in self.tracking_data if k not in current_visible_ids]
-        for k in keys_to_remove: del self.tracking_data[k]
-
-        if found_target and best_marker_idx != -1:
-            data["found"] = True
+        if reused:
+            # 검출 / 포즈 / 나머지 마커 요약까지 그대로 (같은 코너로 solvePnP 반복 안 함)
+            corners, ids, ids_flat, raw_corners, corners_arr, pose, markers = self.last_detection
+        else:
+            with prof.stage("dock.detect"):
+                corners, ids = self.detect_markers(gray)
+
+        if ids is not None and not reused:
+            with prof.stage("dock.pose"):
+                ids_flat = ids.ravel()
+                raw_corners = np.concatenate(corners).reshape(-1, 4, 2)
+                corners_arr = raw_corners
+                if self.UNDISTORT_MODE == "corners":
+                    corners_arr = self.profile.undistort_points(raw_corners, w, h)
+                pose = self.estimate_target_pose(ids_flat, corners_arr)
+
+        key = self.TARGET_ID   # 타겟만 추적
+        tracker = self.tracking_data.get(key)
+
+        if pose is not None:
+            rvecs, tvecs, target_mask = pose
+            target_pts = raw_corners[target_mask].reshape(-1, 2)
+
+            # 칼만 갱신 (IPPE 두 해 중 예측에 가까운 쪽 선택 포함)
+            if tracker is None:
+                tracker = self.tracking_data[key] = self.make_tracker()
+            with prof.stage("dock.track"):
+                tracker.update(rvecs, tvecs, timestamp)
+            data.id = int(key)
+            data.n_markers = int(target_mask.sum())
+
+            # 나머지 마커: 타겟 외
+            others = ~target_mask
+        else:
+            # 짧은 미검출은 예측으로 유지, 오래되면 추적 삭제
+            if tracker is not None and timestamp - tracker.last_meas_ts > self.TRACK_MAX_COAST:
+                del self.tracking_data[key]
+                tracker = None
+            if tracker is not None:
+                tracker.predict(timestamp)
+                data.id = int(key)
+                data.coasting = True
+            if ids is not None:
+                others = np.ones(len(ids_flat), dtype=bool)
+
+        # 나머지 마커: 한 번에 포즈 + 오일러 변환 (재사용 프레임은 저장된 요약)
+        if self.ESTIMATE_OTHER_MARKERS and others is not None and others.any():
+            if not reused:
+                with prof.stage("dock.others"):
+                    markers = self.marker_summaries(ids_flat[others], corners_arr[others])
+            data.markers = markers
+
+        self.update_roi_tracking(target_pts)
+
+        if self.USE_CHANGE_GATE and not reused:
+            box = None
+            if target_pts is not None:
+                box = (*target_pts.min(axis=0), *target_pts.max(axis=0))
+            self.gate.commit(gray, box, timestamp)
+            self.last_detection = (corners, ids, ids_flat, raw_corners, corners_arr, pose, markers)
+
+        if tracker is not None:
+            # 캡처 시점 + (지금까지 걸린 시간 + 구동 지연) 으로 외삽
+            horizon = (time.monotonic() - timestamp) + self.ACTUATION_DELAY if self.LATENCY_COMP else 0.0
+            best_rvec, best_tvec = tracker.pose_at(timestamp + horizon)
+            data.latency_ms = horizon * 1000.0
+            data.found = True
             
             # 1. 거리(Z축) 계산 및 보정
-            raw_dist = math.sqrt(best_tvec[0]**2 + best_tvec[1]**2 + best_tvec[2]**2)
-            data["dist_cm"] = (raw_dist * self.DIST_SCALE) + self.DIST_OFFSET
+            raw_dist = math.sqrt(best_tvec[0][0]**2 + best_tvec[1][0]**2 + best_tvec[2][0]**2)
+            data.dist_cm = (raw_dist * self.DIST_SCALE) + self.DIST_OFFSET
 
             # 2. 좌우 편차(X축) 계산 및 보정 (Offset은 제외하고 Scale만 적용)
             # best_tvec[0]이 0이면 중앙, 음수면 왼쪽, 양수면 오른쪽
-            data["x_cm"] = best_tvec[0][0] * self.DIST_SCALE
+            data.x_cm = best_tvec[0][0] * self.DIST_SCALE
 
-            data["roll"], data["pitch"], raw_yaw = self.euler_from_quaternion(best_rvec)
+            data.roll, data.pitch, raw_yaw = self.euler_from_quaternion(best_rvec)
             
-            cx = int(corners[best_marker_idx][0][:, 0].mean())
-            cy = int(corners[best_marker_idx][0][:, 1].mean())
-            data["center"] = (cx, cy)
-            data["yaw"] = raw_yaw 
+            if target_pts is not None:
+                cx, cy = self.to_frame_points(target_pts, w, h).mean(axis=0)
+            else:
+                center, _ = cv2.projectPoints(best_tvec.reshape(1, 3), np.zeros(3), np.zeros(3), self.camera_matrix, self.dist_coeffs)
+                cx, cy = center.ravel()
+            data.center = (int(cx), int(cy))
+            data.yaw = raw_yaw 
+
+            if not self.HEADLESS:
+                with prof.stage("dock.overlay"):
+                    self.draw_overlay(frame, data, corners, ids, best_rvec, best_tvec)
+
+        return data, frame
+
+    def marker_summaries(self, ids_flat, corners_arr):
+        R, t = self.estimate_marker_poses(corners_arr)
+        euler = self.euler_from_matrices(R)
+        out = np.empty((len(ids_flat), 5), dtype=np.float32)
+        out[:, 0] = ids_flat
+        out[:, 1] = np.linalg.norm(t, axis=1) * self.DIST_SCALE + self.DIST_OFFSET
+        out[:, 2] = t[:, 0] * self.DIST_SCALE
+        out[:, 3] = euler[:, 2]
+        out[:, 4] = euler[:, 1]
+        return out
+
+    def to_frame_points(self, pts, w, h):
+        # 검출 좌표 -> 원본 프레임 좌표 ("image" 모드는 보정 영상에서 검출했으므로 다시 왜곡)
+        if self.UNDISTORT_MODE == "image":
+            return self.profile.distort_points(pts, w, h)
+        return pts
 
+    def draw_overlay(self, frame, data, corners, ids, rvec, tvec):
+        h, w, _ = frame.shape
+        if ids is not None:
+            if self.UNDISTORT_MODE == "image":
+                corners = tuple(self.to_frame_points(np.concatenate(corners), w, h)[:, None])
             cv2.aruco.drawDetectedMarkers(frame, corners, ids)
-            cv2.drawFrameAxes(frame, self.camera_matrix, self.dist_coeffs, best_rvec, best_tvec, self.MARKER_SIZE * 1.5)
-
-            # UI
-            box_width = 260
-            box_height = 190 # X값 표시를 위해 높이 약간 늘림
-            box_x, box_y = w - box_width, h - box_height
-
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (box_x, box_y), (w, h), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
-
-            # =========================================================
-            # [최종 도킹 조건]
-            # 1. 거리: 8.5cm ± 1cm (7.5 ~ 9.5)
-            # 2. Yaw : 0도 ± 0.5도
-            # 3. X축 : 0cm ± 0.1cm (중앙 정렬)
-            # =========================================================
-            dist_col = (0, 255, 0) if (7.5 <= data["dist_cm"] <= 9.5) else (0, 255, 255)
-            yaw_col = (0, 255, 0) if abs(data["yaw"]) <= 0.5 else (0, 255, 255)
-            x_col    = (0, 255, 0) if abs(data["x_cm"]) <= 0.3 else (0, 255, 255) # X축 조건
-            
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            
-            cv2.putText(frame, f"ID: {data['id']}", (box_x+10, box_y+30), font, 0.8, (0,255,255), 2)
-            cv2.putText(frame, f"Dist : {data['dist_cm']:.1f} cm", (box_x+10, box_y+65), font, 0.7, dist_col, 2)
-            cv2.putText(frame, f"X    : {data['x_cm']:.2f} cm", (box_x+10, box_y+135), font, 0.7, x_col, 2)
-            cv2.putText(frame, f"Yaw  : {data['yaw']:.1f} deg", (box_x+10, box_y+100), font, 0.7, yaw_col, 2)
-            
-            cv2.putText(frame, f"P:{data['pitch']:.1f} R:{data['roll']:.1f}", (box_x+10, box_y+165), font, 0.6, (200,200,200), 1)
+        cv2.drawFrameAxes(frame, self.camera_matrix, self.dist_coeffs, rvec, tvec, self.MARKER_SIZE * 1.5)
 
-        return data, frame
\ No newline at end of file
+        # UI: HUD 영역만 반투명 검정으로 블렌딩 (전체 프레임 copy / addWeighted 생략)
+        box_x, box_y = max(w - self.HUD_WIDTH, 0), max(h - self.HUD_HEIGHT, 0)
+        hud = frame[box_y:h, box_x:w]
+        if self.hud_overlay is None or self.hud_overlay.shape != hud.shape:
+            self.hud_overlay = np.zeros_like(hud)
+        cv2.addWeighted(self.hud_overlay, 0.6, hud, 0.4, 0, dst=hud)
+
+        # =========================================================
+        # [최종 도킹 조건]
+        # 1. 거리: 8.5cm ± 1cm (7.5 ~ 9.5)
+        # 2. Yaw : 0도 ± 0.5도
+        # 3. X축 : 0cm ± 0.1cm (중앙 정렬)
+        # =========================================================
+        dist_col = (0, 255, 0) if (7.5 <= data.dist_cm <= 9.5) else (0, 255, 255)
+        yaw_col = (0, 255, 0) if abs(data.yaw) <= 0.5 else (0, 255, 255)
+        x_col    = (0, 255, 0) if abs(data.x_cm) <= 0.3 else (0, 255, 255) # X축 조건
+        
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        
+        cv2.putText(frame, f"ID: {data.id}", (box_x+10, box_y+30), font, 0.8, (0,255,255), 2)
+        cv2.putText(frame, f"Dist : {data.dist_cm:.1f} cm", (box_x+10, box_y+65), font, 0.7, dist_col, 2)
+        cv2.putText(frame, f"X    : {data.x_cm:.2f} cm", (box_x+10, box_y+135), font, 0.7, x_col, 2)
+        cv2.putText(frame, f"Yaw  : {data.yaw:.1f} deg", (box_x+10, box_y+100), font, 0.7, yaw_col, 2)
+        
+        cv2.putText(frame, f"P:{data.pitch:.1f} R:{data.roll:.1f}", (box_x+10, box_y+165), font, 0.6, (200,200,200), 1)
@@ -0,0 +1,96 @@
+import multiprocessing
+import numpy as np
+import time
+from multiprocessing import shared_memory
+
+# =========================================================
+# 공유 메모리 프레임 링 버퍼 (프로세스 간 프레임 전달, 직렬화/파이프 복사 없음)
+# - 캡처 프로세스 1개가 publish(), 여러 프로세스가 read()
+# - 슬롯마다 프로세스 간 Lock: 쓰기(프레임 + 메타)와 읽기 복사를 잠금 안에서
+#   잠금 획득/해제가 메모리 배리어 역할 -> ARM(Jetson) 처럼 저장 순서가 보장되지 않는 CPU 에서도 찢어진 프레임 없음
+#   (일반 numpy 저장/읽기만 쓰는 seqlock 은 x86 의 저장 순서에 기대므로 쓰지 않음)
+# - head 의 최신 seq / 닫힘 플래그는 힌트일 뿐, 실제 seq 는 잠금 안의 슬롯 메타로 확인
+# - 읽기는 항상 복사본 (잠금 밖에서 공유 메모리 뷰를 쓰면 처리 중에 덮어써질 수 있음)
+# =========================================================
+
+HEAD_FIELDS = 2   # [최신 seq, 닫힘 플래그]
+META_FIELDS = 2   # 슬롯별 [seq, timestamp]
+
+class FrameBus:
+    def __init__(self, shape, slots=4, name=None, create=True, locks=None, ctx=None):
+        # ctx: 작업 프로세스를 만드는 multiprocessing 컨텍스트 (잠금도 같은 컨텍스트로 생성)
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.locks = locks if locks is not None else [(ctx or multiprocessing).Lock() for _ in range(slots)]
+        frame_bytes = int(np.prod(self.shape))
+        meta_bytes = (HEAD_FIELDS + slots * META_FIELDS) * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=meta_bytes + slots * frame_bytes)
+        self.owner = create
+
+        self.head = np.ndarray((HEAD_FIELDS,), dtype=np.float64, buffer=self.shm.buf)
+        self.meta = np.ndarray((slots, META_FIELDS), dtype=np.float64, buffer=self.shm.buf, offset=HEAD_FIELDS * 8)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=meta_bytes)
+        if create:
+            self.head[:] = 0
+            self.meta[:] = 0
+
+        self.seq = 0  # 쓰는 쪽: 마지막 publish 번호
+
+    @classmethod
+    def attach(cls, spec):
+        # 다른 프로세스에서 spec() 으로 받은 정보로 연결 (spec 은 Process 인자로 넘겨야 잠금이 전달됨)
+        name, shape, slots, locks = spec
+        return cls(shape, slots, name=name, create=False, locks=locks)
+
+    def spec(self):
+        return self.shm.name, self.shape, self.slots, self.locks
+
+    # -----------------------------------------------------
+    # 쓰기 (캡처 프로세스)
+    # -----------------------------------------------------
+    def publish(self, frame, timestamp):
+        self.seq += 1
+        slot = self.seq % self.slots
+        with self.locks[slot]:
+            self.frames[slot][...] = frame
+            self.meta[slot, 0] = self.seq
+            self.meta[slot, 1] = timestamp
+        self.head[0] = self.seq
+        return self.seq
+
+    def close_stream(self):
+        # 읽는 쪽 루프 종료 신호
+        self.head[1] = 1
+
+    # -----------------------------------------------------
+    # 읽기 (작업 프로세스)
+    # -----------------------------------------------------
+    @property
+    def closed(self):
+        return self.head[1] != 0
+
+    def latest_seq(self):
+        return int(self.head[0])
+
+    def read(self, last_seq=0, timeout=1.0, poll=0.001):
+        # last_seq 보다 새 프레임 중 가장 최신 것 (복사본), 반환: (ok, frame, timestamp, seq)
+        deadline = time.monotonic() + timeout
+        while not self.closed:
+            seq = int(self.head[0])
+            if seq > last_seq:
+                slot = seq % self.slots
+                with self.locks[slot]:
+                    if int(self.meta[slot, 0]) == seq:
+                        return True, self.frames[slot].copy(), float(self.meta[slot, 1]), seq
+                continue  # 그 사이 더 새 프레임으로 덮어써짐 -> 최신으로 재시도
+            if time.monotonic() > deadline:
+                break
+            time.sleep(poll)
+        return False, None, 0.0, last_seq
+
+    def close(self):
+        # numpy 뷰를 먼저 놓아야 공유 메모리를 닫을 수 있음
+        self.head = self.meta = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,28 +1,189 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
+import time
+import threading
+from pose_backends import create_pose_backend, import_runtime
+from profiler import NULL_PROFILER
+from change_gate import ChangeGate
+from keypoint_history import KeypointHistory
+from gesture_rules import GestureState, pose_features, pose_view, step, release_hold, COLOR_IDLE, HOLD_NORMAL_S, HOLD_RESET_S
+
+class PoseWorker:
+    # 포즈 모델을 별도 스레드에서 실행 -> 메인 루프(화면/명령)는 모델 속도와 무관하게 진행
+    # 대기 중인 입력은 항상 최신 프레임 1장만 유지 (처리 못 한 프레임은 덮어씀)
+    def __init__(self, infer_fn):
+        self.infer_fn = infer_fn
+        self.cond = threading.Condition()
+        self.pending = None   # (frame, frame_ts, frame_idx, capture_ts)
+        self.result = None    # (kpts or None, frame_ts, frame_idx, capture_ts)
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="PoseWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, frame_ts, frame_idx, capture_ts):
+        with self.cond:
+            self.pending = (frame, frame_ts, frame_idx, capture_ts)
+            self.cond.notify()
+
+    def latest(self):
+        with self.cond:
+            return self.result
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    return
+                frame, frame_ts, frame_idx, capture_ts = self.pending
+                self.pending = None
+
+            kpts = self.infer_fn(frame)
+            with self.cond:
+                self.result = (kpts, frame_ts, frame_idx, capture_ts)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=1.0)
 
 class MarshallerAI:
-    def __init__(self):
-        self.model = YOLO('yolov8n-pose.pt') 
-        
-        # [상태 관리 변수]
-        self.stage = 0 
-        self.is_finished = False 
-        
-        # [스테이지 전환용 타이머 설정]
-        self.trigger_counter = 0
-        self.triggered_lock = False 
+    def __init__(self, async_infer=False, infer_stride=1, backend='torch', imgsz=640, profiler=None, lazy_load=True,
+                 crop_tracking=False, crop_imgsz=256, change_gate=False):
+        # [포즈 백엔드] torch / onnx / onnx-int8 / openvino (onnx 계열은 최초 1회 자동 export)
+        # imgsz 를 320, 256 등으로 줄이면 CPU 속도 크게 향상
+        # [지연 로딩] 런타임 import -> 모델 로드 -> 워밍업 추론을 백그라운드 스레드에서 진행
+        # 그동안 카메라/도킹은 바로 동작, 제스처는 준비될 때까지 "LOADING MODEL..." 표시
+        # lazy_load=False 면 생성자에서 준비 완료까지 대기
+        self.BACKEND = backend
+        self.IMGSZ = imgsz
+        self.WEIGHTS = 'yolov8n-pose.pt'
+        self.WARMUP_RUNS = 2
+        self.model = None
+        self.model_ready = threading.Event()
+        self.model_done = threading.Event()  # 성공/실패와 무관하게 로딩 시도가 끝났는지
+        self.model_error = None
+        self.startup_times = {}  # 초: import / load / warmup
+
+        # [사람 크롭 추론] 직전 마샬러 bbox 주변(여백 포함)만 잘라 작은 입력(CROP_IMGSZ)으로 추론
+        # 키포인트는 원본 프레임 좌표로 되돌리므로 이후 정규화/규칙은 그대로
+        # FULL_DETECT_EVERY 번마다, 또는 크롭에서 사람을 놓치면 전체 프레임 재검출
+        self.CROP_TRACKING = crop_tracking
+        self.CROP_IMGSZ = crop_imgsz
+        self.CROP_MARGIN = 0.25        # bbox 긴 변 대비 여백 비율 (팔 벌림 여유)
+        self.CROP_MIN_SIZE = 160       # 크롭 최소 한 변 (px)
+        self.FULL_DETECT_EVERY = 15    # 크롭 추론 N 번마다 전체 프레임 재검출
+        self.crop_model = None
+        self.track_box = None          # 다음 크롭 기준 bbox (추론 스레드에서만 갱신)
+        self.crops_since_full = 0
+        self.crop_stats = {"crop": 0, "full": 0, "lost": 0}
+
+        # [추론 주기] INFER_STRIDE 프레임마다 1번만 모델 실행, 나머지는 최근 키포인트 재사용
+        # ASYNC_INFER=True 면 모델은 워커 스레드에서 돌고 제스처 판단/화면은 매 프레임 진행
+        self.ASYNC_INFER = async_infer
+        self.INFER_STRIDE = max(1, int(infer_stride))
+        self.worker = PoseWorker(self.infer_keypoints) if async_infer else None
+
+        # [구간 측정] profiler.StageProfiler (None 이면 측정 안 함)
+        self.prof = profiler or NULL_PROFILER
+
+        self.frame_count = 0
+        self.last_result = None        # (kpts or None, frame_ts, frame_idx, capture_ts)
+        self.keypoints_age = 0.0       # 사용 중인 키포인트가 찍힌 뒤 지난 시간 (초)
+        self.keypoints_frame_age = 0   # 사용 중인 키포인트가 몇 프레임 전 것인지
+        self.keypoints_idx = None      # 사용 중인 키포인트를 추론한 프레임 번호 (새 결과인지 판단)
+        self.keypoints_ts = None       # 사용 중인 키포인트 프레임의 캡처 시각
+
+        # [움직임 이력] 선택된 사람의 최근 키포인트 링 버퍼 (새 추론 결과만 추가, 캡처 시각 기준)
+        # 손 흔들기(감속) / 손짓(이리 와) 같은 동작 제스처는 여기서 나온 p.motion 으로 판단
+        self.history = KeypointHistory(capacity=64, window=1.5)
+        self.history_idx = None        # 이력에 마지막으로 넣은 keypoints_idx
+
+        # [변화 게이트] 사람 영역(없으면 전체)이 직전 추론 프레임과 거의 같으면 모델 생략, 키포인트 재사용
+        # gate.MAX_AGE 초마다는 무조건 추론 (비동기 모드는 제출 시점 프레임이 기준)
+        self.USE_CHANGE_GATE = change_gate
+        self.gate = ChangeGate(max_age=0.5)
+        self.reused = False            # 이번 프레임 키포인트가 게이트로 재사용된 것인지
+
+        # [마샬러 선택] 여러 사람이 잡힐 때 누구의 제스처를 볼지
+        # largest: bbox 가장 큰 사람 / central: 화면 중앙에 가장 가까운 사람
+        # sticky : 직전 선택과 IoU 가 가장 큰 사람 (없으면 largest)
+        self.PERSON_POLICY = "sticky"
+        self.STICKY_MIN_IOU = 0.3
+        self.selected_box = None
+        self.selected_kpts = None  # 선택된 사람 키포인트 (17, 3), 녹화/디버그용
         
-        self.LIMIT_NORMAL = 20       # 일반 동작: 약 1.0초
-        self.LIMIT_RESET  = 40       # 리셋 동작: 약 2.0초
+        # [상태 관리] 스테이지 / 완료 / 트리거 유지 (gesture_rules.GestureState, 불변 -> 매 프레임 교체)
+        # 유지 시간은 프레임 수가 아니라 캡처 시각 기준 (fps/추론 주기와 무관)
+        self.state = GestureState()
+        self.frame_size = None       # (w, h), 녹화 키포인트 일괄 분류용
+
+        # 유지 시간 기본값은 gesture_rules 와 공유 (classify / bench / batch CLI 와 같은 값)
+        self.HOLD_NORMAL_S = HOLD_NORMAL_S   # 일반 동작
+        self.HOLD_RESET_S  = HOLD_RESET_S    # 리셋 동작
+
+        self.loader = threading.Thread(target=self.load_model, name="PoseModelLoader", daemon=True)
+        self.loader.start()
+        if not lazy_load:
+            self.wait_ready()
+
+    def load_model(self):
+        try:
+            t0 = time.perf_counter()
+            import_runtime(self.BACKEND)
+            t1 = time.perf_counter()
+            model = create_pose_backend(self.BACKEND, self.WEIGHTS, imgsz=self.IMGSZ, conf=0.5)
+            crop_model = None
+            if self.CROP_TRACKING:
+                crop_model = create_pose_backend(self.BACKEND, self.WEIGHTS, imgsz=self.CROP_IMGSZ, conf=0.5, share=model)
+            t2 = time.perf_counter()
+            # 첫 추론은 그래프 빌드/메모리 할당으로 느림 -> 더미 프레임으로 미리
+            dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+            for _ in range(self.WARMUP_RUNS):
+                model.infer(dummy)
+                if crop_model is not None:
+                    crop_model.infer(dummy[:self.CROP_MIN_SIZE * 2, :self.CROP_MIN_SIZE * 2])
+            t3 = time.perf_counter()
+        except Exception as e:
+            self.model_error = e
+            print(f"[MarshallerAI] pose model load failed: {e!r}")
+            self.model_done.set()
+            return
+        self.startup_times = {"import": t1 - t0, "load": t2 - t1, "warmup": t3 - t2}
+        self.model = model
+        self.crop_model = crop_model
+        self.model_ready.set()
+        self.model_done.set()
+        print(f"[MarshallerAI] pose model ready ({self.BACKEND} @ {self.IMGSZ}): "
+              f"import {t1 - t0:.2f}s | load {t2 - t1:.2f}s | warmup {t3 - t2:.2f}s")
+
+    def wait_ready(self, timeout=None):
+        self.model_done.wait(timeout)
+        if self.model_error is not None:
+            raise self.model_error
+        return self.model_ready.is_set()
 
-    def calculate_angle(self, a, b, c):
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians*180.0/np.pi)
-        if angle > 180.0: angle = 360-angle
-        return angle
+    def select_person(self, boxes, w, h):
+        if len(boxes) == 1:
+            idx = 0
+        else:
+            area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+            idx = int(np.argmax(area))
+            if self.PERSON_POLICY == "central":
+                cx = (boxes[:, 0] + boxes[:, 2]) / (2 * w) - 0.5
+                cy = (boxes[:, 1] + boxes[:, 3]) / (2 * h) - 0.5
+                idx = int(np.argmin(cx * cx + cy * cy))
+            elif self.PERSON_POLICY == "sticky" and self.selected_box is not None:
+                p = self.selected_box
+                ix = np.clip(np.minimum(boxes[:, 2], p[2]) - np.maximum(boxes[:, 0], p[0]), 0, None)
+                iy = np.clip(np.minimum(boxes[:, 3], p[3]) - np.maximum(boxes[:, 1], p[1]), 0, None)
+                inter = ix * iy
+                iou = inter / (area + (p[2] - p[0]) * (p[3] - p[1]) - inter + 1e-9)
+                if iou.max() >= self.STICKY_MIN_IOU:
+                    idx = int(np.argmax(iou))
+        self.selected_box = boxes[idx, :4].copy()
+        return idx
 
     def draw_custom_skeleton(self, frame, kpts):
         connections = [(5, 6), (5, 7), (7, 9), (6, 8), (8, 10), (5, 11), (6, 12), (11, 12)]
@@ -58,167 +219,171 @@ class MarshallerAI:
         msg = "HOLDING..." if progress < 1.0 else "ACTION COMPLETE!"
         cv2.putText(frame, msg, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
-    def detect_gesture(self, frame):
+    def crop_region(self, box, w, h):
+        # bbox 를 여백만큼 키운 영역 (프레임 안으로 자름): 가로는 긴 변 기준 (팔을 옆으로 뻗어도 잘리지 않게)
+        x1, y1, x2, y2 = box[:4]
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        side = max(x2 - x1, y2 - y1) * (1 + 2 * self.CROP_MARGIN)
+        half_w = max(side, self.CROP_MIN_SIZE) / 2
+        half_h = max((y2 - y1) * (1 + 2 * self.CROP_MARGIN), self.CROP_MIN_SIZE) / 2
+        return (int(max(cx - half_w, 0)), int(max(cy - half_h, 0)),
+                int(min(cx + half_w, w)), int(min(cy + half_h, h)))
+
+    def infer_keypoints(self, frame):
+        # 전체 인원 키포인트 (N, 17, 3) [x, y, conf] 와 boxes (N, 5), 사람이 없으면 None
+        # 비동기 모드에서는 워커 스레드에서 기록됨
+        with self.prof.stage("gesture.infer"):
+            kpts = None
+            if self.crop_model is not None and self.track_box is not None and self.crops_since_full < self.FULL_DETECT_EVERY:
+                h, w = frame.shape[:2]
+                x0, y0, x1, y1 = self.crop_region(self.track_box, w, h)
+                kpts, boxes = self.crop_model.infer(frame[y0:y1, x0:x1])
+                if len(kpts) > 0:
+                    # 크롭 좌표 -> 원본 프레임 좌표
+                    kpts[:, :, 0] += x0
+                    kpts[:, :, 1] += y0
+                    boxes[:, [0, 2]] += x0
+                    boxes[:, [1, 3]] += y0
+                    self.crops_since_full += 1
+                    self.crop_stats["crop"] += 1
+                else:
+                    self.crop_stats["lost"] += 1
+                    kpts = None  # 트랙 놓침 -> 아래에서 전체 프레임 재검출
+            if kpts is None:
+                kpts, boxes = self.model.infer(frame)
+                self.crops_since_full = 0
+                self.crop_stats["full"] += 1
+
+        if len(kpts) == 0:
+            self.track_box = None
+            return None
+        if self.crop_model is not None:
+            self.track_box = self.track_target(boxes)
+        return kpts, boxes
+
+    def track_target(self, boxes):
+        # 다음 크롭 기준: 현재 선택된 마샬러와 가장 겹치는 사람 (선택 전이면 conf 가장 높은 사람)
+        ref = self.selected_box
+        if ref is None:
+            return boxes[0, :4].copy()
+        ix1 = np.maximum(boxes[:, 0], ref[0]); iy1 = np.maximum(boxes[:, 1], ref[1])
+        ix2 = np.minimum(boxes[:, 2], ref[2]); iy2 = np.minimum(boxes[:, 3], ref[3])
+        inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        return boxes[int(np.argmax(inter)), :4].copy()
+
+    def update_keypoints(self, frame, timestamp):
+        now = time.monotonic()
+        self.frame_count += 1
+        run_model = (self.frame_count - 1) % self.INFER_STRIDE == 0
+
+        self.reused = False
+        if run_model and self.USE_CHANGE_GATE and not self.gate.changed(frame, timestamp):
+            run_model = False
+            self.reused = True
+
+        if self.ASYNC_INFER:
+            if run_model:
+                # 아래에서 frame 위에 그림을 그리므로 워커에는 복사본 전달
+                self.worker.submit(frame.copy(), now, self.frame_count, timestamp)
+                self.commit_gate(frame, self.worker.latest(), timestamp)
+            result = self.worker.latest()
+        else:
+            if run_model or self.last_result is None:
+                self.last_result = (self.infer_keypoints(frame), now, self.frame_count, timestamp)
+                self.commit_gate(frame, self.last_result, timestamp)
+            result = self.last_result
+
+        if result is None:
+            return None
+        kpts, frame_ts, frame_idx, capture_ts = result
+        self.keypoints_age = now - frame_ts
+        self.keypoints_frame_age = self.frame_count - frame_idx
+        self.keypoints_idx = frame_idx
+        self.keypoints_ts = capture_ts
+        return kpts
+
+    def commit_gate(self, frame, result, timestamp):
+        # 다음 비교 영역: 최근 결과의 모든 사람 bbox 를 합친 영역 (사람이 없으면 전체 프레임)
+        if not self.USE_CHANGE_GATE:
+            return
+        box = None
+        if result is not None and result[0] is not None:
+            boxes = result[0][1]
+            box = (*boxes[:, :2].min(axis=0), *boxes[:, 2:4].max(axis=0))
+        self.gate.commit(frame, box, timestamp)
+
+    @property
+    def stage(self):
+        return self.state.stage
+
+    @property
+    def is_finished(self):
+        return self.state.is_finished
+
+    @property
+    def hold_time(self):
+        return self.state.hold_time
+
+    def state_dict(self, action):
+        # 프레임별 결과 기록용 (session_recorder), keypoints_ts/frame_size 는 gesture_rules batch 재분류용
+        return {"action": action, "stage": self.stage, "is_finished": self.is_finished,
+                "hold_time": self.hold_time, "keypoints": self.selected_kpts, "keypoints_ts": self.keypoints_ts,
+                "frame_size": self.frame_size, "box": self.selected_box, "keypoints_age": self.keypoints_age,
+                "reused": self.reused}
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def detect_gesture(self, frame, timestamp=None):
+        # timestamp: 프레임 캡처 시각 (time.monotonic 기준), 유지 시간 판단에 사용
+        if timestamp is None:
+            timestamp = time.monotonic()
         h, w, _ = frame.shape
-        results = self.model(frame, verbose=False, conf=0.5)
-        
-        if results[0].keypoints is None or len(results[0].keypoints.data) == 0:
-            self.draw_status(frame, "NO HUMAN", "", (100, 100, 100))
+        self.frame_size = (w, h)
+        if not self.model_ready.is_set():
+            msg = "MODEL ERROR" if self.model_error is not None else "LOADING MODEL..."
+            self.draw_status(frame, msg, "", COLOR_IDLE)
             return "IDLE", frame
 
-        kpts_raw = results[0].keypoints.data[0].cpu().numpy()
-        def get_norm(idx): return [kpts_raw[idx][0]/w, kpts_raw[idx][1]/h]
+        prof = self.prof
+        # 비동기 모드에서는 모델 실행이 아니라 제출/결과 수거 시간 (모델 시간은 gesture.infer)
+        with prof.stage("gesture.pose"):
+            persons = self.update_keypoints(frame, timestamp)
 
-        l_sh, r_sh = get_norm(5), get_norm(6)
-        l_el, r_el = get_norm(7), get_norm(8)
-        l_wr, r_wr = get_norm(9), get_norm(10)
-        l_hip, r_hip = get_norm(11), get_norm(12) 
-        
-        angle_l = self.calculate_angle(l_sh, l_el, l_wr)
-        angle_r = self.calculate_angle(r_sh, r_el, r_wr)
-        
-        wrist_dist_x = abs(l_wr[0] - r_wr[0])
-        shoulder_width = abs(l_sh[0] - r_sh[0])
-        
-        current_action = "READY"
-        info_text = ""
-        bg_color = (245, 117, 16)
-        
-        is_triggering = False 
-        global_action_detected = False
-
-        # -----------------------------------------------------------------
-        # [GLOBAL 1] RESET (열중쉬어) - 조건 강화됨
-        # -----------------------------------------------------------------
-        has_arms = (kpts_raw[9][2] > 0.6) and (kpts_raw[10][2] > 0.6)
-        has_hips = (kpts_raw[11][2] > 0.6) and (kpts_raw[12][2] > 0.6)
-        
-        if has_arms and has_hips:
-            # 1. 손목 위치 수정: 허리 위쪽으로 올려야 함 (Y값이 hip보다 작거나 비슷해야 함)
-            # 기존: abs(diff) < 0.2 (골반 아래 0.2까지 허용했음 -> 차렷과 겹침)
-            # 수정: l_wr[1] < l_hip[1] + 0.05 (골반보다 아주 살짝 아래까지만 허용, 그보다 위여야 함)
-            l_on_waist = (l_wr[1] < l_hip[1] + 0.05) and (l_wr[1] > l_sh[1] + 0.2)
-            r_on_waist = (r_wr[1] < r_hip[1] + 0.05) and (r_wr[1] > r_sh[1] + 0.2)
-            
-            # 2. 팔꿈치 벌림 유지
-            elbow_width = abs(l_el[0] - r_el[0])
-            is_elbows_out = elbow_width > shoulder_width * 1.2 
-            
-            # 3. 팔 굽힘 각도 강화: 150도 -> 140도 미만 (더 확실히 굽혀야 함)
-            # 차렷 자세는 보통 160~180도 나오므로 겹칠 일 없음
-            is_bent = (angle_l < 140) and (angle_r < 140)
-
-            if l_on_waist and r_on_waist and is_elbows_out and is_bent:
-                current_action = "RESET"
-                info_text = "HOLD 2s TO RESET"
-                bg_color = (255, 0, 0)
-                is_triggering = True
-                global_action_detected = True
-
-        # -----------------------------------------------------------------
-        # [GLOBAL 2] STOP (X자)
-        # -----------------------------------------------------------------
-        if not global_action_detected:
-            is_crossed = r_wr[0] > l_wr[0]
-            if is_crossed and (l_wr[1] < l_sh[1] + 0.4):
-                if self.stage == 2 or self.is_finished:
-                    current_action = "STOP"
-                    info_text = "EMERGENCY STOP"
-                    bg_color = (0, 0, 255)
-                    if self.stage == 2:
-                        is_triggering = True
-                        info_text = "HOLD TO STAGE 3..."
-                    global_action_detected = True
-
-        # -----------------------------------------------------------------
-        # [FINISHED] BYE BYE
-        # -----------------------------------------------------------------
-        if self.is_finished and not global_action_detected:
-            current_action = "BYE BYE"
-            info_text = "MISSION COMPLETE"
-            bg_color = (0, 255, 0)
-            is_triggering = False
-
-        # -----------------------------------------------------------------
-        # [STAGES]
-        # -----------------------------------------------------------------
-        if not self.is_finished and not global_action_detected:
-            # Stage 0: READY
-            if self.stage == 0:
-                is_arms_down = (l_wr[1] > l_sh[1] + 0.3) and (r_wr[1] > r_sh[1] + 0.3)
-                is_straight = (angle_l > 150) and (angle_r > 150)
-                is_narrow = wrist_dist_x < shoulder_width * 1.25
-                if is_arms_down and is_narrow and is_straight:
-                    is_triggering = True; current_action = "READY"; info_text = "HOLD TO START..."
-                else:
-                    current_action = "FACE_ME"; info_text = "STAGE 0: WAITING..."; bg_color = (100, 100, 100)
-
-            # Stage 1: MOVE
-            elif self.stage == 1:
-                l_diff = l_wr[1] - l_sh[1]; r_diff = r_wr[1] - r_sh[1]
-                is_fast = (l_diff > 0.25 and r_diff > 0.25) and (wrist_dist_x > shoulder_width * 1.4)
-                if is_fast:
-                    is_triggering = True; current_action = "APPROACHING"; info_text = "HOLD TO STAGE 2..."
-                elif abs(l_el[1]-l_sh[1])<0.2 and l_wr[1]<l_el[1] and angle_l<120 and angle_r<120: current_action = "FORWARD"
-                elif abs(l_el[1]-l_sh[1])<0.2 and l_wr[1]<l_el[1] and r_wr[1]>r_sh[1]+0.2: current_action = "TURN_LEFT"
-                elif abs(r_el[1]-r_sh[1])<0.2 and r_wr[1]<r_el[1] and l_wr[1]>l_sh[1]+0.2: current_action = "TURN_RIGHT"
-                else: current_action = "STAGE_1"; info_text = "FWD / LEFT / RIGHT"
-
-            # Stage 2: APPROACH & STOP
-            elif self.stage == 2:
-                # STOP은 Global에서 처리됨
-                l_diff = l_wr[1] - l_sh[1]; r_diff = r_wr[1] - r_sh[1]
-                if abs(l_diff)<0.25 and abs(r_diff)<0.25: current_action = "APPROACHING"; info_text = "SPEED: NORMAL"
-                elif angle_l>120 and angle_r>120 and l_wr[1]<l_sh[1]: current_action = "APPROACHING"; info_text = "SPEED: SLOW"
-                elif (l_diff>0.25 and r_diff>0.25) and (wrist_dist_x>shoulder_width*1.4): current_action = "APPROACHING"; info_text = "SPEED: FAST"
-                else: current_action = "STAGE_2"; info_text = "APPROACH ONLY"
-
-            # Stage 3: GRIPPER HOLD
-            elif self.stage == 3:
-                in_chest = (l_wr[1] > l_sh[1]) and (l_wr[1] < l_hip[1])
-                is_hold = in_chest and (wrist_dist_x < shoulder_width * 0.6)
-                if is_hold: is_triggering = True; current_action = "GRIPPER_HOLD"; info_text = "HOLD TO STAGE 4..."
-                else:
-                    if (l_wr[1]<l_sh[1] and r_wr[1]>r_sh[1]) or (r_wr[1]<r_sh[1] and l_wr[1]>l_sh[1]): current_action = "SET_BRAKES"
-                    else: current_action = "STAGE_3"; info_text = "BRAKES ONLY"
-
-            # Stage 4: GRIPPER RELEASE -> EXIT
-            elif self.stage == 4:
-                in_chest = (l_wr[1] > l_sh[1]) and (l_wr[1] < l_hip[1])
-                is_release = in_chest and (wrist_dist_x > shoulder_width * 0.8)
-                if is_release: is_triggering = True; current_action = "GRIPPER_RELEASE"; info_text = "HOLD TO FINISH..."
-                elif wrist_dist_x < shoulder_width * 0.6: current_action = "GRIPPER_HOLD"
-                else: current_action = "STAGE_4"; info_text = "OPEN ARMS TO FINISH"
-
-        # -----------------------------------------------------------------
-        # [TRIGGER LOGIC]
-        # -----------------------------------------------------------------
-        target_limit = self.LIMIT_RESET if current_action == "RESET" else self.LIMIT_NORMAL
-
-        if is_triggering:
-            if self.triggered_lock:
-                self.draw_loading_bar(frame, 1.0)
-            else:
-                self.trigger_counter += 1
-                progress = min(self.trigger_counter / target_limit, 1.0)
-                self.draw_loading_bar(frame, progress)
-                
-                if self.trigger_counter >= target_limit:
-                    self.triggered_lock = True
-                    
-                    if current_action == "RESET":
-                        self.stage = 0
-                        self.is_finished = False
-                    elif self.stage == 4 and current_action == "GRIPPER_RELEASE":
-                        self.is_finished = True
-                    else:
-                        if not self.is_finished:
-                            self.stage += 1
-        else:
-            self.trigger_counter = 0
-            self.triggered_lock = False
+        if persons is None:
+            # 사람을 놓치면 유지 시간은 처음부터 (잠금은 유지)
+            self.selected_box = None
+            self.selected_kpts = None
+            self.history.reset()
+            self.history_idx = None
+            self.state = release_hold(self.state)
+            self.draw_status(frame, "NO HUMAN", "", COLOR_IDLE)
+            return "IDLE", frame
+
+        t_logic = prof.clock()
+        kpts_all, boxes = persons
+        feats = pose_features(kpts_all, w, h)
+        idx = self.select_person(boxes, w, h)
+        kpts_raw = kpts_all[idx]
+        self.selected_kpts = kpts_raw
+
+        # 새 추론 결과일 때만 이력에 추가 (재사용/stride 로 같은 키포인트가 반복되면 속도 0 으로 보이므로)
+        if self.keypoints_idx != self.history_idx:
+            self.history.push(kpts_raw, self.keypoints_ts)
+            self.history_idx = self.keypoints_idx
+        motion = self.history.features(self.keypoints_ts)
+
+        # 선택된 사람만 규칙 판단 (gesture_rules.step: 동작 + 유지 시간 + 스테이지 전환)
+        decision = step(pose_view(feats, idx, motion), self.state, timestamp, self.HOLD_NORMAL_S, self.HOLD_RESET_S)
+        self.state = decision.state
+        prof.record_since("gesture.logic", t_logic)
 
-        self.draw_custom_skeleton(frame, kpts_raw)
-        self.draw_status(frame, current_action, info_text, bg_color)
+        if decision.progress is not None:
+            self.draw_loading_bar(frame, decision.progress)
+        with prof.stage("gesture.draw"):
+            self.draw_custom_skeleton(frame, kpts_raw)
+            self.draw_status(frame, decision.action, decision.info, decision.color)
         
-        return current_action, frame
\ No newline at end of file
+        return decision.action, frame
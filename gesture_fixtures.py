@@ -0,0 +1,147 @@
+import math
+import numpy as np
+
+# =========================================================
+# 합성 자세 (gesture_rules 확인 / 벤치마크용)
+# - 정면을 보고 선 한 사람의 COCO 17 키포인트, 프레임 정규화 좌표로 정의 후 픽셀로 변환
+# - 왼쪽 = 사람 기준 왼쪽 (화면에서는 오른쪽, x 가 큼), 오른팔은 왼팔 모양을 좌우 반전
+# =========================================================
+
+BODY = {
+    0: (0.50, 0.22),                    # 코
+    1: (0.51, 0.20), 2: (0.49, 0.20),   # 눈
+    3: (0.53, 0.21), 4: (0.47, 0.21),   # 귀
+    5: (0.60, 0.35), 6: (0.40, 0.35),   # 어깨
+    11: (0.57, 0.62), 12: (0.43, 0.62), # 골반
+    13: (0.57, 0.78), 14: (0.43, 0.78), # 무릎
+    15: (0.57, 0.95), 16: (0.43, 0.95), # 발목
+}
+
+# 왼팔 모양: (팔꿈치, 손목)
+ARMS = {
+    "down":        ((0.61, 0.52), (0.615, 0.69)),  # 차렷 (곧게 내림)
+    "waist":       ((0.74, 0.48), (0.60, 0.60)),   # 허리에 손 (팔꿈치 벌림)
+    "goalpost":    ((0.76, 0.36), (0.76, 0.18)),   # 팔꿈치 어깨 높이, 손목 위로
+    "up":          ((0.62, 0.20), (0.63, 0.05)),   # 곧게 위로
+    "level":       ((0.75, 0.35), (0.90, 0.33)),   # 옆으로 수평 (손목은 어깨보다 살짝 위: 가슴 높이 판정 경계에서 떨어지게)
+    "low_wide":    ((0.70, 0.50), (0.80, 0.66)),   # 아래로 넓게
+    "cross":       ((0.66, 0.50), (0.45, 0.40)),   # 가슴 앞 교차 (X)
+    "chest_close": ((0.68, 0.52), (0.53, 0.50)),   # 가슴 앞 모음
+    "chest_open":  ((0.72, 0.50), (0.78, 0.48)),   # 가슴 높이 벌림
+}
+
+# 자세 이름 -> (왼팔, 오른팔)
+POSES = {
+    "READY": ("down", "down"),
+    "RESET": ("waist", "waist"),
+    "STOP_X": ("cross", "cross"),
+    "FORWARD": ("goalpost", "goalpost"),
+    "TURN_LEFT": ("goalpost", "down"),
+    "TURN_RIGHT": ("down", "goalpost"),
+    "FAST_WAVE": ("low_wide", "low_wide"),
+    "ARMS_LEVEL": ("level", "level"),
+    "ARMS_UP": ("up", "up"),
+    "GRIP_HOLD": ("chest_close", "chest_close"),
+    "GRIP_RELEASE": ("chest_open", "chest_open"),
+    "ONE_ARM_UP": ("up", "down"),
+}
+
+# (자세, 스테이지 키, 기대 동작, 기대 info 또는 None)
+EXPECTED = [
+    ("READY", 0, "READY", None),
+    ("ARMS_LEVEL", 0, "FACE_ME", None),
+    ("RESET", 0, "RESET", None),
+    ("RESET", 3, "RESET", None),
+    ("RESET", "finished", "RESET", None),
+    ("FAST_WAVE", 1, "APPROACHING", "HOLD TO STAGE 2..."),
+    ("FORWARD", 1, "FORWARD", ""),
+    ("TURN_LEFT", 1, "TURN_LEFT", None),
+    ("TURN_RIGHT", 1, "TURN_RIGHT", None),
+    ("READY", 1, "STAGE_1", None),
+    ("ARMS_LEVEL", 2, "APPROACHING", "SPEED: NORMAL"),
+    ("ARMS_UP", 2, "APPROACHING", "SPEED: SLOW"),
+    ("FAST_WAVE", 2, "APPROACHING", "SPEED: FAST"),
+    ("STOP_X", 2, "STOP", "HOLD TO STAGE 3..."),
+    ("READY", 2, "STAGE_2", None),
+    ("GRIP_HOLD", 3, "GRIPPER_HOLD", "HOLD TO STAGE 4..."),
+    ("ONE_ARM_UP", 3, "SET_BRAKES", None),
+    ("ARMS_LEVEL", 3, "STAGE_3", None),
+    ("GRIP_RELEASE", 4, "GRIPPER_RELEASE", None),
+    ("GRIP_HOLD", 4, "GRIPPER_HOLD", ""),
+    ("ARMS_LEVEL", 4, "STAGE_4", None),
+    ("STOP_X", "finished", "STOP", "EMERGENCY STOP"),
+    ("READY", "finished", "BYE BYE", None),
+]
+
+# 전체 임무: (자세, 유지 초), 트리거 사이에는 중립 자세로 잠금 해제
+NEUTRAL = "ARMS_LEVEL"
+MISSION = [("READY", 1.3), (NEUTRAL, 0.3), ("FAST_WAVE", 1.3), (NEUTRAL, 0.3), ("STOP_X", 1.3), (NEUTRAL, 0.3),
+           ("GRIP_HOLD", 1.3), (NEUTRAL, 0.3), ("GRIP_RELEASE", 1.3), (NEUTRAL, 0.3), ("RESET", 2.3)]
+MISSION_TRANSITIONS = ["next", "next", "next", "next", "finish", "reset"]
+
+def mirror(pt):
+    return (1.0 - pt[0], pt[1])
+
+def pose_points(left, right):
+    # 왼팔/오른팔 모양 -> 정규화 좌표 (17, 2)
+    pts = np.zeros((17, 2), dtype=np.float32)
+    for i, xy in BODY.items():
+        pts[i] = xy
+    pts[7], pts[9] = left if isinstance(left[0], tuple) else ARMS[left]
+    r_el, r_wr = right if isinstance(right[0], tuple) else ARMS[right]
+    pts[8], pts[10] = mirror(r_el), mirror(r_wr)
+    return pts
+
+def to_pixels(pts, w, h, conf=0.9, jitter=0.0, rng=None):
+    # 정규화 좌표 -> 픽셀 키포인트 (17, 3), jitter: 가우시안 노이즈 표준편차 (픽셀)
+    kpts = np.empty((17, 3), dtype=np.float32)
+    kpts[:, 0] = pts[:, 0] * w
+    kpts[:, 1] = pts[:, 1] * h
+    kpts[:, 2] = conf
+    if jitter > 0:
+        rng = rng or np.random.default_rng()
+        kpts[:, :2] += rng.normal(0.0, jitter, (17, 2))
+    return kpts
+
+def pose(name, w=640, h=480, conf=0.9, jitter=0.0, rng=None):
+    return to_pixels(pose_points(*POSES[name]), w, h, conf, jitter, rng)
+
+def sequence(frames_fn, fps=15.0, secs=3.0, t0=0.0):
+    # frames_fn(t) -> (17, 3) 또는 None, 결과: gesture_rules.classify_sequence 입력 [(ts, kpts, kpts_ts)]
+    n = int(round(fps * secs))
+    return [(t0 + i / fps, frames_fn(i / fps), t0 + i / fps) for i in range(n)]
+
+def wave_sequence(fps=15.0, secs=3.0, freq=1.5, amp=0.12, w=640, h=480, jitter=0.0, rng=None):
+    # 감속 신호: 팔을 내린 채 왼손을 위아래로 흔듦
+    el, wr = ARMS["down"]
+    def frame(t):
+        y = wr[1] - amp / 2 + amp / 2 * math.sin(2 * math.pi * freq * t)
+        return to_pixels(pose_points((el, (wr[0], y)), "down"), w, h, jitter=jitter, rng=rng)
+    return sequence(frame, fps, secs)
+
+def beckon_sequence(fps=15.0, secs=3.0, freq=1.2, swing=30.0, w=640, h=480, jitter=0.0, rng=None):
+    # 이리 와: 왼팔 goalpost 에서 팔꿈치를 축으로 아래팔을 앞뒤로 (수직 기준 20 +- swing 도)
+    el, wr = ARMS["goalpost"]
+    length = el[1] - wr[1]
+    def frame(t):
+        th = math.radians(20.0 + swing * math.sin(2 * math.pi * freq * t))
+        # 화면 비율을 고려해 픽셀 기준 길이 유지
+        x = el[0] + length * math.sin(th) * h / w
+        y = el[1] - length * math.cos(th)
+        return to_pixels(pose_points((el, (x, y)), "down"), w, h, jitter=jitter, rng=rng)
+    return sequence(frame, fps, secs)
+
+def script_sequence(script, fps=15.0, w=640, h=480, jitter=0.0, rng=None):
+    # [(자세 이름 또는 None(사람 없음), 유지 초)] -> 이어 붙인 시퀀스
+    rng = rng or np.random.default_rng()
+    out = []
+    t0 = 0.0
+    for name, secs in script:
+        kpts = None if name is None else pose(name, w, h)
+        def frame(t, kpts=kpts):
+            if kpts is None or jitter <= 0:
+                return kpts
+            return kpts + np.concatenate([rng.normal(0.0, jitter, (17, 2)), np.zeros((17, 1))], axis=1).astype(np.float32)
+        out += sequence(frame, fps, secs, t0)
+        t0 = out[-1][0] + 1.0 / fps
+    return out
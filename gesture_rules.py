@@ -0,0 +1,477 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from collections import namedtuple, Counter
+from keypoint_history import KeypointHistory
+
+# =========================================================
+# 제스처 규칙 (모델/화면과 무관한 순수 함수)
+# - MarshallerAI 는 키포인트만 넘기고 결과(동작/상태 전환)를 받아 그림
+#   -> 녹화 키포인트 일괄 분류 / 합성 자세 확인 / 처리량 측정을 모델 없이 실행
+# - 각 규칙: 조건 함수(PoseView -> bool) 가 참이면 그 동작
+# - trigger=True 인 동작은 HOLD 시간 동안 유지하면 then 으로 상태 전환
+#   next: 다음 스테이지 / reset: 스테이지 0 / finish: 완료
+# - 평가 순서: GLOBAL_RULES (해당 scope 만) -> 현재 스테이지 규칙 -> 스테이지 기본값
+# 좌표는 프레임 정규화 좌표 (x / w, y / h), y 는 아래가 +
+# 동작(움직임) 제스처는 p.motion (keypoint_history.MotionFeatures, 최근 WINDOW 초) 으로 판단
+# =========================================================
+
+Rule = namedtuple("Rule", ["action", "cond", "info", "trigger", "then", "color", "long_hold"],
+                  defaults=("", False, None, None, False))
+
+COLOR_DEFAULT = (245, 117, 16)
+COLOR_IDLE = (100, 100, 100)
+COLOR_RESET = (255, 0, 0)
+COLOR_STOP = (0, 0, 255)
+COLOR_DONE = (0, 255, 0)
+
+class PoseView:
+    # 선택된 한 사람의 규칙 판단용 값 (파이썬 스칼라)
+    __slots__ = ("l_sh", "r_sh", "l_el", "r_el", "l_wr", "r_wr", "l_hip", "r_hip", "conf",
+                 "angle_l", "angle_r", "wrist_dist_x", "shoulder_width", "elbow_width", "motion")
+
+    def __init__(self, pts, conf, angle_l, angle_r, wrist_dist_x, shoulder_width, elbow_width, motion=None):
+        self.l_sh, self.r_sh = pts[5], pts[6]
+        self.l_el, self.r_el = pts[7], pts[8]
+        self.l_wr, self.r_wr = pts[9], pts[10]
+        self.l_hip, self.r_hip = pts[11], pts[12]
+        self.conf = conf
+        self.angle_l, self.angle_r = angle_l, angle_r
+        self.wrist_dist_x = wrist_dist_x
+        self.shoulder_width = shoulder_width
+        self.elbow_width = elbow_width
+        self.motion = motion
+
+def is_reset_pose(p):
+    # RESET (열중쉬어) - 조건 강화됨
+    has_arms = (p.conf[9] > 0.6) and (p.conf[10] > 0.6)
+    has_hips = (p.conf[11] > 0.6) and (p.conf[12] > 0.6)
+    if not (has_arms and has_hips):
+        return False
+    # 1. 손목 위치 수정: 허리 위쪽으로 올려야 함 (Y값이 hip보다 작거나 비슷해야 함)
+    # 기존: abs(diff) < 0.2 (골반 아래 0.2까지 허용했음 -> 차렷과 겹침)
+    # 수정: l_wr[1] < l_hip[1] + 0.05 (골반보다 아주 살짝 아래까지만 허용, 그보다 위여야 함)
+    l_on_waist = (p.l_wr[1] < p.l_hip[1] + 0.05) and (p.l_wr[1] > p.l_sh[1] + 0.2)
+    r_on_waist = (p.r_wr[1] < p.r_hip[1] + 0.05) and (p.r_wr[1] > p.r_sh[1] + 0.2)
+    # 2. 팔꿈치 벌림 유지
+    is_elbows_out = p.elbow_width > p.shoulder_width * 1.2
+    # 3. 팔 굽힘 각도 강화: 150도 -> 140도 미만 (더 확실히 굽혀야 함)
+    # 차렷 자세는 보통 160~180도 나오므로 겹칠 일 없음
+    is_bent = (p.angle_l < 140) and (p.angle_r < 140)
+    return l_on_waist and r_on_waist and is_elbows_out and is_bent
+
+def is_stop_x(p):
+    # X자: 손목 교차 + 가슴 높이 이상
+    return p.r_wr[0] > p.l_wr[0] and p.l_wr[1] < p.l_sh[1] + 0.4
+
+def is_ready_pose(p):
+    is_arms_down = (p.l_wr[1] > p.l_sh[1] + 0.3) and (p.r_wr[1] > p.r_sh[1] + 0.3)
+    is_straight = (p.angle_l > 150) and (p.angle_r > 150)
+    is_narrow = p.wrist_dist_x < p.shoulder_width * 1.25
+    return is_arms_down and is_narrow and is_straight
+
+def is_fast_wave(p):
+    l_diff = p.l_wr[1] - p.l_sh[1]; r_diff = p.r_wr[1] - p.r_sh[1]
+    return (l_diff > 0.25 and r_diff > 0.25) and (p.wrist_dist_x > p.shoulder_width * 1.4)
+
+def is_forward(p):
+    return abs(p.l_el[1] - p.l_sh[1]) < 0.2 and p.l_wr[1] < p.l_el[1] and p.angle_l < 120 and p.angle_r < 120
+
+def is_turn_left(p):
+    return abs(p.l_el[1] - p.l_sh[1]) < 0.2 and p.l_wr[1] < p.l_el[1] and p.r_wr[1] > p.r_sh[1] + 0.2
+
+def is_turn_right(p):
+    return abs(p.r_el[1] - p.r_sh[1]) < 0.2 and p.r_wr[1] < p.r_el[1] and p.l_wr[1] > p.l_sh[1] + 0.2
+
+def is_arms_level(p):
+    return abs(p.l_wr[1] - p.l_sh[1]) < 0.25 and abs(p.r_wr[1] - p.r_sh[1]) < 0.25
+
+def is_arms_up_straight(p):
+    return p.angle_l > 120 and p.angle_r > 120 and p.l_wr[1] < p.l_sh[1]
+
+def in_chest(p):
+    return (p.l_wr[1] > p.l_sh[1]) and (p.l_wr[1] < p.l_hip[1])
+
+def is_grip_hold(p):
+    return in_chest(p) and p.wrist_dist_x < p.shoulder_width * 0.6
+
+def is_grip_release(p):
+    return in_chest(p) and p.wrist_dist_x > p.shoulder_width * 0.8
+
+def is_one_arm_up(p):
+    return (p.l_wr[1] < p.l_sh[1] and p.r_wr[1] > p.r_sh[1]) or (p.r_wr[1] < p.r_sh[1] and p.l_wr[1] > p.l_sh[1])
+
+def is_hands_together(p):
+    return p.wrist_dist_x < p.shoulder_width * 0.6
+
+# 움직임 제스처 기준
+MOTION_FREQ_RANGE = (0.7, 4.0)  # Hz, 사람이 흔드는 빠르기 (이보다 빠르면 키포인트 떨림)
+MOTION_MIN_SPAN = 0.6           # 초, 창에 이만큼 쌓여야 판단
+SLOW_WAVE_MIN_SPEED = 0.8       # 어깨 너비/초, 손목 상하 평균 속도
+BECKON_MIN_SPEED = 60.0         # 도/초, 팔꿈치 굽혔다 폈다 평균 속도
+
+def oscillating(m, ch, min_speed):
+    return (m is not None and m.span >= MOTION_MIN_SPAN and m.speed[ch] > min_speed
+            and MOTION_FREQ_RANGE[0] <= m.freq[ch] <= MOTION_FREQ_RANGE[1])
+
+def is_slow_wave(p):
+    # 감속: 팔을 내린 채 손을 위아래로 흔듦 (한 팔이라도)
+    m = p.motion
+    return ((oscillating(m, 2, SLOW_WAVE_MIN_SPEED) and p.l_wr[1] > p.l_sh[1]) or
+            (oscillating(m, 3, SLOW_WAVE_MIN_SPEED) and p.r_wr[1] > p.r_sh[1]))
+
+def is_beckon(p):
+    # 이리 와: 손을 들고 (손목이 팔꿈치 위) 팔꿈치를 굽혔다 폈다 반복
+    m = p.motion
+    return ((oscillating(m, 4, BECKON_MIN_SPEED) and p.l_wr[1] < p.l_el[1]) or
+            (oscillating(m, 5, BECKON_MIN_SPEED) and p.r_wr[1] < p.r_el[1]))
+
+# (적용 scope, 규칙): scope None = 항상, 그 외 스테이지 키 목록
+GLOBAL_RULES = [
+    (None, Rule("RESET", is_reset_pose, "HOLD 2s TO RESET", trigger=True, then="reset", color=COLOR_RESET, long_hold=True)),
+    ((2,), Rule("STOP", is_stop_x, "HOLD TO STAGE 3...", trigger=True, then="next", color=COLOR_STOP)),
+    (("finished",), Rule("STOP", is_stop_x, "EMERGENCY STOP", color=COLOR_STOP)),
+]
+
+# 스테이지 키 -> ([규칙 ...], 아무 규칙도 안 맞을 때 기본값)
+STAGE_TABLE = {
+    # Stage 0: READY
+    0: ([Rule("READY", is_ready_pose, "HOLD TO START...", trigger=True, then="next")],
+        Rule("FACE_ME", None, "STAGE 0: WAITING...", color=COLOR_IDLE)),
+    # Stage 1: MOVE
+    1: ([Rule("APPROACHING", is_fast_wave, "HOLD TO STAGE 2...", trigger=True, then="next"),
+         Rule("FORWARD", is_beckon, "BECKON: COME FORWARD"),
+         Rule("FORWARD", is_forward),
+         Rule("TURN_LEFT", is_turn_left),
+         Rule("TURN_RIGHT", is_turn_right)],
+        Rule("STAGE_1", None, "FWD / LEFT / RIGHT")),
+    # Stage 2: APPROACH & STOP (STOP 은 GLOBAL_RULES)
+    2: ([Rule("APPROACHING", is_slow_wave, "SPEED: SLOW (WAVE)"),
+         Rule("APPROACHING", is_arms_level, "SPEED: NORMAL"),
+         Rule("APPROACHING", is_arms_up_straight, "SPEED: SLOW"),
+         Rule("APPROACHING", is_fast_wave, "SPEED: FAST")],
+        Rule("STAGE_2", None, "APPROACH ONLY")),
+    # Stage 3: GRIPPER HOLD
+    3: ([Rule("GRIPPER_HOLD", is_grip_hold, "HOLD TO STAGE 4...", trigger=True, then="next"),
+         Rule("SET_BRAKES", is_one_arm_up)],
+        Rule("STAGE_3", None, "BRAKES ONLY")),
+    # Stage 4: GRIPPER RELEASE -> EXIT
+    4: ([Rule("GRIPPER_RELEASE", is_grip_release, "HOLD TO FINISH...", trigger=True, then="finish"),
+         Rule("GRIPPER_HOLD", is_hands_together)],
+        Rule("STAGE_4", None, "OPEN ARMS TO FINISH")),
+    # 완료: BYE BYE
+    "finished": ([], Rule("BYE BYE", None, "MISSION COMPLETE", color=COLOR_DONE)),
+}
+
+def match_rule(p, stage_key):
+    for scope, rule in GLOBAL_RULES:
+        if (scope is None or stage_key in scope) and rule.cond(p):
+            return rule
+    rules, default = STAGE_TABLE[stage_key]
+    for rule in rules:
+        if rule.cond(p):
+            return rule
+    return default
+
+# =========================================================
+# 상태 전환 (불변 상태 -> 새 상태)
+# =========================================================
+
+# stage: 현재 스테이지 / is_finished: 완료 여부
+# hold_start: 트리거 동작을 시작한 캡처 시각 (None: 유지 중 아님) / hold_time: 현재 유지 시간 (초)
+# triggered_lock: 이번 유지로 이미 전환했는지 (동작을 풀어야 다시 전환)
+GestureState = namedtuple("GestureState", ["stage", "is_finished", "hold_start", "hold_time", "triggered_lock"],
+                          defaults=(0, False, None, 0.0, False))
+
+# action/info/color: 표시할 동작, rule: 맞은 규칙 (사람 없으면 None)
+# progress: 트리거 유지 진행률 0~1 (트리거 동작이 아니면 None), transition: 이번에 일어난 전환 (then 값 또는 None)
+Decision = namedtuple("Decision", ["action", "info", "color", "rule", "progress", "transition", "state"])
+
+HOLD_NORMAL_S = 1.0     # 일반 동작
+HOLD_RESET_S = 2.0      # 리셋 동작
+
+def apply_transition(state, then):
+    if then == "reset":
+        return state._replace(stage=0, is_finished=False)
+    if then == "finish":
+        return state._replace(is_finished=True)
+    if then == "next" and not state.is_finished:
+        return state._replace(stage=state.stage + 1)
+    return state
+
+def release_hold(state):
+    # 사람을 놓치면 유지 시간은 처음부터 (잠금은 유지)
+    if state.hold_start is None and state.hold_time == 0.0:
+        return state
+    return state._replace(hold_start=None, hold_time=0.0)
+
+def step(p, state, timestamp, hold_normal_s=HOLD_NORMAL_S, hold_reset_s=HOLD_RESET_S):
+    # 한 프레임 판단: PoseView + 이전 상태 + 캡처 시각 -> Decision (새 상태 포함, 입력 상태는 그대로)
+    rule = match_rule(p, "finished" if state.is_finished else state.stage)
+    progress = None
+    transition = None
+    if rule.trigger:
+        hold_start = timestamp if state.hold_start is None else state.hold_start
+        hold_time = timestamp - hold_start
+        locked = state.triggered_lock
+        if locked:
+            progress = 1.0
+        else:
+            hold_s = hold_reset_s if rule.long_hold else hold_normal_s
+            progress = min(hold_time / hold_s, 1.0)
+            if hold_time >= hold_s:
+                locked = True
+                transition = rule.then
+        state = state._replace(hold_start=hold_start, hold_time=hold_time, triggered_lock=locked)
+        if transition is not None:
+            state = apply_transition(state, transition)
+    elif state.hold_start is not None or state.triggered_lock:
+        state = state._replace(hold_start=None, hold_time=0.0, triggered_lock=False)
+    return Decision(rule.action, rule.info, rule.color or COLOR_DEFAULT, rule, progress, transition, state)
+
+def no_human(state):
+    return Decision("IDLE", "NO HUMAN", COLOR_IDLE, None, None, None, release_hold(state))
+
+# =========================================================
+# 키포인트 -> PoseView
+# =========================================================
+
+def joint_angles(a, b, c):
+    # a, b, c: (..., 2) 배열 -> b 꼭짓점 각도 (0~180도), 사람/프레임 수만큼 한 번에 계산
+    radians = np.arctan2(c[..., 1]-b[..., 1], c[..., 0]-b[..., 0]) - np.arctan2(a[..., 1]-b[..., 1], a[..., 0]-b[..., 0])
+    angle = np.abs(np.degrees(radians))
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+def pose_features(kpts_all, w, h):
+    # (N, 17, 3) 키포인트 (N: 한 프레임의 사람 수, 또는 녹화 시퀀스의 프레임 수) 를 한 번에 정규화하고 특징 계산
+    norm = kpts_all[:, :, :2] / np.array([w, h], dtype=np.float32)
+    sh, el, wr = norm[:, 5:7], norm[:, 7:9], norm[:, 9:11]  # [:, 0] = 왼쪽, [:, 1] = 오른쪽
+    angles = joint_angles(sh, el, wr)                        # (N, 2)
+    return {
+        "norm": norm,
+        "conf": kpts_all[:, :, 2],
+        "angle_l": angles[:, 0],
+        "angle_r": angles[:, 1],
+        "wrist_dist_x": np.abs(wr[:, 0, 0] - wr[:, 1, 0]),
+        "shoulder_width": np.abs(sh[:, 0, 0] - sh[:, 1, 0]),
+        "elbow_width": np.abs(el[:, 0, 0] - el[:, 1, 0]),
+    }
+
+def pose_view(feats, idx, motion=None):
+    # idx 번째 사람만 파이썬 스칼라로 꺼냄 (규칙 함수는 스칼라 비교가 numpy 인덱싱보다 훨씬 빠름)
+    return PoseView(feats["norm"][idx].tolist(), feats["conf"][idx].tolist(),
+                    float(feats["angle_l"][idx]), float(feats["angle_r"][idx]),
+                    float(feats["wrist_dist_x"][idx]), float(feats["shoulder_width"][idx]),
+                    float(feats["elbow_width"][idx]), motion)
+
+def pose_views(kpts_seq, w, h):
+    # (T, 17, 3) -> PoseView T 개 (특징은 한 번의 numpy 계산, 스칼라 변환도 배열 단위 tolist 한 번)
+    f = pose_features(np.asarray(kpts_seq, dtype=np.float32), w, h)
+    cols = [f[k].tolist() for k in ("norm", "conf", "angle_l", "angle_r", "wrist_dist_x", "shoulder_width", "elbow_width")]
+    return [PoseView(*row) for row in zip(*cols)]
+
+def classify(kpts, w, h, state, timestamp, motion=None):
+    # 한 사람 (17, 3) 픽셀 키포인트 (None 이면 사람 없음) -> Decision
+    if kpts is None:
+        return no_human(state)
+    feats = pose_features(np.asarray(kpts, dtype=np.float32)[None], w, h)
+    return step(pose_view(feats, 0, motion), state, timestamp)
+
+def classify_sequence(samples, w, h, state=None, history=None):
+    # samples: [(timestamp, kpts (17, 3) 또는 None, kpts_ts)] 시간 순
+    #   kpts_ts: 그 키포인트를 추론한 프레임의 캡처 시각 (None 이면 timestamp)
+    #   같은 kpts_ts 가 이어지면 (stride / 비동기 / 게이트 재사용) 움직임 이력에는 한 번만 추가 (실시간과 동일)
+    # history: KeypointHistory (None 이면 새로 만듦, False 면 움직임 제스처 없이)
+    # -> Decision 리스트
+    state = state or GestureState()
+    if history is None:
+        history = KeypointHistory()
+    # 사람이 있는 프레임만 모아서 특징 / 이력 채널을 한 번에 계산, j: 그 안에서의 순번
+    present = [s[1] for s in samples if s[1] is not None]
+    if present:
+        kpts_seq = np.stack(present).astype(np.float32)
+        views = pose_views(kpts_seq, w, h)
+        if history is not False:
+            norm, raw = KeypointHistory.prepare(kpts_seq)
+
+    out = []
+    last_key = None
+    j = -1
+    for ts, kpts, kpts_ts in samples:
+        if kpts is None:
+            if history is not False:
+                history.reset()
+            last_key = None
+            d = no_human(state)
+        else:
+            j += 1
+            p = views[j]
+            key = ts if kpts_ts is None else kpts_ts
+            if history is not False:
+                if key != last_key:
+                    history.push_prepared(norm[j], raw[j], key)
+                    last_key = key
+                p.motion = history.features(key)
+            d = step(p, state, ts)
+        state = d.state
+        out.append(d)
+    return out
+
+# =========================================================
+# 도구: check (합성 자세 확인) / bench (처리량) / batch (녹화 세션 오프라인 분류)
+# =========================================================
+
+def run_check():
+    import gesture_fixtures as fx
+    failed = 0
+    for name, stage_key, action, info in fx.EXPECTED:
+        state = GestureState(is_finished=True) if stage_key == "finished" else GestureState(stage=stage_key)
+        d = classify(fx.pose(name), 640, 480, state, 0.0)
+        ok = d.action == action and (info is None or d.info == info)
+        failed += not ok
+        if not ok:
+            print(f"FAIL {name} @ stage {stage_key}: {d.action} '{d.info}' (expected {action} '{info}')")
+
+    motion_cases = [("wave", fx.wave_sequence(), GestureState(stage=2), "SPEED: SLOW (WAVE)"),
+                    ("beckon", fx.beckon_sequence(), GestureState(stage=1), "BECKON: COME FORWARD")]
+    for name, seq, state, info in motion_cases:
+        # 창이 찰 때까지 (MOTION_MIN_SPAN) 는 정지 자세로 판단되므로 마지막 1초만
+        tail = classify_sequence(seq, 640, 480, state)[-15:]
+        hits = sum(d.info == info for d in tail)
+        ok = hits >= len(tail) * 0.9
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {hits}/{len(tail)} '{info}'")
+        # 같은 자세를 움직임 없이 유지하면 움직임 제스처가 나오면 안 됨
+        still = classify_sequence([(ts, seq[0][1], ts) for ts, _, _ in seq], 640, 480, state)
+        if any(d.info == info for d in still):
+            failed += 1
+            print(f"FAIL {name}: detected without motion")
+
+    seq = fx.script_sequence(fx.MISSION, jitter=1.0, rng=np.random.default_rng(0))
+    decisions = classify_sequence(seq, 640, 480)
+    transitions = [d.transition for d in decisions if d.transition]
+    ok = transitions == fx.MISSION_TRANSITIONS and decisions[-1].state.stage == 0
+    failed += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} mission: {transitions}")
+    print(f"{len(fx.EXPECTED)} poses, {len(motion_cases)} motions, 1 mission: {'all passed' if not failed else f'{failed} failed'}")
+    return failed == 0
+
+def run_bench(seconds=2.0, frames=20000, seed=0):
+    import gesture_fixtures as fx
+    rng = np.random.default_rng(seed)
+    names = list(fx.POSES)
+    kpts = np.stack([fx.pose(names[i % len(names)], jitter=2.0, rng=rng) for i in range(frames)])
+    stages = [0, 1, 2, 3, 4]
+
+    def timed(fn):
+        n = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            n += fn()
+        return n / (time.perf_counter() - t0)
+
+    # 1) 규칙 + 상태 전환만 (PoseView 미리 계산)
+    views = pose_views(kpts, 640, 480)
+    def rules_only():
+        state = GestureState()
+        for i, p in enumerate(views):
+            state = step(p, state._replace(stage=stages[i % 5]), i / 30.0).state
+        return len(views)
+
+    # 2) 키포인트 시퀀스 전체 (특징 계산 + 움직임 이력 + 규칙), batch 와 같은 경로
+    samples = [(i / 30.0, kpts[i], i / 30.0) for i in range(frames)]
+    def sequence_full():
+        classify_sequence(samples, 640, 480)
+        return frames
+
+    # 3) 한 프레임씩 classify (실시간 경로처럼 프레임마다 numpy 특징 계산)
+    def per_frame():
+        state = GestureState()
+        for i in range(2000):
+            state = classify(kpts[i], 640, 480, state, i / 30.0).state
+        return 2000
+
+    for name, fn in (("rules", rules_only), ("sequence", sequence_full), ("per-frame", per_frame)):
+        rate = timed(fn)
+        print(f"{name:>10}: {rate:>10,.0f} classifications/s ({rate * 60 / 1e6:.1f} M/min)")
+
+def session_frame_size(path, records):
+    # 기록에 frame_size 가 없는 (이전) 녹화는 첫 프레임 이미지 크기
+    for r in records:
+        size = (r.get("result") or {}).get("frame_size")
+        if size:
+            return tuple(size)
+    import cv2
+    for r in records:
+        if r.get("frame"):
+            img = cv2.imread(os.path.join(path, "frames", r["frame"]))
+            if img is not None:
+                return img.shape[1], img.shape[0]
+    return None
+
+def classify_session(path, size=None, use_motion=True):
+    # 녹화 세션의 MARSHAL 프레임 키포인트를 다시 분류 -> (기록, Decision) 리스트
+    from session_recorder import load_session
+    _, records = load_session(path)
+    records = [r for r in records if r["mode"] == "MARSHAL"]
+    size = size or session_frame_size(path, records)
+    if size is None:
+        raise ValueError(f"{path}: frame size unknown (use --size)")
+    samples = []
+    for r in records:
+        res = r["result"]
+        kpts = res.get("keypoints")
+        samples.append((r["ts"], None if kpts is None else np.asarray(kpts, dtype=np.float32), res.get("keypoints_ts")))
+    decisions = classify_sequence(samples, size[0], size[1], history=None if use_motion else False)
+    return list(zip(records, decisions))
+
+def run_batch(paths, out=None, size=None, use_motion=True):
+    f = open(out, "w") if out else None
+    try:
+        for path in paths:
+            t0 = time.perf_counter()
+            pairs = classify_session(path, size, use_motion)
+            elapsed = time.perf_counter() - t0
+            actions = Counter(d.action for _, d in pairs)
+            transitions = [(r["seq"], d.transition) for r, d in pairs if d.transition]
+            # 녹화 당시 동작과 비교 (모델 없이 규칙만 바꿨을 때의 회귀 확인)
+            same = sum(r["result"].get("action") == d.action for r, d in pairs)
+            print(f"{path}: {len(pairs)} frames in {elapsed * 1000:.0f} ms, same action as recorded {same}/{len(pairs)}")
+            print(f"  actions: {dict(actions.most_common())}")
+            print(f"  transitions: {transitions}")
+            if f is not None:
+                for r, d in pairs:
+                    f.write(json.dumps({"session": path, "seq": r["seq"], "ts": r["ts"], "action": d.action, "info": d.info,
+                                        "stage": d.state.stage, "is_finished": d.state.is_finished,
+                                        "progress": d.progress, "transition": d.transition,
+                                        "recorded_action": r["result"].get("action")}) + "\n")
+    finally:
+        if f is not None:
+            f.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture rule tools (no pose model)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check", help="합성 자세 / 움직임 / 전체 임무 시퀀스 확인")
+    p = sub.add_parser("bench", help="분류 처리량")
+    p.add_argument("--seconds", type=float, default=2.0, help="측정 구간마다 반복 시간")
+    p.add_argument("--frames", type=int, default=20000, help="합성 프레임 수")
+    p = sub.add_parser("batch", help="녹화 세션 키포인트 오프라인 분류")
+    p.add_argument("paths", nargs="+", help="session_recorder 녹화 폴더")
+    p.add_argument("--out", default=None, help="프레임별 결과 .jsonl")
+    p.add_argument("--size", default=None, help="프레임 크기 WxH (녹화에 없을 때)")
+    p.add_argument("--no-motion", action="store_true", help="움직임 제스처 끄기 (정지 자세 규칙만)")
+    args = parser.parse_args()
+
+    if args.cmd == "check":
+        raise SystemExit(0 if run_check() else 1)
+    elif args.cmd == "bench":
+        run_bench(args.seconds, args.frames)
+    elif args.cmd == "batch":
+        size = tuple(int(v) for v in args.size.lower().split("x")) if args.size else None
+        run_batch(args.paths, args.out, size, not args.no_motion)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import numpy as np
+
+# 채널: 손목 x/y (왼/오), 팔꿈치 각도 (왼/오)
+CHANNELS = ("l_wr_x", "r_wr_x", "l_wr_y", "r_wr_y", "angle_l", "angle_r")
+KPT_L_SH, KPT_R_SH, KPT_L_EL, KPT_R_EL, KPT_L_WR, KPT_R_WR = 5, 6, 7, 8, 9, 10
+
+class MotionFeatures:
+    # 창(window) 안의 움직임 요약, 위치는 몸 기준 (어깨 중심 원점, 어깨 너비 단위, y 아래 +), 각도는 도
+    __slots__ = ("span", "samples", "value", "velocity", "speed", "freq")
+
+    def __init__(self, span, samples, value, velocity, speed, freq):
+        self.span = span          # 창에 든 샘플의 시간 폭 (초)
+        self.samples = samples
+        self.value = value        # (6,) 채널별 스무딩 값 (손목 위치 / 팔꿈치 각도)
+        self.velocity = velocity  # (6,) 최근 속도 (초당)
+        self.speed = speed        # (6,) 창 평균 |속도|
+        self.freq = freq          # (6,) 창 안 진동 주파수 (Hz, 속도 부호가 바뀐 횟수 / 2 / 시간)
+
+class KeypointHistory:
+    # 선택된 사람 키포인트의 고정 크기 링 버퍼 + 시간 창 특징
+    # - push 할 때마다 새 샘플 값만 더하고, 창에서 빠지는 샘플 값만 빼서 누적 합 갱신
+    #   -> 프레임당 비용이 창 길이와 무관하게 일정 (창 전체를 다시 훑지 않음)
+    # - 속도는 EMA 스무딩한 신호의 차분, 부호 전환은 데드밴드 이상 속도일 때만 셈 (떨림 무시)
+    def __init__(self, capacity=64, window=1.5, smooth=0.5, deadband=(0.3, 0.3, 0.3, 0.3, 45.0, 45.0), max_gap=0.5):
+        self.WINDOW = window                # 특징 계산 시간 창 (초)
+        self.SMOOTH = smooth                # EMA 계수 (새 샘플 비중)
+        self.DEADBAND = np.asarray(deadband, dtype=np.float64)  # 채널별 최소 속도 (어깨 너비/초, 도/초)
+        self.MAX_GAP = max_gap              # 샘플 간격이 이보다 길면 (사람 놓침 등) 처음부터
+
+        self.capacity = capacity
+        self.kpts = np.zeros((capacity, 17, 3), dtype=np.float32)  # 몸 기준 정규화 키포인트
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.stats = np.zeros((capacity, 2 * len(CHANNELS)), dtype=np.float64)  # 샘플별 [|속도| 6, 부호 전환 6]
+        self.reset()
+
+    def reset(self):
+        self.head = 0     # 다음에 쓸 위치
+        self.count = 0
+        self.sum_stats = np.zeros(2 * len(CHANNELS))
+        self.value = None
+        self.velocity = np.zeros(len(CHANNELS))
+        self.last_sign = np.zeros(len(CHANNELS))
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def normalize(kpts):
+        # 프레임 좌표 (..., 17, 3) -> 어깨 중심 원점, 어깨 너비 단위 (사람이 다가와도 크기 일정)
+        pts = np.asarray(kpts, dtype=np.float32)
+        center = (pts[..., KPT_L_SH, :2] + pts[..., KPT_R_SH, :2]) / 2
+        scale = np.maximum(np.linalg.norm(pts[..., KPT_L_SH, :2] - pts[..., KPT_R_SH, :2], axis=-1), 1e-3)
+        out = pts.copy()
+        out[..., :2] = (pts[..., :2] - center[..., None, :]) / scale[..., None, None]
+        return out
+
+    @staticmethod
+    def elbow_angles(n):
+        sh, el, wr = n[..., [KPT_L_SH, KPT_R_SH], :2], n[..., [KPT_L_EL, KPT_R_EL], :2], n[..., [KPT_L_WR, KPT_R_WR], :2]
+        a, c = sh - el, wr - el
+        ang = np.degrees(np.abs(np.arctan2(c[..., 1], c[..., 0]) - np.arctan2(a[..., 1], a[..., 0])))
+        return np.where(ang > 180.0, 360.0 - ang, ang)
+
+    @classmethod
+    def prepare(cls, kpts):
+        # 프레임 좌표 (..., 17, 3) -> (정규화 키포인트, 채널 값 (..., 6))
+        # 녹화 시퀀스는 (T, 17, 3) 을 한 번에 변환한 뒤 push_prepared 로 넣음 (프레임마다 numpy 호출 줄임)
+        n = cls.normalize(kpts)
+        raw = np.concatenate([n[..., [KPT_L_WR, KPT_R_WR], 0], n[..., [KPT_L_WR, KPT_R_WR], 1], cls.elbow_angles(n)], axis=-1)
+        return n, raw.astype(np.float64)
+
+    def oldest(self):
+        return (self.head - self.count) % self.capacity
+
+    def evict(self, now):
+        # 창 밖 (now - WINDOW 이전) 샘플 제거 (누적 합에서 빼기만)
+        while self.count and self.ts[self.oldest()] < now - self.WINDOW:
+            self.drop_oldest()
+
+    def drop_oldest(self):
+        self.sum_stats -= self.stats[self.oldest()]
+        self.count -= 1
+
+    def push(self, kpts, ts):
+        # kpts: 프레임 좌표 (17, 3) [x, y, conf], ts: 캡처 시각 (초)
+        n, raw = self.prepare(kpts)
+        self.push_prepared(n, raw, ts)
+
+    def push_prepared(self, n, raw, ts):
+        if self.count:
+            last = self.ts[(self.head - 1) % self.capacity]
+            if ts - last > self.MAX_GAP or ts < last:
+                self.reset()
+
+        if self.count == self.capacity:
+            self.drop_oldest()
+        i = self.head
+        k = len(CHANNELS)
+        stat = self.stats[i]
+        stat[:] = 0.0
+        if self.value is None:
+            self.value = raw.copy()
+        else:
+            dt = ts - self.ts[(i - 1) % self.capacity]
+            prev = self.value
+            self.value = prev + self.SMOOTH * (raw - prev)
+            if dt > 0:
+                v = (self.value - prev) / dt
+                self.velocity = v
+                speed = np.abs(v, out=stat[:k])
+                moving = speed > self.DEADBAND
+                sign = np.sign(v) * moving
+                # 부호 전환: 이번/직전 방향이 모두 있고 반대 (곱이 음수)
+                np.less(sign * self.last_sign, 0.0, out=stat[k:], casting="unsafe")
+                np.copyto(self.last_sign, sign, where=moving)
+
+        self.kpts[i] = n
+        self.ts[i] = ts
+        self.sum_stats += stat
+        self.head = (i + 1) % self.capacity
+        self.count += 1
+        self.evict(ts)
+
+    def features(self, now=None):
+        # 창 안 샘플 요약 (샘플이 2개 미만이면 None), now: 현재 시각 (새 샘플이 없어도 오래된 것은 제외)
+        if now is not None:
+            self.evict(now)
+        if self.count < 2:
+            return None
+        span = self.ts[(self.head - 1) % self.capacity] - self.ts[self.oldest()]
+        if span <= 0:
+            return None
+        k = len(CHANNELS)
+        return MotionFeatures(span, self.count, self.value, self.velocity,
+                              self.sum_stats[:k] / self.count, self.sum_stats[k:] / (2.0 * span))
+
+    def window(self):
+        # 창 안 (시간 순) 정규화 키포인트 / 시각 (디버그/기록용, 복사)
+        idx = (self.oldest() + np.arange(self.count)) % self.capacity
+        return self.kpts[idx], self.ts[idx]
@@ -1,68 +1,230 @@
-import cv2
 import time
+T_START = time.perf_counter()  # 기동 시간 측정 기준 (import 포함)
+import cv2
+import queue
+import multiprocessing as mp
 from gesture_ai import MarshallerAI
 from docking_ai import DockingAI
+from camera_stream import LatestFrameCapture
+from profiler import StageProfiler, NULL_PROFILER
+from command_channel import CommandPublisher, open_transport, STOP_COMMAND
+from frame_bus import FrameBus
+from session_recorder import SessionRecorder, ReplayCapture
+from telemetry_server import TelemetryServer
 
 # --- 설정 ---
 CAMERA_ID = 0  # Jetson 연결된 카메라 (CSI는 gstreamer 문자열 필요할 수 있음)
+CAMERA_READ_TIMEOUT = 1.0  # 새 프레임 대기 시간 (초)
+CAMERA_MAX_STALLS = 3      # 연속 대기 실패 허용 횟수, 넘으면 카메라 끊김으로 보고 종료
 STATE = "MARSHAL" # 초기 상태: MARSHAL or DOCKING
+HEADLESS = False  # True: 화면 출력/그리기 생략 (배포 유닛), 종료는 Ctrl+C
+SHOW_WINDOW = True         # cv2.imshow 창 (화면 없는 젯슨은 False + TELEMETRY_PORT 로 확인, 그리기는 HEADLESS 가 결정)
+TELEMETRY_PORT = None      # 예: 8080 -> http://<TELEMETRY_HOST>:8080/ 에서 영상(MJPEG) / 상태(WebSocket) 확인 (None 이면 끔)
+TELEMETRY_HOST = "127.0.0.1"  # 바인드 주소, 다른 장치(노트북)에서 보려면 "0.0.0.0" 등으로 명시
+TELEMETRY_TOKEN = None     # 모드 전환 명령 토큰 (None 이면 보기 전용), 브라우저는 http://...:8080/?token=<값>
+TELEMETRY_FPS = 10.0       # MJPEG 최대 fps (인코딩은 별도 스레드)
+GESTURE_ASYNC = True  # YOLO 포즈를 워커 스레드에서 실행 (화면/명령이 모델 속도에 묶이지 않음)
+GESTURE_STRIDE = 1    # N 프레임마다 1번 포즈 추론
+GESTURE_BACKEND = "torch"  # torch / onnx / onnx-int8 / openvino
+GESTURE_IMGSZ = 640        # 포즈 모델 입력 크기 (onnx/openvino 는 320, 256 권장)
+GESTURE_CROP = False       # 직전 마샬러 주변만 잘라 작은 입력으로 추론 (주기적으로 전체 프레임 재검출)
+GESTURE_CROP_IMGSZ = 256   # 크롭 추론 입력 크기
+CHANGE_GATE = False        # 장면이 정지해 있으면 검출/포즈 추론 생략하고 이전 결과 재사용 (최대 0.5초, 배터리 절약)
+PROFILE = False            # 구간별 지연 측정 (capture / gray / detect / pose / infer / display ...)
+PROFILE_HUD = True         # 측정 결과를 화면 좌상단에 표시 ('p' 키로 토글)
+PROFILE_LOG = "profile_stats.jsonl"  # 주기적으로 통계 기록 (None 이면 기록 안 함)
+PROFILE_LOG_INTERVAL = 5.0           # 초
+COMMAND_OUT = None         # 제어 명령 출력: "/dev/ttyUSB0", "serial:///dev/ttyTHS1?baud=115200", "udp://192.168.0.10:9000" (None 이면 출력 안 함)
+COMMAND_RATE_HZ = 20.0     # 명령 전송 주기 (비전 fps 와 무관)
+COMMAND_STALE_S = 0.3      # 이 시간 동안 새 명령이 없으면 STOP 전송 (워치독)
+CONCURRENT = False         # True: 마샬(YOLO) / 도킹(ArUco) 을 각각 별도 프로세스에서 매 프레임 동시 실행 (공유 메모리 프레임 버스)
+AUTO_DOCK = True           # CONCURRENT 모드: 타겟 마커가 AUTO_DOCK_FRAMES 번 연속 검출되면 MARSHAL -> DOCKING 자동 전환
+AUTO_DOCK_FRAMES = 3
+RECORD_DIR = None          # "recordings": 원본 프레임(JPEG) + 프레임별 결과 녹화 (CONCURRENT 모드 제외)
+RECORD_QUEUE = 64          # 디스크 기록 대기 프레임 최대 수 (넘으면 드롭, 비전 루프는 대기 안 함)
+RECORD_DROP = "oldest"     # oldest / newest
+RECORD_LOSSLESS = False    # True: PNG 로 저장 (재생 결과가 원본 처리와 완전히 같아야 할 때)
+REPLAY = None              # 녹화 폴더 경로: 카메라 대신 녹화 프레임을 1장씩 재생 (드롭 없음, 결정적)
+REPLAY_MODE = None         # None: 녹화 당시 모드 그대로 / "MARSHAL" / "DOCKING": 전부 한 파이프라인으로
+REPLAY_REALTIME = False    # True: 녹화 당시 간격대로 재생, False: 최대 속도
 
 def main():
-    global STATE
-    
-    # 1. 카메라 열기
-    cap = cv2.VideoCapture(CAMERA_ID)
+    t_imports = time.perf_counter() - T_START
+    prof = StageProfiler(export_path=PROFILE_LOG, export_interval=PROFILE_LOG_INTERVAL) if PROFILE else NULL_PROFILER
+
+    # 1. 포즈 모델은 백그라운드 스레드에서 로드/워밍업 시작 (카메라/도킹 준비와 동시에 진행)
+    # CONCURRENT 모드는 각 작업 프로세스에서 생성
+    # 재생은 결정적이어야 하므로 동기 추론 + 모델 준비 후 시작
+    concurrent = CONCURRENT and not REPLAY
+    marshal_ai = docking_ai = None
+    if not concurrent:
+        marshal_ai = MarshallerAI(async_infer=GESTURE_ASYNC and not REPLAY, infer_stride=GESTURE_STRIDE,
+                                  backend=GESTURE_BACKEND, imgsz=GESTURE_IMGSZ, profiler=prof, lazy_load=not REPLAY,
+                                  crop_tracking=GESTURE_CROP, crop_imgsz=GESTURE_CROP_IMGSZ, change_gate=CHANGE_GATE)
+
+    # 2. 카메라 열기 (해상도는 속도 향상을 위해 적절히 조절)
+    # 별도 스레드가 최신 프레임만 유지 -> 추론이 느려도 항상 가장 새 프레임 처리
+    t0 = time.perf_counter()
+    if REPLAY:
+        cap = ReplayCapture(REPLAY, realtime=REPLAY_REALTIME)
+    else:
+        cap = LatestFrameCapture(CAMERA_ID, width=640, height=480,
+                                 read_timeout=CAMERA_READ_TIMEOUT, max_stalls=CAMERA_MAX_STALLS)
+    t_camera = time.perf_counter() - t0
     if not cap.isOpened():
         print("Camera Open Failed!")
+        if marshal_ai is not None:
+            marshal_ai.close()
         return
-    
-    # 해상도 설정 (속도 향상을 위해 적절히 조절)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
-    # 2. AI 모듈 초기화
-    marshal_ai = MarshallerAI() # YOLO 로드 시간 소요됨
-    docking_ai = DockingAI()
+    # 3. 도킹 모듈 (가벼움)
+    t0 = time.perf_counter()
+    if not concurrent:
+        docking_ai = DockingAI(headless=HEADLESS, profiler=prof, change_gate=CHANGE_GATE)
+        if REPLAY:
+            docking_ai.LATENCY_COMP = False  # 외삽 구간이 처리 시간(벽시계)에 따라 달라짐
+    t_docking = time.perf_counter() - t0
+
+    # 4. 제어 명령 채널 (별도 스레드에서 고정 주기 전송)
+    publisher = None
+    if COMMAND_OUT:
+        publisher = CommandPublisher(open_transport(COMMAND_OUT), rate_hz=COMMAND_RATE_HZ, stale_timeout=COMMAND_STALE_S)
+
+    # 5. 세션 녹화 (백그라운드 스레드가 디스크 기록)
+    recorder = None
+    if RECORD_DIR and not concurrent:
+        recorder = SessionRecorder(RECORD_DIR, max_queue=RECORD_QUEUE, drop_policy=RECORD_DROP, lossless=RECORD_LOSSLESS,
+                                   meta={"source": REPLAY or CAMERA_ID, "backend": GESTURE_BACKEND, "imgsz": GESTURE_IMGSZ,
+                                         "stride": GESTURE_STRIDE, "crop": GESTURE_CROP, "change_gate": CHANGE_GATE, "headless": HEADLESS})
+        print(f"Recording to {recorder.path}")
+
+    # 6. 원격 모니터링 (MJPEG + WebSocket, 별도 스레드)
+    telemetry = None
+    if TELEMETRY_PORT:
+        telemetry = TelemetryServer(TELEMETRY_HOST, TELEMETRY_PORT, max_fps=TELEMETRY_FPS, token=TELEMETRY_TOKEN)
+        print(f"Telemetry on {telemetry.url()}" + ("" if TELEMETRY_TOKEN else " (view only)"))
+
+    # 포즈 모델 시간(import/load/warmup)은 준비되는 시점에 MarshallerAI 가 따로 출력
+    print(f"[Startup] imports {t_imports:.2f}s | camera {t_camera:.2f}s | docking {t_docking:.2f}s | "
+          f"ready {time.perf_counter() - T_START:.2f}s")
 
     print("=== System Started ===")
     print("Press 'm' for MARSHAL Mode")
     print("Press 'd' for DOCKING Mode")
+    print("Press 'p' to toggle profiler HUD")
     print("Press 'q' to Quit")
 
+    cap.start()
+    try:
+        if concurrent:
+            run_concurrent(cap, prof, publisher, telemetry)
+        else:
+            run_loop(cap, marshal_ai, docking_ai, prof, publisher, recorder, telemetry)
+    except KeyboardInterrupt:
+        pass
+
+    stats = cap.stats()
+    print(f"Frames captured: {stats['captured']}, dropped (stale): {stats['dropped']}")
+    if prof.enabled:
+        print(f"Profile: {prof.summary()}")
+    prof.close()
+    if publisher is not None:
+        print(f"Commands: {publisher.stats()}")
+        publisher.close()  # 마지막으로 STOP 전송
+    if recorder is not None:
+        recorder.close()  # 남은 큐 모두 기록
+        print(f"Recording: {recorder.stats()} -> {recorder.path}")
+    if telemetry is not None:
+        telemetry.close()
+    if marshal_ai is not None:
+        marshal_ai.close()
+    cap.release()
+    cv2.destroyAllWindows()
+
+def apply_telemetry_commands(telemetry):
+    # 원격 모드 전환 (키보드 'm' / 'd' 와 같음), 전환했으면 True
+    global STATE
+    changed = False
+    for kind, value in telemetry.poll_commands():
+        if kind == "mode" and value != STATE:
+            STATE = value
+            changed = True
+            print(f"Switched to {value} Mode (telemetry)")
+    return changed
+
+def run_loop(cap, marshal_ai, docking_ai, prof=NULL_PROFILER, publisher=None, recorder=None, telemetry=None):
+    global STATE
+    show_hud = PROFILE_HUD
+    first_frame = True
+
     while True:
-        ret, frame = cap.read()
+        with prof.stage("capture"):
+            ret, frame, frame_ts, frame_seq = cap.read()
         if not ret:
             break
+        if REPLAY:
+            STATE = REPLAY_MODE or cap.current["mode"]
+        # 파이프라인이 frame 위에 그리므로 녹화용 원본은 미리 복사
+        raw = frame.copy() if recorder is not None else None
 
         # --- 상태 머신 (State Machine) ---
         if STATE == "MARSHAL":
             # [모드 1] 제스처 인식
-            cmd, debug_frame = marshal_ai.detect_gesture(frame)
-            
-            # 여기서 cmd를 로봇 제어부(Serial/ROS)로 전송
-            # ex) serial.write(f"{cmd}\n".encode())
-            
+            with prof.stage("marshal"):
+                cmd, debug_frame = marshal_ai.detect_gesture(frame, frame_ts)
+
+            # 로봇 제어부로 전송 (최신 명령만 올려두고 바로 리턴, 전송은 publisher 스레드)
+            if publisher is not None:
+                publisher.publish(cmd, capture_ts=frame_ts)
+
             # 화면 표시
-            cv2.putText(debug_frame, "[MODE: MARSHAL]", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
-            cv2.imshow("TowCar AI View", debug_frame)
+            if not HEADLESS:
+                cv2.putText(debug_frame, "[MODE: MARSHAL]", (10, 30), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
 
         elif STATE == "DOCKING":
             # [모드 2] 도킹 (AprilTag)
-            data, debug_frame = docking_ai.process(frame)
-            
-            if data["found"]:
-                # P-Control 예시
-                # steering = Kp * data["error_x"]
-                # throttle = BaseSpeed if data["area"] < TARGET_AREA else 0
-                pass
-            
-            cv2.putText(debug_frame, "[MODE: DOCKING]", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-            cv2.imshow("TowCar AI View", debug_frame)
+            with prof.stage("docking"):
+                data, debug_frame = docking_ai.process(frame, frame_ts)
+
+            # 도킹 측정값 전송 (P 제어는 제어부에서: steering = Kp * x_cm ...), 타겟을 놓치면 정지
+            if publisher is not None:
+                if data["found"]:
+                    publisher.publish("DOCK", (data["dist_cm"], data["x_cm"], data["yaw"]), capture_ts=frame_ts)
+                else:
+                    publisher.publish(STOP_COMMAND, capture_ts=frame_ts)
+
+            if not HEADLESS:
+                cv2.putText(debug_frame, "[MODE: DOCKING]", (10, 30), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+        if recorder is not None or telemetry is not None:
+            result = marshal_ai.state_dict(cmd) if STATE == "MARSHAL" else data.as_dict()
+        if recorder is not None:
+            recorder.record(raw, frame_ts, frame_seq, STATE, result)
+
+        if first_frame:
+            print(f"[Startup] first frame processed at {time.perf_counter() - T_START:.2f}s")
+            first_frame = False
+
+        if show_hud and not HEADLESS:
+            prof.draw_hud(debug_frame)
+        if telemetry is not None:
+            with prof.stage("telemetry"):
+                telemetry.publish_frame(debug_frame)
+                telemetry.publish_state({"mode": STATE, "seq": frame_seq, "ts": frame_ts, "fps": prof.fps() if prof.enabled else None,
+                                         "result": result})
+                apply_telemetry_commands(telemetry)
 
         # --- 키 입력 처리 ---
-        key = cv2.waitKey(1) & 0xFF
+        if HEADLESS or not SHOW_WINDOW:
+            prof.tick()
+            continue
+        with prof.stage("display"):
+            cv2.imshow("TowCar AI View", debug_frame)
+            key = cv2.waitKey(1) & 0xFF
+        prof.tick()
+
         if key == ord('q'):
             break
         elif key == ord('m'):
@@ -71,9 +233,177 @@ def main():
         elif key == ord('d'):
             STATE = "DOCKING"
             print("Switched to DOCKING Mode")
+        elif key == ord('p'):
+            show_hud = not show_hud
 
-    cap.release()
-    cv2.destroyAllWindows()
+# =========================================================
+# CONCURRENT 모드: 캡처(이 프로세스) -> 공유 메모리 버스 -> 마샬/도킹 작업 프로세스
+# - 두 파이프라인이 매 프레임 각자 코어에서 동시에 실행, 결과는 큐로 모아서 병합
+# - 화면 표시용 디버그 프레임도 작업 프로세스별 출력 버스로 받음 (HEADLESS 면 생략)
+# =========================================================
+def marshal_worker(in_spec, out_spec, results, stop):
+    in_bus = FrameBus.attach(in_spec)
+    out_bus = FrameBus.attach(out_spec) if out_spec else None
+    # 프로세스 자체가 비동기이므로 포즈 워커 스레드는 쓰지 않음
+    marshal_ai = MarshallerAI(infer_stride=GESTURE_STRIDE, backend=GESTURE_BACKEND, imgsz=GESTURE_IMGSZ,
+                              crop_tracking=GESTURE_CROP, crop_imgsz=GESTURE_CROP_IMGSZ, change_gate=CHANGE_GATE)
+    seq = 0
+    try:
+        while not stop.is_set():
+            # detect_gesture 가 프레임 위에 그리므로 복사본으로 받음
+            ok, frame, ts, seq = in_bus.read(seq, timeout=0.5)
+            if not ok:
+                if in_bus.closed:
+                    break
+                continue
+            cmd, debug_frame = marshal_ai.detect_gesture(frame, ts)
+            try:
+                results.put_nowait({"src": "marshal", "seq": seq, "ts": ts, "cmd": cmd, "stage": marshal_ai.stage})
+            except queue.Full:
+                pass
+            if out_bus is not None:
+                out_bus.publish(debug_frame, ts)
+    finally:
+        marshal_ai.close()
+        in_bus.close()
+        if out_bus is not None:
+            out_bus.close()
+
+def docking_worker(in_spec, out_spec, results, stop):
+    in_bus = FrameBus.attach(in_spec)
+    out_bus = FrameBus.attach(out_spec) if out_spec else None
+    docking_ai = DockingAI(headless=out_bus is None, change_gate=CHANGE_GATE)
+    seq = 0
+    try:
+        while not stop.is_set():
+            # 항상 복사본: process 가 칼만/ROI/게이트 상태를 갱신하므로 처리 중에 덮어써질 수 있는 뷰는 쓰지 않음
+            ok, frame, ts, seq = in_bus.read(seq, timeout=0.5)
+            if not ok:
+                if in_bus.closed:
+                    break
+                continue
+            data, debug_frame = docking_ai.process(frame, ts)
+            result = data.as_dict()
+            result.update(src="docking", seq=seq, ts=ts)
+            try:
+                results.put_nowait(result)
+            except queue.Full:
+                pass
+            if out_bus is not None:
+                out_bus.publish(debug_frame, ts)
+    finally:
+        in_bus.close()
+        if out_bus is not None:
+            out_bus.close()
+
+def publish_result(publisher, state, r):
+    # 현재 모드의 파이프라인 결과만 명령으로 전송
+    if r["src"] == "marshal" and state == "MARSHAL":
+        publisher.publish(r["cmd"], capture_ts=r["ts"])
+    elif r["src"] == "docking" and state == "DOCKING":
+        if r["found"]:
+            publisher.publish("DOCK", (r["dist_cm"], r["x_cm"], r["yaw"]), capture_ts=r["ts"])
+        else:
+            publisher.publish(STOP_COMMAND, capture_ts=r["ts"])
+
+def run_concurrent(cap, prof=NULL_PROFILER, publisher=None, telemetry=None):
+    global STATE
+    show_hud = PROFILE_HUD
+
+    ret, frame, frame_ts, frame_seq = cap.read(timeout=5.0)
+    if not ret:
+        return
+
+    # spawn: 캡처 스레드가 도는 프로세스를 fork 하지 않음
+    ctx = mp.get_context("spawn")
+    in_bus = FrameBus(frame.shape, ctx=ctx)
+    out_buses = {} if HEADLESS else {"MARSHAL": FrameBus(frame.shape, ctx=ctx), "DOCKING": FrameBus(frame.shape, ctx=ctx)}
+    results = ctx.Queue(maxsize=64)
+    stop = ctx.Event()
+    procs = [
+        ctx.Process(target=marshal_worker, name="marshal", daemon=True,
+                    args=(in_bus.spec(), out_buses["MARSHAL"].spec() if out_buses else None, results, stop)),
+        ctx.Process(target=docking_worker, name="docking", daemon=True,
+                    args=(in_bus.spec(), out_buses["DOCKING"].spec() if out_buses else None, results, stop)),
+    ]
+    for p in procs:
+        p.start()
+
+    latest = {"marshal": None, "docking": None}
+    dock_hits = 0
+    shown_seq = {"MARSHAL": 0, "DOCKING": 0}
+    debug_frame = frame
+    try:
+        while True:
+            in_bus.publish(frame, frame_ts)
+
+            # --- 결과 병합 ---
+            while True:
+                try:
+                    r = results.get_nowait()
+                except queue.Empty:
+                    break
+                latest[r["src"]] = r
+                if r["src"] == "docking":
+                    # 예측 유지(coasting)가 아닌 실제 검출만 집계
+                    dock_hits = dock_hits + 1 if r["found"] and not r["coasting"] else 0
+                if AUTO_DOCK and STATE == "MARSHAL" and dock_hits >= AUTO_DOCK_FRAMES:
+                    STATE = "DOCKING"
+                    print("Target ID detected -> Switched to DOCKING Mode")
+                if publisher is not None:
+                    publish_result(publisher, STATE, r)
+
+            if not HEADLESS:
+                with prof.stage("display"):
+                    ok, out, _, seq = out_buses[STATE].read(shown_seq[STATE], timeout=0.0)
+                    if ok:
+                        debug_frame, shown_seq[STATE] = out, seq
+                    color = (255, 0, 0) if STATE == "MARSHAL" else (0, 255, 255)
+                    cv2.putText(debug_frame, f"[MODE: {STATE}] (concurrent)", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+                    if show_hud:
+                        prof.draw_hud(debug_frame)
+                    if telemetry is not None:
+                        telemetry.publish_frame(debug_frame)
+                    key = 0xFF
+                    if SHOW_WINDOW:
+                        cv2.imshow("TowCar AI View", debug_frame)
+                        key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('m'):
+                    STATE = "MARSHAL"
+                    dock_hits = 0
+                    print("Switched to MARSHAL Mode")
+                elif key == ord('d'):
+                    STATE = "DOCKING"
+                    print("Switched to DOCKING Mode")
+                elif key == ord('p'):
+                    show_hud = not show_hud
+            if telemetry is not None:
+                telemetry.publish_state({"mode": STATE, "seq": frame_seq, "ts": frame_ts,
+                                         "marshal": latest["marshal"], "docking": latest["docking"]})
+                if apply_telemetry_commands(telemetry) and STATE == "MARSHAL":
+                    dock_hits = 0
+            prof.tick()
+
+            if not all(p.is_alive() for p in procs):
+                print("Worker process exited")
+                break
+            with prof.stage("capture"):
+                ret, frame, frame_ts, frame_seq = cap.read()
+            if not ret:
+                break
+    finally:
+        stop.set()
+        in_bus.close_stream()
+        for p in procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        in_bus.close()
+        for bus in out_buses.values():
+            bus.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
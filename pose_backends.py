@@ -0,0 +1,210 @@
+import cv2
+import numpy as np
+import abc
+import importlib
+import os
+import time
+import argparse
+
+# =========================================================
+# 포즈 모델 백엔드
+# - 모든 백엔드는 infer(frame) -> (keypoints (N, 17, 3), boxes (N, 5)) 반환
+#   keypoints: [x, y, conf] (원본 프레임 픽셀 좌표), boxes: [x1, y1, x2, y2, conf]
+#   사람은 conf 높은 순으로 정렬
+# - torch    : ultralytics YOLO (.pt) 그대로
+# - onnx     : ONNX Runtime CPU (한 번 export 후 재사용)
+# - onnx-int8: ONNX 가중치 int8 동적 양자화
+# - openvino : OpenVINO CPU (선택적으로 int8)
+# =========================================================
+
+DEFAULT_WEIGHTS = 'yolov8n-pose.pt'
+NUM_KPTS = 17
+
+# 백엔드별 무거운 런타임 패키지 (import 만 따로 시간 측정할 때 사용)
+RUNTIME_MODULES = {
+    'torch': 'ultralytics',
+    'onnx': 'onnxruntime',
+    'onnx-int8': 'onnxruntime',
+    'openvino': 'openvino',
+    'openvino-int8': 'openvino',
+}
+
+def import_runtime(kind):
+    # 이후 백엔드 생성 시의 import 는 캐시됨
+    importlib.import_module(RUNTIME_MODULES[kind])
+
+def empty_result():
+    return np.zeros((0, NUM_KPTS, 3), dtype=np.float32), np.zeros((0, 5), dtype=np.float32)
+
+class UltralyticsBackend:
+    def __init__(self, weights=DEFAULT_WEIGHTS, imgsz=640, conf=0.5, device=None, model=None):
+        # model: 이미 로드된 YOLO 를 다른 imgsz 로 같이 쓸 때 (torch 는 입력 크기가 고정되지 않음)
+        if model is None:
+            from ultralytics import YOLO
+            model = YOLO(weights)
+        self.model = model
+        self.imgsz = imgsz
+        self.conf = conf
+        self.device = device
+
+    def infer(self, frame):
+        results = self.model(frame, verbose=False, conf=self.conf, imgsz=self.imgsz, device=self.device)
+        r = results[0]
+        if r.keypoints is None or len(r.keypoints.data) == 0:
+            return empty_result()
+        kpts = r.keypoints.data.cpu().numpy().astype(np.float32)
+        boxes = np.concatenate([r.boxes.xyxy.cpu().numpy(), r.boxes.conf.cpu().numpy()[:, None]], axis=1)
+        return kpts, boxes.astype(np.float32)
+
+class LetterboxBackend(abc.ABC):
+    # export 된 YOLOv8-pose 공통 전/후처리 (letterbox -> (1, 56, A) 출력 디코딩 -> NMS)
+    # 런타임별 하위 클래스는 run(blob) -> (1, 56, A) 만 구현
+    def __init__(self, imgsz=320, conf=0.5, iou=0.7):
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+
+    def preprocess(self, frame):
+        h, w = frame.shape[:2]
+        r = min(self.imgsz / h, self.imgsz / w)
+        nw, nh = int(round(w * r)), int(round(h * r))
+        dx, dy = (self.imgsz - nw) // 2, (self.imgsz - nh) // 2
+
+        self.canvas[:] = 114
+        self.canvas[dy:dy + nh, dx:dx + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        blob = cv2.dnn.blobFromImage(self.canvas, 1.0 / 255.0, swapRB=True)
+        return blob, r, dx, dy
+
+    def postprocess(self, output, r, dx, dy, w, h):
+        pred = output[0].T  # (A, 5 + 17*3)
+        pred = pred[pred[:, 4] > self.conf]
+        if len(pred) == 0:
+            return empty_result()
+
+        cx, cy, bw, bh = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        xywh = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+        keep = cv2.dnn.NMSBoxes(xywh.tolist(), pred[:, 4].tolist(), self.conf, self.iou)
+        keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+        pred, xywh = pred[keep], xywh[keep]
+
+        # letterbox 좌표 -> 원본 프레임 좌표
+        boxes = np.empty((len(pred), 5), dtype=np.float32)
+        boxes[:, 0] = (xywh[:, 0] - dx) / r
+        boxes[:, 1] = (xywh[:, 1] - dy) / r
+        boxes[:, 2] = (xywh[:, 0] + xywh[:, 2] - dx) / r
+        boxes[:, 3] = (xywh[:, 1] + xywh[:, 3] - dy) / r
+        boxes[:, 4] = pred[:, 4]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+        kpts = pred[:, 5:].reshape(-1, NUM_KPTS, 3).astype(np.float32)
+        kpts[:, :, 0] = (kpts[:, :, 0] - dx) / r
+        kpts[:, :, 1] = (kpts[:, :, 1] - dy) / r
+        return kpts, boxes
+
+    @abc.abstractmethod
+    def run(self, blob):
+        ...
+
+    def infer(self, frame):
+        blob, r, dx, dy = self.preprocess(frame)
+        h, w = frame.shape[:2]
+        return self.postprocess(self.run(blob), r, dx, dy, w, h)
+
+class OnnxBackend(LetterboxBackend):
+    def __init__(self, model_path, imgsz=320, conf=0.5, iou=0.7, threads=None):
+        super().__init__(imgsz, conf, iou)
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, opts, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+class OpenVinoBackend(LetterboxBackend):
+    def __init__(self, model_path, imgsz=320, conf=0.5, iou=0.7):
+        super().__init__(imgsz, conf, iou)
+        import openvino as ov
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(model_path), 'CPU')
+        self.output = self.compiled.output(0)
+
+    def run(self, blob):
+        return self.compiled(blob)[self.output]
+
+# ---------------------------------------------------------
+# 1회 export (결과 파일이 있으면 재사용)
+# ---------------------------------------------------------
+def exported_path(weights, fmt, imgsz):
+    stem = os.path.splitext(weights)[0]
+    if fmt == 'onnx':
+        return f"{stem}_{imgsz}.onnx"
+    if fmt == 'onnx-int8':
+        return f"{stem}_{imgsz}_int8.onnx"
+    if fmt == 'openvino':
+        return f"{stem}_{imgsz}_openvino_model"
+    if fmt == 'openvino-int8':
+        return f"{stem}_{imgsz}_int8_openvino_model"
+    raise ValueError(f"unknown export format: {fmt}")
+
+def export_pose_model(weights=DEFAULT_WEIGHTS, fmt='onnx', imgsz=320):
+    target = exported_path(weights, fmt, imgsz)
+    if os.path.exists(target):
+        return target
+
+    if fmt == 'onnx-int8':
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        src = export_pose_model(weights, 'onnx', imgsz)
+        quantize_dynamic(src, target, weight_type=QuantType.QUInt8)
+        return target
+
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    if fmt == 'onnx':
+        out = model.export(format='onnx', imgsz=imgsz, dynamic=False, simplify=True)
+    else:
+        out = model.export(format='openvino', imgsz=imgsz, int8=(fmt == 'openvino-int8'))
+    # ultralytics 는 imgsz 와 무관한 이름으로 저장 -> 크기별로 구분되게 이름 변경
+    os.replace(str(out), target)
+    return target
+
+def create_pose_backend(kind='torch', weights=DEFAULT_WEIGHTS, imgsz=640, conf=0.5, share=None):
+    # share: 같은 가중치의 기존 백엔드 (torch 는 모델을 공유, export 계열은 imgsz 별 파일이 따로 필요)
+    if kind == 'torch':
+        return UltralyticsBackend(weights, imgsz=imgsz, conf=conf, model=share.model if share is not None else None)
+    if kind in ('onnx', 'onnx-int8'):
+        return OnnxBackend(export_pose_model(weights, kind, imgsz), imgsz=imgsz, conf=conf)
+    if kind in ('openvino', 'openvino-int8'):
+        model_dir = export_pose_model(weights, kind, imgsz)
+        xml = os.path.join(model_dir, os.path.splitext(os.path.basename(weights))[0] + '.xml')
+        return OpenVinoBackend(xml, imgsz=imgsz, conf=conf)
+    raise ValueError(f"unknown pose backend: {kind}")
+
+def main():
+    # export 후 CPU 에서 바로 속도 확인
+    parser = argparse.ArgumentParser(description="Export YOLOv8-pose and time it on CPU")
+    parser.add_argument("--backend", default="onnx", choices=["torch", "onnx", "onnx-int8", "openvino", "openvino-int8"])
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--imgsz", type=int, default=320)
+    parser.add_argument("--image", help="테스트 이미지 (없으면 빈 프레임)")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    backend = create_pose_backend(args.backend, args.weights, args.imgsz)
+    frame = cv2.imread(args.image) if args.image else np.zeros((480, 640, 3), dtype=np.uint8)
+
+    backend.infer(frame)  # 워밍업
+    times = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        kpts, boxes = backend.infer(frame)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    print(f"[{args.backend} @ {args.imgsz}] persons: {len(kpts)} | "
+          f"p50 {np.percentile(times, 50):.1f} ms | p95 {np.percentile(times, 95):.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+class PoseKalmanTracker:
+    # 마커 1개의 등속(constant-velocity) 칼만 추적기
+    # - 위치: tvec + 속도 (선형 KF, 6 상태)
+    # - 자세: 회전행렬 + 각속도 (오차 상태 KF, 작은 회전 오차를 rvec 로 표현 -> ±180도 불연속 없음)
+    # - IPPE 두 해 중 예측 자세에 더 가까운 해 선택, 짧은 미검출 구간은 예측으로 유지
+    # 단위: cm, rad, 초
+    def __init__(self, accel_std=30.0, ang_accel_std=6.0, meas_std_xy=0.03, meas_std_z=0.15, meas_std_rot=0.04, gate_cm=5.0):
+        self.accel_std = accel_std          # 위치 가속도 잡음 (cm/s^2)
+        self.ang_accel_std = ang_accel_std  # 각가속도 잡음 (rad/s^2)
+        self.meas_std_xy = meas_std_xy      # 측정 잡음 x, y (cm)
+        self.meas_std_z = meas_std_z        # 측정 잡음 z (cm, 10cm 기준 -> 거리 제곱에 비례)
+        self.meas_std_rot = meas_std_rot    # 측정 잡음 자세 (rad)
+        self.gate_cm = gate_cm              # 이보다 크게 튀면 재초기화
+
+        self.initialized = False
+        self.last_ts = 0.0
+        self.last_meas_ts = 0.0
+
+    def init(self, rvec, tvec, ts):
+        self.x = np.zeros(6)
+        self.x[:3] = np.ravel(tvec)
+        self.P = np.diag([self.meas_std_xy ** 2] * 2 + [self.meas_std_z ** 2] + [10.0 ** 2] * 3)
+
+        self.R = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))[0]
+        self.w = np.zeros(3)
+        self.P_r = np.diag([self.meas_std_rot ** 2] * 3 + [1.0 ** 2] * 3)
+
+        self.last_ts = ts
+        self.last_meas_ts = ts
+        self.initialized = True
+
+    @staticmethod
+    def transition(dt):
+        F = np.eye(6)
+        F[:3, 3:] = np.eye(3) * dt
+        return F
+
+    @staticmethod
+    def process_noise(dt, std):
+        # 백색 가속도 잡음 모델
+        q = std * std
+        Q = np.zeros((6, 6))
+        Q[:3, :3] = np.eye(3) * (dt ** 3 / 3.0) * q
+        Q[:3, 3:] = Q[3:, :3] = np.eye(3) * (dt ** 2 / 2.0) * q
+        Q[3:, 3:] = np.eye(3) * dt * q
+        return Q
+
+    def predict(self, ts):
+        dt = ts - self.last_ts
+        if dt <= 0:
+            return
+        F = self.transition(dt)
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + self.process_noise(dt, self.accel_std)
+
+        self.R = self.R @ cv2.Rodrigues(self.w * dt)[0]
+        self.P_r = F @ self.P_r @ F.T + self.process_noise(dt, self.ang_accel_std)
+        self.last_ts = ts
+
+    def rotation_error(self, rvec):
+        # 현재(예측) 자세 기준 측정 자세의 회전 오차 (마커 좌표계 rvec)
+        Rm = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))[0]
+        return cv2.Rodrigues(self.R.T @ Rm)[0].ravel()
+
+    def update(self, rvecs, tvecs, ts):
+        # rvecs/tvecs: solvePnPGeneric 후보 (IPPE 는 2개)
+        if not self.initialized:
+            self.init(rvecs[0], tvecs[0], ts)
+            return 0
+
+        self.predict(ts)
+
+        # Ambiguity 해결: 예측 자세와 회전 각도가 가장 작은 후보
+        errs = [self.rotation_error(r) for r in rvecs]
+        idx = int(np.argmin([np.linalg.norm(e) for e in errs]))
+
+        z = np.ravel(tvecs[idx])
+        innov = z - self.x[:3]
+        if np.linalg.norm(innov) > self.gate_cm:
+            self.init(rvecs[idx], tvecs[idx], ts)
+            return idx
+
+        # 위치 갱신 (깊이 잡음은 거리 제곱에 비례)
+        std_z = self.meas_std_z * max(1.0, (z[2] / 10.0) ** 2)
+        Rm = np.diag([self.meas_std_xy ** 2, self.meas_std_xy ** 2, std_z ** 2])
+        S = self.P[:3, :3] + Rm
+        K = self.P[:, :3] @ np.linalg.inv(S)
+        self.x = self.x + K @ innov
+        self.P = self.P - K @ self.P[:3, :]
+
+        # 자세 갱신 (오차 상태)
+        S_r = self.P_r[:3, :3] + np.eye(3) * self.meas_std_rot ** 2
+        K_r = self.P_r[:, :3] @ np.linalg.inv(S_r)
+        dx = K_r @ errs[idx]
+        self.R = self.R @ cv2.Rodrigues(dx[:3])[0]
+        self.w = self.w + dx[3:]
+        self.P_r = self.P_r - K_r @ self.P_r[:3, :]
+
+        self.last_meas_ts = ts
+        return idx
+
+    def pose_at(self, ts):
+        # 상태를 바꾸지 않고 ts 시점으로 외삽한 (rvec, tvec), 모양은 solvePnP 출력과 동일 (3, 1)
+        dt = ts - self.last_ts
+        tvec = (self.x[:3] + self.x[3:] * dt).reshape(3, 1)
+        R = self.R @ cv2.Rodrigues(self.w * dt)[0] if dt != 0 else self.R
+        rvec = cv2.Rodrigues(R)[0]
+        return rvec, tvec
@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# =========================================================
+# 구간별 지연 측정
+# - with prof.stage("dock.detect"): ...  형태로 이름 붙은 구간 시간 기록
+# - 구간별 최근 WINDOW 개로 p50 / p95 / max, 루프 fps 계산
+# - 화면 HUD (선택), 주기적으로 JSON-lines 파일에 통계 기록 (선택)
+# - 끈 상태(NullProfiler)는 공유 nullcontext 만 돌려줌 -> 거의 비용 없음
+# =========================================================
+
+class _Stage:
+    # 구간 하나의 타이머 (이름별로 1개 재사용, 같은 이름 중첩은 불가)
+    __slots__ = ("samples", "t0")
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.t0)
+        return False
+
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, window=120, export_path=None, export_interval=5.0, hud_interval=0.5):
+        self.window = window
+        self.export_path = export_path          # None 이면 파일 기록 안 함
+        self.export_interval = export_interval  # 초
+        self.hud_interval = hud_interval        # HUD 문자열 갱신 주기 (초, 매 프레임 percentile 계산 방지)
+
+        self.stages = {}  # 이름 -> _Stage (처음 기록된 순서 유지)
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.last_tick = None
+        self.last_export = time.monotonic()
+        self.last_hud = 0.0
+        self.hud_lines = []
+
+    # -----------------------------------------------------
+    # 기록
+    # -----------------------------------------------------
+    def stage(self, name):
+        s = self.stages.get(name)
+        if s is None:
+            s = self.stages[name] = _Stage(self.window)
+        return s
+
+    def clock(self):
+        return time.perf_counter()
+
+    def record_since(self, name, t0):
+        # with 로 감싸기 어려운 긴 구간용: t0 = prof.clock() ... prof.record_since(name, t0)
+        self.stage(name).samples.append(time.perf_counter() - t0)
+
+    def tick(self):
+        # 메인 루프 1회 끝날 때 호출 (fps 집계 + 주기적 파일 기록)
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.frame_times.append(now - self.last_tick)
+        self.last_tick = now
+        self.frames += 1
+
+        if self.export_path is not None and time.monotonic() - self.last_export >= self.export_interval:
+            self.export()
+
+    # -----------------------------------------------------
+    # 통계
+    # -----------------------------------------------------
+    def fps(self):
+        if not self.frame_times:
+            return 0.0
+        return len(self.frame_times) / sum(self.frame_times)
+
+    def summary(self):
+        # 단위: ms
+        stages = {}
+        # 스냅샷으로 순회: PoseWorker 스레드가 도중에 새 구간을 추가하거나 샘플을 넣어도 안전
+        for name, s in list(self.stages.items()):
+            samples = list(s.samples)
+            if not samples:
+                continue
+            ms = np.array(samples, dtype=np.float64) * 1000.0
+            p50, p95 = np.percentile(ms, [50, 95])
+            stages[name] = {"p50": round(float(p50), 3), "p95": round(float(p95), 3),
+                            "max": round(float(ms.max()), 3), "n": len(ms)}
+        return {"fps": round(self.fps(), 2), "frames": self.frames, "stages": stages}
+
+    def export(self):
+        record = self.summary()
+        record["time"] = time.time()
+        with open(self.export_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self.last_export = time.monotonic()
+
+    # -----------------------------------------------------
+    # 화면 표시
+    # -----------------------------------------------------
+    def draw_hud(self, frame, x=10, y=50):
+        now = time.monotonic()
+        if now - self.last_hud >= self.hud_interval:
+            s = self.summary()
+            self.hud_lines = [f"FPS {s['fps']:.1f}   p50 / p95 / max ms"]
+            self.hud_lines += [f"{name:<15}{v['p50']:6.1f}{v['p95']:6.1f}{v['max']:6.1f}"
+                               for name, v in s["stages"].items()]
+            self.last_hud = now
+
+        line_h = 16
+        h, w = frame.shape[:2]
+        x2 = min(x + 290, w)
+        y2 = min(y + line_h * len(self.hud_lines) + 6, h)
+        if x2 > x and y2 > y:
+            roi = frame[y:y2, x:x2]
+            cv2.addWeighted(roi, 0.4, roi, 0, 0, dst=roi)  # HUD 영역만 어둡게
+        for i, line in enumerate(self.hud_lines):
+            cv2.putText(frame, line, (x + 5, y + line_h * (i + 1)), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+
+    def close(self):
+        if self.export_path is not None:
+            self.export()
+
+class NullProfiler:
+    # 측정 끔: 모든 호출이 아무것도 하지 않음
+    enabled = False
+    _null = nullcontext()
+
+    def stage(self, name):
+        return self._null
+
+    def clock(self):
+        return 0.0
+
+    def record_since(self, name, t0):
+        pass
+
+    def tick(self):
+        pass
+
+    def summary(self):
+        return {"fps": 0.0, "frames": 0, "stages": {}}
+
+    def draw_hud(self, frame, x=10, y=50):
+        pass
+
+    def close(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,204 @@
+import cv2
+import numpy as np
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# =========================================================
+# 세션 녹화 / 재생
+# - 녹화: 원본 프레임(JPEG) + 프레임별 결과(results.jsonl) 를 백그라운드 스레드가 디스크에 기록
+#   비전 루프는 record() 로 큐에 넣고 바로 리턴 (디스크 대기 없음)
+#   큐에 쌓인 프레임이 MAX_QUEUE 를 넘으면 드롭 정책 적용 (결과 줄은 버리지 않음, frame=null 로 기록)
+#     oldest: 큐에서 가장 오래된 프레임 이미지를 버림 / newest: 새로 들어온 프레임 이미지를 버림
+# - 재생: ReplayCapture 가 LatestFrameCapture 와 같은 인터페이스로 녹화 프레임을 1장씩 (드롭 없이) 공급
+# 폴더 구성: <dir>/meta.json, <dir>/results.jsonl, <dir>/frames/000001.jpg (lossless 면 .png) ...
+# =========================================================
+
+def to_json(obj):
+    # numpy 스칼라/배열 -> 파이썬 기본형
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"not JSON serializable: {type(obj)}")
+
+class SessionRecorder:
+    def __init__(self, root="recordings", max_queue=64, drop_policy="oldest", jpeg_quality=85, lossless=False, meta=None):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"unknown drop policy: {drop_policy}")
+        base = os.path.join(root, time.strftime("session_%Y%m%d_%H%M%S"))
+        self.path, n = base, 1
+        while os.path.exists(self.path):
+            self.path, n = f"{base}_{n}", n + 1
+        os.makedirs(os.path.join(self.path, "frames"))
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), **(meta or {})}, f, indent=2, default=to_json)
+
+        self.MAX_QUEUE = max_queue          # 큐에 들고 있을 최대 프레임 이미지 수
+        self.DROP_POLICY = drop_policy
+        # lossless=True: PNG (재생 결과가 원본 처리와 비트 단위로 같아야 할 때, 용량/인코딩 비용 큼)
+        self.ext = ".png" if lossless else ".jpg"
+        self.encode_params = [cv2.IMWRITE_PNG_COMPRESSION, 1] if lossless else [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        self.cond = threading.Condition()
+        self.queue = deque()   # [record(dict), frame or None]
+        self.queued_frames = 0
+        self.running = True
+
+        self.written = 0
+        self.dropped = 0
+
+        self.results_file = open(os.path.join(self.path, "results.jsonl"), "w")
+        self.thread = threading.Thread(target=self._write_loop, name="SessionRecorder", daemon=True)
+        self.thread.start()
+
+    def record(self, frame, frame_ts, frame_seq, mode, result):
+        # frame: 그리기 전 원본 (호출측에서 복사해서 넘김), result: JSON 으로 바꿀 수 있는 dict
+        record = {"seq": int(frame_seq), "ts": float(frame_ts), "mode": mode, "result": result}
+        with self.cond:
+            if frame is not None and self.queued_frames >= self.MAX_QUEUE:
+                self.dropped += 1
+                if self.DROP_POLICY == "newest":
+                    frame = None
+                else:
+                    for entry in self.queue:
+                        if entry[1] is not None:
+                            entry[1] = None
+                            break
+                    self.queued_frames -= 1
+            self.queue.append([record, frame])
+            if frame is not None:
+                self.queued_frames += 1
+            self.cond.notify()
+
+    def _write_loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue or not self.running)
+                if not self.queue:
+                    return
+                record, frame = self.queue.popleft()
+                if frame is not None:
+                    self.queued_frames -= 1
+
+            record["frame"] = None
+            if frame is not None:
+                name = f"{record['seq']:06d}{self.ext}"
+                ok, buf = cv2.imencode(self.ext, frame, self.encode_params)
+                if ok:
+                    with open(os.path.join(self.path, "frames", name), "wb") as f:
+                        f.write(buf.tobytes())
+                    record["frame"] = name
+            self.results_file.write(json.dumps(record, default=to_json) + "\n")
+            self.written += 1
+
+    def stats(self):
+        with self.cond:
+            return {"written": self.written, "dropped_frames": self.dropped, "queued": len(self.queue)}
+
+    def close(self):
+        # 큐에 남은 것은 모두 기록하고 종료
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join()
+        self.results_file.close()
+
+def load_session(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    with open(os.path.join(path, "results.jsonl")) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return meta, records
+
+class ReplayCapture:
+    # LatestFrameCapture 대체: 녹화된 프레임을 순서대로 전부 공급 (결정적 재생)
+    # realtime=True 면 녹화 당시 간격대로 대기, 아니면 최대 속도
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.meta, records = load_session(path)
+        self.records = [r for r in records if r["frame"] is not None]
+        self.realtime = realtime
+        self.index = 0
+        self.current = None   # 마지막으로 돌려준 프레임의 녹화 기록
+        self.t0 = None
+
+    def isOpened(self):
+        return len(self.records) > 0
+
+    def start(self):
+        return self
+
+    def read(self, timeout=1.0):
+        if self.index >= len(self.records):
+            return False, None, 0.0, 0
+        r = self.records[self.index]
+        self.index += 1
+        frame = cv2.imread(os.path.join(self.path, "frames", r["frame"]))
+        if self.realtime:
+            first_ts = self.records[0]["ts"]
+            if self.t0 is None:
+                self.t0 = time.monotonic()
+            delay = (r["ts"] - first_ts) - (time.monotonic() - self.t0)
+            if delay > 0:
+                time.sleep(delay)
+        self.current = r
+        return frame is not None, frame, r["ts"], r["seq"]
+
+    def stats(self):
+        return {"captured": self.index, "dropped": 0}
+
+    def release(self):
+        pass
+
+def compare_sessions(path_a, path_b):
+    # 같은 녹화를 두 번 처리한 결과 비교 (회귀 확인): seq 가 같은 프레임끼리
+    _, a = load_session(path_a)
+    _, b = load_session(path_b)
+    b_by_seq = {r["seq"]: r for r in b}
+    action_diff = 0
+    found_diff = 0
+    max_err = {"dist_cm": 0.0, "x_cm": 0.0, "yaw": 0.0}
+    matched = 0
+    for ra in a:
+        rb = b_by_seq.get(ra["seq"])
+        if rb is None or ra["mode"] != rb["mode"]:
+            continue
+        matched += 1
+        xa, xb = ra["result"], rb["result"]
+        if ra["mode"] == "MARSHAL":
+            action_diff += xa.get("action") != xb.get("action")
+        else:
+            found_diff += xa.get("found") != xb.get("found")
+            if xa.get("found") and xb.get("found"):
+                for k in max_err:
+                    max_err[k] = max(max_err[k], abs(xa[k] - xb[k]))
+    return {"matched": matched, "action_diff": action_diff, "found_diff": found_diff, "max_abs_diff": max_err}
+
+def main():
+    parser = argparse.ArgumentParser(description="Session recording tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("info", help="녹화 요약")
+    p.add_argument("path")
+    p = sub.add_parser("compare", help="두 녹화의 결과 비교 (원본 vs 재생)")
+    p.add_argument("a")
+    p.add_argument("b")
+    args = parser.parse_args()
+
+    if args.cmd == "info":
+        meta, records = load_session(args.path)
+        modes = {}
+        for r in records:
+            modes[r["mode"]] = modes.get(r["mode"], 0) + 1
+        with_frames = sum(r["frame"] is not None for r in records)
+        span = records[-1]["ts"] - records[0]["ts"] if records else 0.0
+        print(f"{args.path}: {len(records)} records ({with_frames} frames) over {span:.1f}s, modes {modes}")
+        print(f"meta: {meta}")
+    elif args.cmd == "compare":
+        print(json.dumps(compare_sessions(args.a, args.b), indent=2))
+
+if __name__ == "__main__":
+    main()
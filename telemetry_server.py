@@ -0,0 +1,533 @@
+import cv2
+import numpy as np
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from session_recorder import to_json
+
+# =========================================================
+# 원격 모니터링 서버 (화면 없는 장치에서 cv2.imshow 대체, 표준 라이브러리만 사용)
+# - GET /          : 브라우저용 간단한 페이지 (영상 + 상태 + 모드 버튼)
+# - GET /stream    : 주석 그려진 프레임 MJPEG (MAX_FPS 로 제한)
+# - GET /snapshot.jpg, GET /state : 최신 JPEG / 최신 상태 JSON
+# - GET /ws        : WebSocket, 상태 JSON push (도킹 결과, 제스처 action/stage ...)
+#                    클라이언트 -> {"mode": "DOCKING"} 또는 "MARSHAL" 텍스트로 모드 전환
+# - POST /mode     : 본문 "DOCKING" / {"mode": "MARSHAL"} (curl 용)
+# 보안: 기본은 127.0.0.1 에만 바인드 (다른 장치에서 보려면 host 를 명시)
+#   모드 전환(제어)은 token 을 설정했을 때만, 그 토큰을 낸 요청만 받음 (없으면 보기 전용)
+#   WebSocket: /ws?token=... , POST: "Authorization: Bearer ..." 헤더 또는 /mode?token=...
+#   토큰은 평문 HTTP 로 전달되므로 신뢰할 수 있는 네트워크에서만 사용
+# 비전 루프는 publish_frame / publish_state 로 최신 것만 올려두고 바로 리턴
+#   JPEG 인코딩은 인코더 스레드, 전송은 클라이언트별 스레드 (느린 클라이언트는 중간 프레임을 건너뜀)
+# =========================================================
+
+MODES = ("MARSHAL", "DOCKING")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BOUNDARY = "frame"
+
+# ---------------------------------------------------------
+# WebSocket (RFC 6455) 최소 구현: 텍스트 / close / ping 만
+# ---------------------------------------------------------
+def ws_accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+def ws_encode(payload, opcode=0x1, mask=False):
+    # 서버 -> 클라이언트는 마스크 없음, 클라이언트 -> 서버는 마스크 필수
+    if isinstance(payload, str):
+        payload = payload.encode()
+    n = len(payload)
+    head = bytes([0x80 | opcode])
+    mbit = 0x80 if mask else 0
+    if n < 126:
+        head += bytes([mbit | n])
+    elif n < 65536:
+        head += bytes([mbit | 126]) + struct.pack("!H", n)
+    else:
+        head += bytes([mbit | 127]) + struct.pack("!Q", n)
+    if mask:
+        key = np.random.bytes(4)
+        payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), n)).tobytes()
+        head += key
+    return head + payload
+
+def ws_read_frame(rfile):
+    # -> (opcode, payload bytes), 연결이 끊기면 None (조각 프레임은 쓰지 않으므로 FIN 무시)
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode = head[0] & 0x0F
+    n = head[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", rfile.read(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", rfile.read(8))[0]
+    key = rfile.read(4) if head[1] & 0x80 else None
+    payload = rfile.read(n)
+    if len(payload) < n:
+        return None
+    if key is not None:
+        payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), n)).tobytes()
+    return opcode, payload
+
+def parse_command(text):
+    # '{"mode": "DOCKING"}' 또는 'DOCKING' -> ("mode", "DOCKING"), 모르는 명령은 None
+    text = text.strip()
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        msg = {"mode": text}
+    if not isinstance(msg, dict):
+        return None
+    mode = str(msg.get("mode", "")).upper()
+    return ("mode", mode) if mode in MODES else None
+
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>TowCar AI</title>
+<style>body{font-family:monospace;background:#111;color:#ddd}img{max-width:100%}</style></head>
+<body>
+<div><button onclick="send('MARSHAL')">MARSHAL</button> <button onclick="send('DOCKING')">DOCKING</button></div>
+<img src="/stream"><pre id="state">connecting...</pre>
+<script>
+const token = new URLSearchParams(location.search).get("token") || "";
+const ws = new WebSocket(`ws://${location.host}/ws?token=${encodeURIComponent(token)}`);
+ws.onmessage = e => { document.getElementById("state").textContent = JSON.stringify(JSON.parse(e.data), null, 1); };
+function send(mode) { ws.send(JSON.stringify({mode: mode})); }
+</script>
+</body></html>
+"""
+
+class TelemetryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass  # 요청마다 stderr 출력 안 함
+
+    @property
+    def telemetry(self):
+        return self.server.telemetry
+
+    def authorized(self):
+        # 제어 요청 토큰 확인 (서버에 토큰이 없으면 제어 불가)
+        token = self.telemetry.token
+        if not token:
+            return False
+        given = parse_qs(urlparse(self.path).query).get("token", [""])[0]
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            given = auth[len("Bearer "):]
+        return hmac.compare_digest(given.encode(), token.encode())
+
+    def send_body(self, code, ctype, body):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        t = self.telemetry
+        if path == "/":
+            self.send_body(200, "text/html; charset=utf-8", INDEX_HTML.encode())
+        elif path == "/state":
+            self.send_body(200, "application/json", (t.latest_state() or "{}").encode())
+        elif path == "/snapshot.jpg":
+            jpeg = t.snapshot()
+            if jpeg is None:
+                self.send_body(503, "text/plain", b"no frame yet")
+            else:
+                self.send_body(200, "image/jpeg", jpeg)
+        elif path == "/stream":
+            self.stream_mjpeg()
+        elif path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self.serve_websocket()
+        else:
+            self.send_body(404, "text/plain", b"not found")
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/mode":
+            self.send_body(404, "text/plain", b"not found")
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode(errors="replace")
+        if not self.authorized():
+            self.telemetry.count_rejected()
+            self.send_body(403, "text/plain", b"control disabled or bad token")
+            return
+        cmd = parse_command(body)
+        if cmd is None:
+            self.send_body(400, "text/plain", f"expected one of {MODES}".encode())
+            return
+        self.telemetry.commands.append(cmd)
+        self.send_body(200, "application/json", json.dumps({"ok": True, "mode": cmd[1]}).encode())
+
+    def stream_mjpeg(self):
+        t = self.telemetry
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        seq = 0
+        t.add_client("mjpeg", 1)
+        try:
+            while True:
+                jpeg, seq = t.wait_jpeg(seq)
+                if jpeg is None:
+                    if not t.running:
+                        return
+                    continue
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            t.add_client("mjpeg", -1)
+
+    def serve_websocket(self):
+        t = self.telemetry
+        self.close_connection = True
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", ws_accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+
+        send_lock = threading.Lock()
+        closed = threading.Event()
+        can_control = self.authorized()   # 토큰 없이 붙은 클라이언트는 상태만 받음
+
+        def send(data, opcode=0x1):
+            with send_lock:
+                self.wfile.write(ws_encode(data, opcode))
+
+        def reader():
+            # 수신 (모드 전환 명령), 전송은 이 핸들러 스레드에서
+            try:
+                while not closed.is_set():
+                    frame = ws_read_frame(self.rfile)
+                    if frame is None or frame[0] == 0x8:
+                        break
+                    opcode, payload = frame
+                    if opcode == 0x9:
+                        send(payload, 0xA)
+                    elif opcode == 0x1:
+                        cmd = parse_command(payload.decode(errors="replace"))
+                        if cmd is not None and can_control:
+                            t.commands.append(cmd)
+                        elif cmd is not None:
+                            t.count_rejected()
+            except (OSError, ValueError, struct.error):
+                pass
+            closed.set()
+
+        threading.Thread(target=reader, name="TelemetryWsReader", daemon=True).start()
+        t.add_client("ws", 1)
+        seq = 0
+        try:
+            while not closed.is_set() and t.running:
+                state, seq = t.wait_state(seq)
+                if state is not None:
+                    send(state)
+            send(b"", 0x8)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            closed.set()
+            t.add_client("ws", -1)
+
+class TelemetryServer:
+    def __init__(self, host="127.0.0.1", port=8080, max_fps=10.0, jpeg_quality=70, token=None):
+        # host: 기본은 이 장치에서만 접속, 다른 장치에서 보려면 "0.0.0.0" 등 명시
+        # token: 모드 전환 명령용 비밀값 (None 이면 보기 전용, 명령은 전부 거부)
+        self.host = host
+        self.token = token
+        self.rejected = 0         # 거부한 제어 요청 수
+        self.MAX_FPS = max_fps            # MJPEG 최대 프레임률 (인코딩/대역폭 상한)
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        self.cond = threading.Condition()
+        self.pending = None       # 인코딩 대기 프레임 (복사본)
+        self.jpeg = None
+        self.jpeg_seq = 0
+        self.state = None         # 최신 상태 JSON 문자열
+        self.state_seq = 0
+        self.last_frame_t = 0.0
+        self.want_snapshot = False
+        self.commands = deque(maxlen=32)   # (종류, 값), 비전 루프가 poll_commands() 로 가져감
+        self.clients = {"mjpeg": 0, "ws": 0}
+        self.encoded = 0
+        self.running = True
+
+        self.httpd = ThreadingHTTPServer((host, port), TelemetryHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.telemetry = self
+        self.threads = [
+            threading.Thread(target=self.httpd.serve_forever, name="TelemetryHttp", daemon=True),
+            threading.Thread(target=self._encode_loop, name="TelemetryEncoder", daemon=True),
+        ]
+        for th in self.threads:
+            th.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    # -----------------------------------------------------
+    # 비전 루프 쪽 (바로 리턴)
+    # -----------------------------------------------------
+    def publish_frame(self, frame):
+        # 보는 클라이언트가 없거나 MAX_FPS 간격이 안 됐으면 복사도 안 함
+        now = time.monotonic()
+        if not (self.clients["mjpeg"] or self.want_snapshot) or now - self.last_frame_t < 1.0 / self.MAX_FPS:
+            return
+        self.last_frame_t = now
+        copy = frame.copy()  # 호출측이 다음 프레임에 버퍼를 재사용해도 안전하게
+        with self.cond:
+            self.pending = copy  # 인코더가 못 따라가면 덮어씀
+            self.cond.notify_all()
+
+    def publish_state(self, state):
+        text = json.dumps(state, default=to_json)
+        with self.cond:
+            self.state = text
+            self.state_seq += 1
+            self.cond.notify_all()
+
+    def poll_commands(self):
+        cmds = []
+        while self.commands:
+            cmds.append(self.commands.popleft())
+        return cmds
+
+    # -----------------------------------------------------
+    # 서버 쪽 (인코더 / 클라이언트 스레드)
+    # -----------------------------------------------------
+    def _encode_loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    return
+                frame, self.pending = self.pending, None
+            ok, buf = cv2.imencode(".jpg", frame, self.encode_params)
+            if not ok:
+                continue
+            with self.cond:
+                self.jpeg = buf.tobytes()
+                self.jpeg_seq += 1
+                self.encoded += 1
+                self.want_snapshot = False
+                self.cond.notify_all()
+
+    def wait_jpeg(self, last_seq, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.jpeg_seq != last_seq or not self.running, timeout=timeout)
+            if self.jpeg_seq == last_seq:
+                return None, last_seq
+            return self.jpeg, self.jpeg_seq
+
+    def wait_state(self, last_seq, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.state_seq != last_seq or not self.running, timeout=timeout)
+            if self.state_seq == last_seq:
+                return None, last_seq
+            return self.state, self.state_seq
+
+    def latest_state(self):
+        with self.cond:
+            return self.state
+
+    def snapshot(self, timeout=1.0):
+        # 스트림 시청자가 없으면 다음 publish_frame 때 한 장 인코딩
+        with self.cond:
+            seq = self.jpeg_seq
+            if not self.clients["mjpeg"]:
+                self.want_snapshot = True
+                self.cond.wait_for(lambda: self.jpeg_seq != seq or not self.running, timeout=timeout)
+            return self.jpeg
+
+    def add_client(self, kind, delta):
+        with self.cond:
+            self.clients[kind] += delta
+
+    def count_rejected(self):
+        with self.cond:
+            self.rejected += 1
+
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def stats(self):
+        with self.cond:
+            return {"clients": dict(self.clients), "encoded": self.encoded, "states": self.state_seq,
+                    "rejected": self.rejected}
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for th in self.threads:
+            th.join(timeout=1.0)
+
+# ---------------------------------------------------------
+# 테스트용 클라이언트 (브라우저 대신)
+# ---------------------------------------------------------
+def ws_connect(host, port, path="/ws", timeout=5.0, token=None):
+    if token:
+        path += f"?token={token}"
+    sock = socket.create_connection((host, port), timeout=timeout)
+    key = base64.b64encode(np.random.bytes(16)).decode()
+    sock.sendall((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    rfile = sock.makefile("rb")
+    status = rfile.readline()
+    headers = {}
+    while True:
+        line = rfile.readline().decode().strip()
+        if not line:
+            break
+        k, _, v = line.partition(":")
+        headers[k.strip().lower()] = v.strip()
+    if b" 101 " not in status or headers.get("sec-websocket-accept") != ws_accept_key(key):
+        raise ConnectionError(f"websocket handshake failed: {status!r}")
+    return sock, rfile
+
+def read_mjpeg(host, port, seconds=2.0):
+    # -> 받은 프레임 수, 마지막 JPEG
+    sock = socket.create_connection((host, port), timeout=5.0)
+    sock.sendall(f"GET /stream HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode())
+    rfile = sock.makefile("rb")
+    count, last = 0, None
+    t_end = time.monotonic() + seconds
+    while time.monotonic() < t_end:
+        line = rfile.readline()
+        if not line:
+            break
+        if line.lower().startswith(b"content-length:"):
+            n = int(line.split(b":")[1])
+            rfile.readline()  # 빈 줄
+            last = rfile.read(n)
+            count += 1
+    sock.close()
+    return count, last
+
+def run_demo_source(server, stop, fps=30.0):
+    # 카메라 없이: 움직이는 원 + 가짜 상태, 모드 명령 반영
+    mode = "MARSHAL"
+    i = 0
+    while not stop.is_set():
+        for _, value in server.poll_commands():
+            mode = value
+            print(f"mode -> {mode}")
+        frame = np.full((480, 640, 3), 40, np.uint8)
+        cx = int(320 + 200 * np.sin(i / 20))
+        cv2.circle(frame, (cx, 240), 40, (0, 255, 255), -1)
+        cv2.putText(frame, f"[MODE: {mode}] {i}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
+        server.publish_frame(frame)
+        server.publish_state({"mode": mode, "seq": i, "ts": time.monotonic(),
+                              "result": {"found": True, "dist_cm": 20.0 - i * 0.01, "x_cm": float(cx - 320) / 100}})
+        i += 1
+        time.sleep(1.0 / fps)
+
+def selftest():
+    server = TelemetryServer("127.0.0.1", 0, max_fps=10.0, token="selftest")
+    stop = threading.Event()
+    src = threading.Thread(target=run_demo_source, args=(server, stop), daemon=True)
+    src.start()
+    try:
+        # 토큰 없는 클라이언트의 명령은 거부되어야 함
+        sock, rfile = ws_connect("127.0.0.1", server.port)
+        ws_read_frame(rfile)
+        sock.sendall(ws_encode(json.dumps({"mode": "DOCKING"}), mask=True))
+        deadline = time.monotonic() + 2.0
+        while server.stats()["rejected"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sock.sendall(ws_encode(b"", 0x8, mask=True))
+        sock.close()
+        rejected = server.stats()["rejected"]
+
+        sock, rfile = ws_connect("127.0.0.1", server.port, token="selftest")
+        states = [json.loads(ws_read_frame(rfile)[1]) for _ in range(5)]
+        sock.sendall(ws_encode(json.dumps({"mode": "DOCKING"}), mask=True))
+        deadline = time.monotonic() + 2.0
+        mode = states[-1]["mode"]
+        while mode != "DOCKING" and time.monotonic() < deadline:
+            mode = json.loads(ws_read_frame(rfile)[1])["mode"]
+        sock.sendall(ws_encode(b"", 0x8, mask=True))
+        sock.close()
+
+        n, jpeg = read_mjpeg("127.0.0.1", server.port, seconds=2.0)
+        img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR) if jpeg else None
+        print(f"websocket: {len(states)} states, mode switch -> {mode}, rejected without token: {rejected}")
+        print(f"mjpeg: {n} frames in 2.0s (cap {server.MAX_FPS:g} fps), last {None if img is None else img.shape}")
+        print(f"server: {server.stats()}")
+        ok = mode == "DOCKING" and rejected == 1 and img is not None and n <= server.MAX_FPS * 2 + 2
+        print("OK" if ok else "FAILED")
+        return ok
+    finally:
+        stop.set()
+        src.join()
+        server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry server (MJPEG + WebSocket) demo / test client")
+    parser.add_argument("--demo", action="store_true", help="가짜 영상/상태로 서버 실행 (브라우저로 확인)")
+    parser.add_argument("--selftest", action="store_true", help="localhost 에서 서버 + 테스트 클라이언트로 확인")
+    parser.add_argument("--client", help="ws://host:port 에 붙어서 상태 출력")
+    parser.add_argument("--mode", choices=MODES, help="--client 와 같이: 모드 전환 명령 전송")
+    parser.add_argument("--host", default="127.0.0.1", help="다른 장치에서 보려면 0.0.0.0 등 명시")
+    parser.add_argument("--token", help="모드 전환 명령 토큰 (--demo: 없으면 보기 전용, --client: 명령 보낼 때 필요)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fps", type=float, default=10.0, help="MJPEG 최대 fps")
+    args = parser.parse_args()
+
+    if args.selftest:
+        raise SystemExit(0 if selftest() else 1)
+
+    if args.client:
+        url = urlparse(args.client)
+        sock, rfile = ws_connect(url.hostname, url.port or 80, token=args.token)
+        if args.mode:
+            sock.sendall(ws_encode(json.dumps({"mode": args.mode}), mask=True))
+        try:
+            while True:
+                frame = ws_read_frame(rfile)
+                if frame is None or frame[0] == 0x8:
+                    break
+                print(frame[1].decode())
+        except KeyboardInterrupt:
+            pass
+        sock.close()
+        return
+
+    if args.demo:
+        server = TelemetryServer(args.host, args.port, max_fps=args.fps, token=args.token)
+        print(f"telemetry demo on {server.url()}" + ("" if args.token else " (view only, no --token)"))
+        stop = threading.Event()
+        try:
+            run_demo_source(server, stop)
+        except KeyboardInterrupt:
+            pass
+        server.close()
+        return
+
+    parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import numpy as np
+
+from camera_stream import LatestFrameCapture
+
+class FakeCap:
+    def __init__(self, delays, block=None):
+        self.delays = list(delays)  # read() 마다 걸리는 시간 (초), 다 쓰면 실패 (스트림 끝)
+        self.block = block          # 설정하면 read() 가 이 Event 까지 막힘
+        self.released = False
+
+    def read(self):
+        if self.block is not None:
+            self.block.wait()
+        if not self.delays:
+            return False, None
+        time.sleep(self.delays.pop(0))
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released = True
+
+def make_capture(cap, **kwargs):
+    stream = LatestFrameCapture("missing.mp4", **kwargs)
+    stream.cap = cap
+    return stream.start()
+
+def test_read_survives_short_stall():
+    stream = make_capture(FakeCap([0.0, 0.25]), read_timeout=0.1, max_stalls=3)
+    assert stream.read()[0]
+    ok, frame, _, seq = stream.read()
+    assert ok and seq == 2 and stream.stats()["stalls"] >= 1
+    assert not stream.read()[0]   # 스트림 끝 -> 바로 실패
+    stream.release()
+
+def test_read_gives_up_after_max_stalls():
+    gate = threading.Event()
+    stream = make_capture(FakeCap([0.0], block=gate), read_timeout=0.05, max_stalls=2)
+    t0 = time.monotonic()
+    assert not stream.read()[0]
+    assert stream.stats()["stalls"] == 3 and time.monotonic() - t0 < 1.0
+    gate.set()
+    stream.release()
+
+def test_release_waits_for_blocked_reader():
+    gate = threading.Event()
+    cap = FakeCap([0.0], block=gate)
+    stream = make_capture(cap)
+    thread = stream.thread
+    stream.release()
+    assert thread.is_alive() and not cap.released   # 읽기 중에는 해제하지 않음
+    gate.set()
+    thread.join(timeout=1.0)
+    assert cap.released
@@ -0,0 +1,42 @@
+import numpy as np
+
+from change_gate import ChangeGate
+
+def scene(rng):
+    return rng.integers(0, 256, (240, 320), dtype=np.uint8)
+
+def test_static_scene_is_reused_until_max_age():
+    rng = np.random.default_rng(0)
+    gate = ChangeGate(max_age=0.5)
+    img = scene(rng)
+    assert gate.changed(img, 0.0)      # 기준 없음
+    gate.commit(img, None, 0.0)
+    noisy = np.clip(img.astype(np.int16) + rng.integers(-2, 3, img.shape), 0, 255).astype(np.uint8)
+    assert not gate.changed(noisy, 0.1)
+    assert gate.changed(noisy, 0.6)    # 기준이 오래됨
+    assert gate.stats() == {"checks": 1, "reused": 1}
+
+def test_small_change_inside_box_is_detected():
+    rng = np.random.default_rng(1)
+    gate = ChangeGate()
+    img = scene(rng)
+    gate.commit(img, (100, 80, 140, 120), 0.0)
+    moved = img.copy()
+    moved[90:100, 110:120] = 255 - moved[90:100, 110:120]
+    assert gate.changed(moved, 0.1)
+
+def test_change_outside_box_is_ignored():
+    rng = np.random.default_rng(2)
+    gate = ChangeGate()
+    img = scene(rng)
+    gate.commit(img, (100, 80, 140, 120), 0.0)
+    other = img.copy()
+    other[:40, :40] = 0
+    assert not gate.changed(other, 0.1)
+
+def test_resolution_change_forces_detection():
+    rng = np.random.default_rng(3)
+    gate = ChangeGate()
+    img = scene(rng)
+    gate.commit(img, None, 0.0)
+    assert gate.changed(img[:120, :160], 0.1)
@@ -0,0 +1,49 @@
+import threading
+
+from command_channel import CommandPublisher, decode_command
+
+class FakeTransport:
+    def __init__(self, block=None):
+        self.block = block      # 설정하면 첫 send 에서 이 Event 까지 막힘 (쓰기 멈춤 흉내)
+        self.lines = []
+        self.calls = []
+        self.active = 0
+        self.overlap = False
+        self.lock = threading.Lock()
+
+    def send(self, data):
+        with self.lock:
+            self.active += 1
+            self.overlap |= self.active > 1
+        if self.block is not None and not self.lines:
+            self.lines.append(data)
+            self.block.wait()
+        else:
+            self.lines.append(data)
+        with self.lock:
+            self.active -= 1
+
+    def flush(self):
+        self.calls.append("flush")
+
+    def close(self):
+        self.calls.append("close")
+
+def test_close_sends_final_stop_then_flushes():
+    t = FakeTransport()
+    pub = CommandPublisher(t, rate_hz=50.0)
+    pub.publish("FORWARD", (0.5,))
+    pub.close()
+    assert decode_command(t.lines[-1].decode())[3] == "STOP"
+    assert t.calls == ["flush", "close"]
+    assert not pub.thread.is_alive()
+
+def test_close_skips_stop_while_sender_blocked():
+    release = threading.Event()
+    t = FakeTransport(block=release)
+    pub = CommandPublisher(t, rate_hz=50.0)
+    pub.close()
+    assert len(t.lines) == 1 and t.calls == []
+    release.set()
+    pub.thread.join(timeout=1.0)
+    assert not pub.thread.is_alive() and not t.overlap
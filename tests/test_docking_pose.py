@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+import pytest
+
+from docking_ai import DockingAI
+
+@pytest.fixture(scope="module")
+def ai():
+    return DockingAI(headless=True, detector_profile_path=None)
+
+def random_corners(ai, rng, n):
+    # 카메라 앞 10~40cm, 기울기 +-40도 마커를 왜곡 포함 투영 -> (n, 4, 2)
+    out = []
+    for _ in range(n):
+        rvec = np.radians(rng.uniform(-40, 40, 3))
+        tvec = np.array([rng.uniform(-3, 3), rng.uniform(-2, 2), rng.uniform(10, 40)])
+        img, _ = cv2.projectPoints(ai.obj_points, rvec, tvec, ai.camera_matrix, ai.dist_coeffs)
+        out.append(img.reshape(4, 2))
+    return np.array(out, dtype=np.float32)
+
+def test_marker_poses_match_solvepnp(ai):
+    corners = random_corners(ai, np.random.default_rng(0), 200)
+    R, t = ai.estimate_marker_poses(corners)
+
+    # 회전 행렬 (직교, det = +1)
+    assert np.allclose(np.linalg.det(R), 1.0, atol=1e-6)
+    assert np.allclose(R @ R.transpose(0, 2, 1), np.eye(3), atol=1e-6)
+
+    for i in range(len(corners)):
+        _, rvecs, tvecs, _ = cv2.solvePnPGeneric(ai.obj_points, corners[i], ai.camera_matrix, ai.dist_coeffs,
+                                                 flags=cv2.SOLVEPNP_IPPE_SQUARE)
+        assert np.allclose(R[i], cv2.Rodrigues(rvecs[0])[0], atol=1e-6)
+        assert np.allclose(t[i], tvecs[0].ravel(), atol=1e-6)
+
+def test_euler_from_matrices_matches_scalar(ai):
+    corners = random_corners(ai, np.random.default_rng(1), 50)
+    R, _ = ai.estimate_marker_poses(corners)
+    euler = ai.euler_from_matrices(R)
+    for i in range(len(R)):
+        expected = ai.euler_from_quaternion(cv2.Rodrigues(R[i])[0])
+        assert np.allclose(euler[i], expected, atol=1e-6)
+
+def test_marker_summaries_columns(ai):
+    corners = random_corners(ai, np.random.default_rng(2), 3)
+    out = ai.marker_summaries(np.array([3, 7, 9]), corners)
+    assert out.shape == (3, 5)
+    assert out[:, 0].tolist() == [3, 7, 9]
+    assert (out[:, 1] > 0).all()
+
+def test_image_undistort_overlay_in_frame_coords():
+    # "image" 모드: 보정 영상에서 검출해도 center / 오버레이는 원본 프레임 좌표
+    ai = DockingAI(headless=False, detector_profile_path=None)
+    ai.UNDISTORT_MODE = "image"
+    ai.USE_CHANGE_GATE = False
+    frame = np.full((480, 640, 3), 255, np.uint8)
+    marker = cv2.aruco.generateImageMarker(ai.aruco_dict, ai.TARGET_ID, 80)
+    x0, y0 = 540, 380   # 가장자리 (왜곡이 큰 곳)
+    frame[y0:y0 + 80, x0:x0 + 80] = marker[:, :, None]
+    data, out = ai.process(frame, 0.0)
+    assert data.found
+    assert np.hypot(data.center[0] - (x0 + 40), data.center[1] - (y0 + 40)) <= 2.0
+
+def test_tune_detector_baseline_matches_docking_ai(ai):
+    from detector_profile import DetectorProfile
+    from tune_detector import BASELINE
+    assert DetectorProfile.from_parameters(ai.parameters).params == BASELINE
+
+def test_check_id_uses_same_detector_params(ai):
+    from check_id import make_detector
+    from detector_profile import DetectorProfile
+    detector, _ = make_detector(["6X6_250"])
+    assert DetectorProfile.from_parameters(detector.getDetectorParameters()).params == \
+        DetectorProfile.from_parameters(ai.parameters).params
+
+def test_change_gate_reuses_marker_summaries(monkeypatch):
+    # 정지 장면: 재사용 프레임은 나머지 마커 포즈를 다시 계산하지 않음
+    ai = DockingAI(headless=True, detector_profile_path=None)
+    ai.USE_CHANGE_GATE = True
+    frame = np.full((480, 640, 3), 255, np.uint8)
+    for mid, x0 in ((ai.TARGET_ID, 100), (7, 400)):
+        frame[200:280, x0:x0 + 80] = cv2.aruco.generateImageMarker(ai.aruco_dict, mid, 80)[:, :, None]
+    data, _ = ai.process(frame.copy(), 0.0)
+    assert not data.reused and data.markers is not None
+    first = data.markers.copy()
+
+    calls = []
+    summaries = ai.marker_summaries
+    monkeypatch.setattr(ai, "marker_summaries", lambda *a: calls.append(1) or summaries(*a))
+    data, _ = ai.process(frame.copy(), 0.1)
+    assert data.reused and not calls
+    assert np.array_equal(data.markers, first)
@@ -0,0 +1,64 @@
+import multiprocessing as mp
+import time
+import numpy as np
+
+from frame_bus import FrameBus
+
+SHAPE = (480, 640, 3)
+
+def writer(spec, seconds):
+    # 프레임 전체를 (seq % 251) 한 값으로 채워 쉬지 않고 발행 -> 찢어진 읽기는 값이 섞여 보임
+    bus = FrameBus.attach(spec)
+    frame = np.empty(SHAPE, dtype=np.uint8)
+    try:
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            frame[...] = (bus.seq + 1) % 251
+            bus.publish(frame, float(bus.seq + 1))
+        bus.close_stream()
+    finally:
+        bus.close()
+
+def test_read_latest_and_copy():
+    bus = FrameBus(SHAPE, slots=2)
+    try:
+        ok, _, _, _ = bus.read(0, timeout=0.01)
+        assert not ok
+        for v in (1, 2, 3):
+            bus.publish(np.full(SHAPE, v, dtype=np.uint8), v * 0.5)
+        ok, frame, ts, seq = bus.read(0, timeout=0.1)
+        assert ok and seq == 3 and ts == 1.5 and (frame == 3).all()
+        # 반환값은 복사본: 다음 발행이 덮어써도 그대로
+        bus.publish(np.full(SHAPE, 9, dtype=np.uint8), 0.4)
+        bus.publish(np.full(SHAPE, 9, dtype=np.uint8), 0.5)
+        assert (frame == 3).all()
+        ok, _, _, _ = bus.read(5, timeout=0.01)
+        assert not ok
+    finally:
+        bus.close()
+
+def test_no_torn_frames_across_processes():
+    # 슬롯 1개: 모든 발행이 읽는 중인 슬롯을 덮어씀 (잠금 없이 읽으면 수백 번 중 1/3 정도가 찢어짐)
+    ctx = mp.get_context("spawn")
+    bus = FrameBus(SHAPE, slots=1, ctx=ctx)
+    proc = ctx.Process(target=writer, args=(bus.spec(), 0.5), daemon=True)
+    try:
+        proc.start()
+        seq, reads = 0, 0
+        while True:
+            ok, frame, ts, new_seq = bus.read(seq, timeout=5.0, poll=0)
+            if not ok:
+                break
+            assert new_seq > seq
+            assert ts == float(new_seq)
+            # 프레임 전체가 그 seq 의 값 하나여야 함 (쓰는 중/다른 프레임과 섞이지 않음)
+            assert frame.min() == frame.max() == new_seq % 251
+            seq = new_seq
+            reads += 1
+        proc.join(timeout=5.0)
+        assert proc.exitcode == 0
+        assert reads > 0
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        bus.close()
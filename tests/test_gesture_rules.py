@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import gesture_fixtures as fx
+from gesture_rules import GestureState, classify, classify_sequence, no_human
+
+W, H = 640, 480
+
+def state_for(stage_key):
+    return GestureState(is_finished=True) if stage_key == "finished" else GestureState(stage=stage_key)
+
+@pytest.mark.parametrize("name,stage_key,action,info", fx.EXPECTED,
+                         ids=[f"{n}@{s}" for n, s, _, _ in fx.EXPECTED])
+def test_rule_table(name, stage_key, action, info):
+    d = classify(fx.pose(name), W, H, state_for(stage_key), 0.0)
+    assert d.action == action
+    if info is not None:
+        assert d.info == info
+
+@pytest.mark.parametrize("name,stage_key,action,info", fx.EXPECTED)
+def test_rule_table_with_jitter(name, stage_key, action, info):
+    # 키포인트 떨림 (2px) 에도 같은 판단
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        d = classify(fx.pose(name, jitter=2.0, rng=rng), W, H, state_for(stage_key), 0.0)
+        assert d.action == action
+
+def test_hold_triggers_transition_once():
+    state = GestureState(stage=1)
+    decisions = classify_sequence(fx.script_sequence([("FAST_WAVE", 1.5)]), W, H, state)
+    assert [d.transition for d in decisions if d.transition] == ["next"]
+    assert decisions[-1].state.stage == 2
+
+def test_short_hold_does_not_trigger():
+    decisions = classify_sequence(fx.script_sequence([("FAST_WAVE", 0.6), ("ARMS_LEVEL", 0.5)]), W, H,
+                                  GestureState(stage=1))
+    assert not any(d.transition for d in decisions)
+    assert decisions[-1].state.stage == 1
+
+def test_no_human_releases_hold():
+    state = GestureState(stage=1, hold_start=0.0, hold_time=0.5)
+    d = no_human(state)
+    assert d.action == "IDLE" and d.state.hold_start is None and d.state.hold_time == 0.0
+
+@pytest.mark.parametrize("seq_fn,stage,info", [
+    (fx.wave_sequence, 2, "SPEED: SLOW (WAVE)"),
+    (fx.beckon_sequence, 1, "BECKON: COME FORWARD"),
+])
+def test_motion_gestures(seq_fn, stage, info):
+    seq = seq_fn()
+    tail = classify_sequence(seq, W, H, GestureState(stage=stage))[-15:]
+    assert sum(d.info == info for d in tail) >= len(tail) * 0.9
+    # 같은 자세로 멈춰 있으면 움직임 제스처 아님
+    still = classify_sequence([(ts, seq[0][1], ts) for ts, _, _ in seq], W, H, GestureState(stage=stage))
+    assert not any(d.info == info for d in still)
+
+def test_full_mission():
+    seq = fx.script_sequence(fx.MISSION, jitter=1.0, rng=np.random.default_rng(0))
+    decisions = classify_sequence(seq, W, H)
+    assert [d.transition for d in decisions if d.transition] == fx.MISSION_TRANSITIONS
+    assert decisions[-1].state.stage == 0 and not decisions[-1].state.is_finished
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+
+from pose_tracker import PoseKalmanTracker
+
+def rvec_of(deg):
+    # 축-각 (도) -> rvec (3, 1)
+    return np.radians(np.asarray(deg, dtype=np.float64)).reshape(3, 1)
+
+def angle_between(r1, r2):
+    return np.degrees(np.linalg.norm(cv2.Rodrigues(cv2.Rodrigues(r1)[0].T @ cv2.Rodrigues(r2)[0])[0]))
+
+def test_constant_velocity_extrapolation():
+    # 등속 접근 + 잡음 측정 -> 0.1s 뒤 외삽 위치가 실제와 가까움
+    rng = np.random.default_rng(0)
+    tracker = PoseKalmanTracker()
+    v = np.array([1.0, 0.0, -3.0])   # cm/s
+    p0 = np.array([0.0, 0.0, 30.0])
+    rvec = rvec_of([0, 10, 0])
+    for i in range(60):
+        ts = i / 30.0
+        z = p0 + v * ts + rng.normal(0.0, [0.03, 0.03, 0.15])
+        tracker.update([rvec], [z.reshape(3, 1)], ts)
+    ahead = 59 / 30.0 + 0.1
+    _, tvec = tracker.pose_at(ahead)
+    assert np.linalg.norm(tvec.ravel() - (p0 + v * ahead)) < 0.3
+
+def test_picks_ippe_candidate_closest_to_prediction():
+    tracker = PoseKalmanTracker()
+    good, flipped = rvec_of([0, 20, 0]), rvec_of([0, -20, 0])
+    tvec = np.array([[0.0], [0.0], [20.0]])
+    tracker.update([good], [tvec], 0.0)
+    for i in range(1, 10):
+        # 두 번째 후보가 맞는 해인 프레임도 섞임
+        cands = [good, flipped] if i % 2 else [flipped, good]
+        idx = tracker.update(cands, [tvec, tvec], i / 30.0)
+        assert cands[idx] is good
+    assert angle_between(tracker.pose_at(9 / 30.0)[0], good) < 1.0
+
+def test_jump_reinitializes():
+    tracker = PoseKalmanTracker(gate_cm=5.0)
+    rvec = rvec_of([0, 0, 0])
+    tracker.update([rvec], [np.array([[0.0], [0.0], [20.0]])], 0.0)
+    tracker.update([rvec], [np.array([[0.0], [0.0], [20.0]])], 0.1)
+    tracker.update([rvec], [np.array([[10.0], [0.0], [20.0]])], 0.2)
+    _, tvec = tracker.pose_at(0.2)
+    assert np.allclose(tvec.ravel(), [10.0, 0.0, 20.0])
+    assert np.allclose(tracker.x[3:], 0.0)
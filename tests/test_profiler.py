@@ -0,0 +1,21 @@
+import threading
+
+from profiler import StageProfiler
+
+def test_summary_while_worker_adds_stages():
+    # 워커 스레드가 처음 보는 구간을 계속 추가하는 동안 HUD/텔레메트리 쪽에서 summary
+    prof = StageProfiler()
+    with prof.stage("main"):
+        pass
+
+    def worker():
+        for i in range(50000):
+            prof.stage(f"worker.{i}")
+
+    t = threading.Thread(target=worker)
+    t.start()
+    try:
+        while t.is_alive():
+            assert list(prof.summary()["stages"]) == ["main"]
+    finally:
+        t.join()
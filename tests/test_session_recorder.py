@@ -0,0 +1,52 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import session_recorder
+from session_recorder import ReplayCapture, SessionRecorder, load_session
+
+def frame_of(v):
+    return np.full((48, 64, 3), v, np.uint8)
+
+def test_record_and_replay_lossless(tmp_path):
+    rec = SessionRecorder(root=str(tmp_path), lossless=True, meta={"source": "test"})
+    for i in range(5):
+        rec.record(frame_of(i * 10), i * 0.1, i + 1, "DOCKING", {"found": True, "dist_cm": np.float32(20 - i)})
+    rec.close()
+    meta, records = load_session(rec.path)
+    assert meta["source"] == "test"
+    assert [r["seq"] for r in records] == [1, 2, 3, 4, 5]
+    assert records[2]["result"]["dist_cm"] == 18.0
+
+    cap = ReplayCapture(rec.path)
+    for i in range(5):
+        ok, frame, ts, seq = cap.read()
+        assert ok and seq == i + 1 and ts == i * 0.1
+        assert np.array_equal(frame, frame_of(i * 10))
+    assert not cap.read()[0]
+
+@pytest.mark.parametrize("policy,kept", [("oldest", [1, 5, 6]), ("newest", [1, 2, 3])])
+def test_drop_policy_keeps_result_lines(tmp_path, monkeypatch, policy, kept):
+    # 첫 프레임 인코딩에서 기록 스레드를 멈춰 두고 큐를 넘치게 함
+    entered, release = threading.Event(), threading.Event()
+    imencode = cv2.imencode
+    def slow_imencode(*args):
+        entered.set()
+        release.wait()
+        return imencode(*args)
+    monkeypatch.setattr(session_recorder.cv2, "imencode", slow_imencode)
+
+    rec = SessionRecorder(root=str(tmp_path), max_queue=2, drop_policy=policy)
+    rec.record(frame_of(0), 0.0, 1, "MARSHAL", {})
+    assert entered.wait(2.0)
+    for i in range(2, 7):
+        rec.record(frame_of(i), i * 0.1, i, "MARSHAL", {})
+    assert rec.stats()["dropped_frames"] == 3
+    release.set()
+    rec.close()
+
+    _, records = load_session(rec.path)
+    assert [r["seq"] for r in records] == [1, 2, 3, 4, 5, 6]
+    assert [r["seq"] for r in records if r["frame"] is not None] == kept
@@ -0,0 +1,236 @@
+import cv2
+import numpy as np
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from detector_profile import DetectorProfile, DEFAULT_DETECTOR_PROFILE_PATH, MANUAL_PARAMS, threshold_passes
+
+# =========================================================
+# ArUco DetectorParameters 자동 튜닝
+# - 프레임 세트 (폴더) 에서 파라미터 후보마다 검출률 / 코너 오차(px) / 프레임당 ms 측정
+#   정답 코너: labels.json (benchmark_docking.py --export 로 만든 합성 세트)
+#             없으면 (녹화 프레임) 촘촘한 기준 검출기 결과를 정답으로 사용
+# - 후보 평가는 프로세스 풀 (프로세스마다 프레임을 한 번만 읽어 둠, OpenCV 스레드 1개)
+# - 결과: 파레토 프런트 (검출률 높고, 오차 작고, 빠른 것 중 서로 지배하지 않는 후보)
+#         + 조건(검출률/오차가 현재 설정보다 나쁘지 않음)을 만족하는 가장 빠른 후보를 프로파일로 저장
+#   python benchmark_docking.py --export tuning_frames --mode random --frames 300
+#   python tune_detector.py --frames tuning_frames
+# =========================================================
+
+DICT_ID = cv2.aruco.DICT_6X6_250
+TARGET_ID = 0
+
+# DockingAI 의 수동 튜닝 값 (비교 기준, 항상 후보에 포함)
+BASELINE = dict(MANUAL_PARAMS)
+
+# 탐색 공간: adaptive threshold 창은 (최소, 간격, 횟수) 조합 -> 이진화 횟수가 속도를 좌우
+SEARCH_SPACE = {
+    "minMarkerPerimeterRate": [0.01, 0.015, 0.02, 0.03],
+    "windows": [(lo, step, n) for lo in (3, 5, 7) for step in (4, 6, 10) for n in (1, 2, 3, 5)],
+    "perspectiveRemovePixelPerCell": [4, 6, 8, 10],
+    "cornerRefinementMethod": ["none", "subpix", "contour"],
+}
+
+def candidates(samples, seed):
+    grid = []
+    for rate, (lo, step, n), ppc, refine in itertools.product(*SEARCH_SPACE.values()):
+        grid.append({
+            "minMarkerPerimeterRate": rate,
+            "adaptiveThreshWinSizeMin": lo,
+            "adaptiveThreshWinSizeMax": lo + step * (n - 1),
+            "adaptiveThreshWinSizeStep": step,
+            "perspectiveRemovePixelPerCell": ppc,
+            "cornerRefinementMethod": refine,
+        })
+    # 창 1개짜리는 간격이 달라도 같은 후보
+    unique = {json.dumps(c, sort_keys=True): c for c in grid}
+    grid = list(unique.values())
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return [dict(BASELINE)] + [c for c in grid if c != BASELINE]
+
+# ---------------------------------------------------------
+# 프레임 세트 / 정답
+# ---------------------------------------------------------
+def list_frames(path):
+    return sorted(f for ext in ("*.png", "*.jpg", "*.jpeg", "*.bmp") for f in glob.glob(os.path.join(path, ext)))
+
+def reference_parameters():
+    # 정답이 없는 녹화 프레임용: 느려도 최대한 많이/정확히 찾는 설정
+    p = cv2.aruco.DetectorParameters()
+    p.minMarkerPerimeterRate = 0.005
+    p.adaptiveThreshWinSizeMin = 3
+    p.adaptiveThreshWinSizeMax = 53
+    p.adaptiveThreshWinSizeStep = 4
+    p.perspectiveRemovePixelPerCell = 10
+    p.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_SUBPIX
+    p.cornerRefinementWinSize = 5
+    p.cornerRefinementMinAccuracy = 0.01
+    return p
+
+def find_target(detector, gray):
+    corners, ids, _ = detector.detectMarkers(gray)
+    if ids is None:
+        return None
+    hit = np.flatnonzero(ids.ravel() == TARGET_ID)
+    return corners[hit[0]].reshape(4, 2) if len(hit) else None
+
+def load_labels(path, files, workers):
+    # -> {파일 이름: 코너 (4, 2) 또는 None (타겟 없음)}, 정답 종류
+    label_path = os.path.join(path, "labels.json")
+    if os.path.exists(label_path):
+        with open(label_path) as f:
+            frames = json.load(f)["frames"]
+        return {name: None if c is None else np.asarray(c, np.float64) for name, c in frames.items()}, "labels"
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        found = list(pool.map(reference_detect, files, chunksize=16))
+    return {os.path.basename(f): c for f, c in zip(files, found)}, "reference"
+
+def reference_detect(fname):
+    cv2.setNumThreads(1)
+    detector = cv2.aruco.ArucoDetector(cv2.aruco.getPredefinedDictionary(DICT_ID), reference_parameters())
+    c = find_target(detector, cv2.imread(fname, cv2.IMREAD_GRAYSCALE))
+    return None if c is None else c.astype(np.float64)
+
+# ---------------------------------------------------------
+# 후보 평가 (프로세스 풀)
+# ---------------------------------------------------------
+_frames = None  # 작업 프로세스: [(gray, 정답 코너 or None), ...]
+
+def init_worker(files, labels):
+    global _frames
+    cv2.setNumThreads(1)
+    _frames = [(cv2.imread(f, cv2.IMREAD_GRAYSCALE), labels.get(os.path.basename(f))) for f in files]
+
+def evaluate(params, repeats=1):
+    p = DetectorProfile(params).make_parameters()
+    detector = cv2.aruco.ArucoDetector(cv2.aruco.getPredefinedDictionary(DICT_ID), p)
+    times, errors = [], []
+    hits = positives = false_hits = 0
+    for gray, gt in _frames:
+        best = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            c = find_target(detector, gray)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        times.append(best * 1000.0)
+        if gt is None:
+            false_hits += c is not None
+            continue
+        positives += 1
+        if c is not None:
+            # 코너 순서가 다르면 (회전 오검출) 큰 오차로 드러남
+            err = np.linalg.norm(c - gt, axis=1).mean()
+            if err < 5.0:
+                hits += 1
+                errors.append(err)
+            else:
+                false_hits += 1
+    ms = np.asarray(times)
+    err = np.asarray(errors) if errors else None
+    return {
+        "params": params,
+        "threshold_passes": threshold_passes(params),
+        "detection_rate": hits / positives if positives else 0.0,
+        "false_hits": false_hits,
+        "corner_err_px": None if err is None else round(float(err.mean()), 4),
+        "corner_err_p95_px": None if err is None else round(float(np.percentile(err, 95)), 4),
+        "ms_mean": round(float(ms.mean()), 4),
+        "ms_p95": round(float(np.percentile(ms, 95)), 4),
+    }
+
+def dominates(a, b):
+    # a 가 b 보다 모든 기준에서 같거나 좋고 하나 이상 더 좋음 (검출률 높게, 오류 적게, 오차/ms 작게)
+    ka = (-a["detection_rate"], a["false_hits"], a["corner_err_px"] if a["corner_err_px"] is not None else np.inf, a["ms_mean"])
+    kb = (-b["detection_rate"], b["false_hits"], b["corner_err_px"] if b["corner_err_px"] is not None else np.inf, b["ms_mean"])
+    return all(x <= y for x, y in zip(ka, kb)) and ka != kb
+
+def pareto_front(results):
+    front = [r for r in results if not any(dominates(o, r) for o in results if o is not r)]
+    return sorted(front, key=lambda r: r["ms_mean"])
+
+def choose(front, baseline, min_detection, max_error):
+    # 검출률/오차 조건을 만족하는 가장 빠른 후보 (없으면 기준값 유지)
+    min_det = baseline["detection_rate"] if min_detection is None else min_detection
+    base_err = baseline["corner_err_px"] if baseline["corner_err_px"] is not None else np.inf
+    max_err = base_err * 1.1 if max_error is None else max_error
+    ok = [r for r in front if r["detection_rate"] >= min_det and r["false_hits"] <= baseline["false_hits"]
+          and r["corner_err_px"] is not None and r["corner_err_px"] <= max_err]
+    return min(ok, key=lambda r: r["ms_mean"]) if ok else baseline
+
+def print_row(tag, r):
+    p = r["params"]
+    err = "-" if r["corner_err_px"] is None else f"{r['corner_err_px']:.3f}"
+    print(f"{tag:>3} det {r['detection_rate'] * 100:5.1f}% | err {err:>6}px | {r['ms_mean']:6.2f}ms | fp {r['false_hits']:2d} | "
+          f"rate {p['minMarkerPerimeterRate']:.3f} win {p['adaptiveThreshWinSizeMin']}-{p['adaptiveThreshWinSizeMax']}/"
+          f"{p['adaptiveThreshWinSizeStep']} ({r['threshold_passes']}x) ppc {p['perspectiveRemovePixelPerCell']} {p['cornerRefinementMethod']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Search ArUco DetectorParameters over a frame set")
+    parser.add_argument("--frames", help="프레임 폴더 (labels.json 있으면 정답 사용). 없으면 합성 세트를 임시로 렌더링")
+    parser.add_argument("--synthetic", type=int, default=200, help="--frames 가 없을 때 합성 프레임 수")
+    parser.add_argument("--samples", type=int, default=200, help="무작위로 고를 후보 수 (0 이면 전체 격자)")
+    parser.add_argument("--repeats", type=int, default=1, help="프레임마다 반복 측정해서 최소 시간 사용")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-detection", type=float, default=None, help="프로파일 조건: 최소 검출률 (기본: 현재 설정 검출률)")
+    parser.add_argument("--max-error", type=float, default=None, help="프로파일 조건: 최대 평균 코너 오차 px (기본: 현재 설정 x 1.1)")
+    parser.add_argument("--out", default="tune_results.json", help="전체 후보 결과 + 파레토 프런트 JSON")
+    parser.add_argument("--profile", default=DEFAULT_DETECTOR_PROFILE_PATH, help="DockingAI 가 읽는 프로파일 경로")
+    parser.add_argument("--no-save", action="store_true", help="프로파일 저장 안 함")
+    args = parser.parse_args()
+
+    frames_dir = args.frames
+    if frames_dir is None:
+        from benchmark_docking import export_frames
+        frames_dir = tempfile.mkdtemp(prefix="tune_frames_")
+        export_frames(frames_dir, frames=args.synthetic, mode="random", seed=args.seed)
+        print(f"synthetic frame set: {args.synthetic} frames -> {frames_dir}")
+
+    files = list_frames(frames_dir)
+    if not files:
+        parser.error(f"no frames in {frames_dir}")
+    labels, label_kind = load_labels(frames_dir, files, args.workers)
+    positives = sum(c is not None for c in labels.values())
+    cands = candidates(args.samples, args.seed)
+    print(f"{len(files)} frames ({positives} with target, ground truth: {label_kind}), {len(cands)} candidates")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(files, labels)) as pool:
+        results = list(pool.map(evaluate, cands, itertools.repeat(args.repeats)))
+    print(f"search took {time.perf_counter() - t0:.1f}s")
+
+    baseline = results[0]
+    front = pareto_front(results)
+    best = choose(front, baseline, args.min_detection, args.max_error)
+
+    print("--- baseline (DockingAI 수동 튜닝) ---")
+    print_row("", baseline)
+    print(f"--- pareto front ({len(front)}) ---")
+    for r in front:
+        print_row("*" if r is best else "", r)
+
+    with open(args.out, "w") as f:
+        json.dump({"frames": frames_dir, "n_frames": len(files), "ground_truth": label_kind,
+                   "baseline": baseline, "selected": best, "pareto": front, "all": results}, f, indent=2)
+    print(f"results: {args.out}")
+
+    if best is baseline:
+        print("no candidate beats the baseline under the constraints -> profile not written")
+    elif not args.no_save:
+        metrics = {k: best[k] for k in ("detection_rate", "false_hits", "corner_err_px", "ms_mean")}
+        metrics["baseline_ms_mean"] = baseline["ms_mean"]
+        metrics["frames"] = len(files)
+        DetectorProfile(best["params"], metrics=metrics, source=f"tune_detector.py ({label_kind}: {frames_dir})").save(args.profile)
+        print(f"profile: {args.profile} ({baseline['ms_mean']:.2f} -> {best['ms_mean']:.2f} ms/frame)")
+
+if __name__ == "__main__":
+    main()